@@ -0,0 +1,165 @@
+"""Benchmark accuracy and latency of the local n-gram category classifier.
+
+Trains on a share of labelled merchants and reports, on the held-out rest,
+top-1 accuracy plus coverage (share of rows classified without the agent)
+and precision at several confidence thresholds. By default the data is a
+synthetic set of merchant spelling variants; ``--database-url`` uses the
+labelled history of a real database instead.
+
+Usage:
+    poetry run python -m benchmarks.bench_classifier [--brands 2000] [--database-url URL]
+"""
+
+import argparse
+import random
+import time
+
+from src.database import create_db_engine, get_labeled_merchants
+from src.graphs.nodes.categorizer_node import NgramCategoryClassifier
+
+CATEGORY_WORDS = {
+    "Food": ["PADARIA", "RESTAURANTE", "LANCHONETE", "PIZZARIA", "SUPERMERCADO", "ACOUGUE"],
+    "Transport": ["POSTO", "AUTO POSTO", "ESTACIONAMENTO", "PEDAGIO", "TAXI"],
+    "Shopping": ["LOJAS", "MAGAZINE", "CALCADOS", "PAPELARIA", "BAZAR"],
+    "Entertainment": ["CINEMA", "TEATRO", "BAR", "GAMES", "SHOW"],
+    "Bills": ["ENERGIA", "TELECOM", "SANEAMENTO", "CONDOMINIO", "SEGUROS"],
+    "Health": ["FARMACIA", "DROGARIA", "CLINICA", "LABORATORIO", "ODONTO"],
+}
+SYLLABLES = (
+    "ba be bi bo ca co da de di fa fe ga go la le li lo ma me mi mo na ne no pa pe ra re ri ro "
+    "sa se so ta te ti to va vi za"
+).split()
+PREFIXES = ["", "", "PAG*", "MP*", "PG *", "EC *"]
+SUFFIXES = ["", "", " SAO PAULO BR", " SP", " RJ", " LTDA", " - CURITIBA"]
+
+
+def brand_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).upper()
+
+
+def merchant_variant(rng: random.Random, word: str, brand: str) -> str:
+    if not word:
+        core = brand
+    else:
+        core = f"{word} {brand}" if rng.random() < 0.7 else f"{brand} {word}"
+    if rng.random() < 0.5:
+        core += f" {rng.randint(1, 9999)}"
+    return f"{rng.choice(PREFIXES)}{core}{rng.choice(SUFFIXES)}"
+
+
+def synthetic_examples(
+    brands: int, variants: int, plain_share: float, noise: float, seed: int = 42
+) -> list[tuple]:
+    """Build ``(merchant, description, category, brand)`` rows.
+
+    Each brand belongs to one category and appears in several spellings.
+    Most carry a category-typical word (``"FARMACIA"``, ``"POSTO"``) in their
+    name, ``plain_share`` are a bare brand name, and ``noise`` of the rows
+    are labelled with a random category.
+    """
+    rng = random.Random(seed)
+    categories = list(CATEGORY_WORDS)
+    rows = []
+    for brand_id in range(brands):
+        category = rng.choice(categories)
+        word = "" if rng.random() < plain_share else rng.choice(CATEGORY_WORDS[category])
+        brand = brand_name(rng)
+        for _ in range(variants):
+            merchant = merchant_variant(rng, word, brand)
+            label = rng.choice(categories) if rng.random() < noise else category
+            rows.append((merchant, merchant, label, brand_id))
+    return rows
+
+
+def split_by_group(rows: list[tuple], holdout: float, seed: int = 42) -> tuple[list, list, list]:
+    """Split rows into training rows, unseen spellings of known groups and unseen groups."""
+    rng = random.Random(seed)
+    groups = sorted({row[3] for row in rows})
+    unseen_groups = set(rng.sample(groups, int(len(groups) * holdout)))
+    train, seen, unseen = [], [], []
+    for row in rows:
+        if row[3] in unseen_groups:
+            unseen.append(row)
+        elif rng.random() < holdout:
+            seen.append(row)
+        else:
+            train.append(row)
+    return train, seen, unseen
+
+
+def database_examples(url: str, limit: int) -> list[tuple]:
+    engine = create_db_engine(url)
+    rows = get_labeled_merchants(limit=limit, exclude_category="Other", db_engine=engine)
+    engine.dispose()
+    return [
+        (merchant, description, category, merchant) for merchant, description, category, _ in rows
+    ]
+
+
+def timed(label: str, func_, *args, **kwargs):
+    start = time.perf_counter()
+    result = func_(*args, **kwargs)
+    print(f"{label:<45} {time.perf_counter() - start:>9.3f}s")
+    return result
+
+
+def evaluate(
+    label: str, classifier: NgramCategoryClassifier, rows: list[tuple], thresholds
+) -> None:
+    if not rows:
+        return
+    latencies = []
+    scored = []
+    for merchant, description, category, _ in rows:
+        start = time.perf_counter()
+        prediction = classifier.predict(merchant, description)
+        latencies.append(time.perf_counter() - start)
+        scored.append((prediction, category))
+
+    latencies.sort()
+    correct = sum(1 for prediction, category in scored if prediction and prediction[0] == category)
+    print(f"\n{label} ({len(rows):,} rows)")
+    print(f"{'  top-1 accuracy':<45} {correct / len(rows):>9.1%}")
+    print(f"{'  latency p50':<45} {latencies[len(latencies) // 2] * 1e3:>8.3f}ms")
+    print(f"{'  latency p99':<45} {latencies[int(len(latencies) * 0.99)] * 1e3:>8.3f}ms")
+    for threshold in thresholds:
+        accepted = [(p, c) for p, c in scored if p and p[1] >= threshold]
+        precision = sum(1 for p, c in accepted if p[0] == c) / len(accepted) if accepted else 0.0
+        print(
+            f"{f'  threshold {threshold:.2f}: coverage / precision':<45} "
+            f"{len(accepted) / len(rows):>9.1%} / {precision:.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--brands", type=int, default=2000)
+    parser.add_argument("--variants", type=int, default=4)
+    parser.add_argument("--plain-share", type=float, default=0.3)
+    parser.add_argument("--noise", type=float, default=0.03)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--neighbors", type=int, default=5)
+    parser.add_argument("--database-url", help="Evaluate on a database's labelled history")
+    args = parser.parse_args()
+
+    if args.database_url:
+        rows = database_examples(args.database_url, limit=200_000)
+    else:
+        rows = synthetic_examples(args.brands, args.variants, args.plain_share, args.noise)
+    train, seen, unseen = split_by_group(rows, args.holdout)
+
+    classifier = NgramCategoryClassifier(neighbors=args.neighbors, max_examples=len(train))
+    timed(
+        f"train on {len(train):,} rows",
+        classifier.update,
+        [(merchant, description, category) for merchant, description, category, _ in train],
+    )
+    timed(f"build index ({classifier.stats()['size']:,} examples)", classifier.predict, "warmup")
+
+    thresholds = (0.4, 0.5, 0.6, 0.7, 0.8)
+    evaluate("new spellings of known merchants", classifier, seen, thresholds)
+    evaluate("unseen merchants", classifier, unseen, thresholds)
+
+
+if __name__ == "__main__":
+    main()
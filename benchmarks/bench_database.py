@@ -0,0 +1,114 @@
+"""Benchmark bulk ingestion and indexed queries on a synthetic transactions table.
+
+Usage:
+    poetry run python -m benchmarks.bench_database [--rows 1000000] [--batch 10000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from src.database import (
+    TransactionModel,
+    create_db_engine,
+    get_category_totals,
+    get_merchant_totals,
+    init_db,
+    save_transactions,
+)
+
+CATEGORIES = ["Food", "Transport", "Shopping", "Entertainment", "Bills", "Health", "Other"]
+
+
+def synthetic_rows(count: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    merchants = [f"Merchant {i}" for i in range(2000)]
+    return [
+        {
+            "transaction_date": start + timedelta(days=rng.randrange(5 * 365)),
+            "merchant": rng.choice(merchants),
+            "description": "Synthetic purchase",
+            "amount": round(-rng.uniform(1, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "source_file": f"statement_{rng.randrange(60)}.csv",
+        }
+        for _ in range(count)
+    ]
+
+
+def timed(label: str, func_, *args, **kwargs):
+    start = time.perf_counter()
+    result = func_(*args, **kwargs)
+    print(f"{label:<45} {time.perf_counter() - start:>9.3f}s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        init_db(engine)
+        rows = synthetic_rows(args.rows)
+
+        def ingest() -> None:
+            for i in range(0, len(rows), args.batch):
+                save_transactions(rows[i : i + args.batch], engine)
+
+        elapsed_start = time.perf_counter()
+        timed(f"insert {args.rows:,} rows (batches of {args.batch:,})", ingest)
+        rate = args.rows / (time.perf_counter() - elapsed_start)
+        print(f"{'  throughput':<45} {rate:>9,.0f} rows/s")
+
+        with engine.connect() as conn:
+            timed(
+                "sum by date range (1 month, indexed)",
+                lambda: conn.execute(
+                    select(func.sum(TransactionModel.amount)).where(
+                        TransactionModel.transaction_date.between(
+                            date(2022, 3, 1), date(2022, 3, 31)
+                        )
+                    )
+                ).scalar_one(),
+            )
+            timed(
+                "count by merchant (indexed)",
+                lambda: conn.execute(
+                    select(func.count()).where(TransactionModel.merchant == "Merchant 42")
+                ).scalar_one(),
+            )
+            timed(
+                "sum by category (indexed)",
+                lambda: conn.execute(
+                    select(func.sum(TransactionModel.amount)).where(
+                        TransactionModel.category == "Food"
+                    )
+                ).scalar_one(),
+            )
+            timed(
+                "full scan group by category",
+                lambda: conn.execute(
+                    select(TransactionModel.category, func.sum(TransactionModel.amount)).group_by(
+                        TransactionModel.category
+                    )
+                ).all(),
+            )
+
+        timed("rollup: category totals for one year", get_category_totals,
+              date(2022, 1, 1), date(2022, 12, 31), db_engine=engine)  # fmt: skip
+        timed("rollup: top 10 merchants overall", get_merchant_totals,
+              limit=10, db_engine=engine)  # fmt: skip
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
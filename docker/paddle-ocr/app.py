@@ -1,29 +1,352 @@
-import uuid
-from fastapi import FastAPI, UploadFile, File
-from paddleocr import PaddleOCR
-import numpy as np
-import cv2
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
+from importlib.metadata import version
 from pathlib import Path
-from pdf2image import convert_from_bytes
+
+import cv2
+import numpy as np
+from fastapi import FastAPI, File, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from paddleocr import PaddleOCR
+from pdf2image import convert_from_path, pdfinfo_from_path
 
 DATA_DIR = Path("/data/results")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-ocr = None
+PDF_DPI = 300
+OCR_LANG = "pt"
+# Páginas com camada de texto são lidas direto do PDF, sem rasterizar nem rodar OCR.
+TEXT_LAYER_ENABLED = os.getenv("OCR_TEXT_LAYER", "true").lower() != "false"
+TEXT_LAYER_MIN_CHARS = int(os.getenv("OCR_TEXT_LAYER_MIN_CHARS", "20"))
+XHTML_NS = "{http://www.w3.org/1999/xhtml}"
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff"]
+
+# Cada processo do pool carrega seu próprio modelo; as páginas de requisições
+# concorrentes são agrupadas em lotes para cada chamada de predict.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+OCR_CPU_THREADS = int(
+    os.getenv("OCR_CPU_THREADS", str(max(1, (os.cpu_count() or 1) // OCR_WORKERS)))
+)
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "4"))
+OCR_BATCH_WAIT_SECONDS = float(os.getenv("OCR_BATCH_WAIT_MS", "20")) / 1000
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "64"))
+RETRY_AFTER_SECONDS = int(os.getenv("OCR_RETRY_AFTER_SECONDS", "5"))
+
+# Reconstrução de linhas de tabela a partir das caixas (layout=true).
+ROW_TOLERANCE = float(os.getenv("OCR_ROW_TOLERANCE", "0.5"))
+LOW_CONFIDENCE = float(os.getenv("OCR_LOW_CONFIDENCE", "0.8"))
+LOW_CONFIDENCE_MARK = "[?]"
+
+# Resultados ficam em disco endereçados pelo hash do arquivo e pelos parâmetros
+# do OCR; trocar idioma, dpi ou modelo invalida as entradas antigas.
+OCR_MODEL_VERSION = os.getenv("OCR_MODEL_VERSION", f"paddleocr-{version('paddleocr')}")
+OCR_CACHE_MAX_MB = float(os.getenv("OCR_CACHE_MAX_MB", "512"))
+
+worker_ocr = None
+
+
+def init_worker() -> None:
+    """Load the OCR model once in each worker process."""
+    global worker_ocr
+    worker_ocr = PaddleOCR(use_angle_cls=True, lang=OCR_LANG, cpu_threads=OCR_CPU_THREADS)
+
+
+def warm_up() -> int:
+    return os.getpid()
+
+
+def load_page(item: tuple) -> np.ndarray:
+    """Load a work item as a BGR image.
+
+    Items are ``("pdf", path, page_number)`` or ``("image", path)``. PDF
+    pages are rasterized here, in the worker, so only file paths cross the
+    process boundary and at most one batch of pages is held in memory.
+    """
+    if item[0] == "pdf":
+        _, pdf_path, page_number = item
+        page = convert_from_path(
+            pdf_path, dpi=PDF_DPI, first_page=page_number, last_page=page_number
+        )[0]
+        return cv2.cvtColor(np.array(page), cv2.COLOR_RGB2BGR)
+
+    image = cv2.imread(item[1], cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Imagem inválida")
+    return image
+
+
+def ocr_batch(items: list[tuple]) -> list[dict]:
+    """Recognize a batch of pages with a single predict call.
+
+    Returns one ``{"texts", "boxes", "scores"}`` or ``{"error": "..."}``
+    per item, so a bad page fails only its own request. Boxes are
+    ``[x_min, y_min, x_max, y_max]`` in pixels, aligned with ``texts``.
+    """
+    results: list[dict] = [{} for _ in items]
+    images = []
+    indexes = []
+    for index, item in enumerate(items):
+        try:
+            images.append(load_page(item))
+            indexes.append(index)
+        except Exception as exc:
+            results[index] = {"error": str(exc)}
+
+    if images:
+        for index, prediction in zip(indexes, worker_ocr.predict(images)):
+            results[index] = {
+                "texts": list(prediction["rec_texts"]),
+                "boxes": [[float(v) for v in box] for box in prediction["rec_boxes"]],
+                "scores": [round(float(score), 4) for score in prediction["rec_scores"]],
+            }
+    return results
+
+
+class OCRWorkerPool:
+    """Bounded page queue drained in batches by a pool of OCR processes.
+
+    One dispatcher task per worker process pulls up to ``batch_size``
+    pages from the queue (waiting ``batch_wait`` for stragglers), runs them
+    through ``ocr_batch`` in the process pool and resolves each page's
+    future, so the event loop never runs the model itself.
+
+    Requests are admitted with ``reserve`` for all the pages they will
+    queue, so an admitted request never waits for room in the queue.
+    """
+
+    def __init__(self, workers: int, batch_size: int, queue_size: int, batch_wait: float) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.executor: ProcessPoolExecutor | None = None
+        self.batches = 0
+        self.pages = 0
+        self.reserved = 0
+        self._dispatchers: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Spawn the worker processes and wait until each has loaded its model."""
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self.executor, warm_up) for _ in range(self.workers))
+        )
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def reserve(self, pages: int) -> "PageReservation | None":
+        """Admit a request's pages if they fit in the queue with those already admitted.
+
+        A request with more pages than the whole queue is admitted only
+        when no other request holds a reservation, so it can still run.
+
+        Returns:
+            The reservation to release once the request is over, or None
+            when the request must be refused.
+        """
+        if pages and self.reserved and self.reserved + pages > self.queue.maxsize:
+            return None
+        self.reserved += pages
+        return PageReservation(self, pages)
+
+    async def submit(self, item: tuple, future: asyncio.Future) -> None:
+        """Queue a page, waiting for room; ``future`` receives its texts."""
+        await self.queue.put((item, future))
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Páginas de requisições já canceladas não vão para o modelo.
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, ocr_batch, [item for item, _ in batch]
+                )
+            except Exception as exc:
+                results = [{"error": str(exc)}] * len(batch)
+            self.batches += 1
+            self.pages += len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if "error" in result:
+                    future.set_exception(ValueError(result["error"]))
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "reserved": self.reserved,
+            "batches": self.batches,
+            "pages": self.pages,
+        }
+
+
+class PageReservation:
+    """Pages of one admitted request; ``release`` can be called any number of times."""
+
+    def __init__(self, pool: OCRWorkerPool, pages: int) -> None:
+        self.pool = pool
+        self.pages = pages
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.pool.reserved -= self.pages
+
+
+class CleanupStreamingResponse(StreamingResponse):
+    """Streaming response that runs ``cleanup`` once it is over.
+
+    Starlette sends the headers before it starts iterating the body, so if
+    the client is gone by then the generator never runs and its own
+    ``finally`` blocks never do either. The body is closed and ``cleanup``
+    called here, whatever happened while sending.
+    """
+
+    def __init__(self, content: AsyncIterator[str], cleanup: Callable[[], None], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self.cleanup = cleanup
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                self.cleanup()
+
+
+class OCRResultCache:
+    """Size-bounded directory of OCR results, one JSON file per key.
+
+    Hits refresh the file's mtime, so eviction drops the least recently
+    used results first once the directory exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def set(self, key: str, result: dict) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": sum(1 for _ in self.directory.glob("*.json")),
+        }
+
+
+def cache_key(file_hash: str) -> str:
+    """Combine the file hash with everything that changes the OCR output."""
+    params = f"{OCR_LANG}|{PDF_DPI}|{OCR_MODEL_VERSION}|{TEXT_LAYER_ENABLED}|boxes"
+    return f"{file_hash}-{hashlib.sha256(params.encode()).hexdigest()[:16]}"
+
+
+pool: OCRWorkerPool | None = None
+cache = OCRResultCache(DATA_DIR, int(OCR_CACHE_MAX_MB * 1024 * 1024))
 ready = False
 
 
+async def start_pool() -> None:
+    global ready
+    await pool.start()
+    ready = True
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global ocr, ready
+    global pool, ready
 
-    ocr = PaddleOCR(use_angle_cls=True, lang="pt")
-    ready = True
+    pool = OCRWorkerPool(OCR_WORKERS, OCR_BATCH_SIZE, OCR_QUEUE_SIZE, OCR_BATCH_WAIT_SECONDS)
+    # Os modelos carregam em segundo plano; /health responde "loading" até lá.
+    startup = asyncio.create_task(start_pool())
 
     yield
 
     ready = False
+    startup.cancel()
+    await pool.stop()
 
 
 app = FastAPI(title="PaddleOCR API", lifespan=lifespan)
@@ -32,45 +355,321 @@ app = FastAPI(title="PaddleOCR API", lifespan=lifespan)
 @app.get("/health")
 def health():
     if ready:
-        return {"status": "OCR ok"}
-    return {"status": "loading"}
+        return {"status": "OCR ok", "pool": pool.stats(), "cache": cache.stats()}
+    return {"status": "loading", "cache": cache.stats()}
 
 
-@app.post("/ocr")
-async def ocr_file(file: UploadFile = File(...)):
-    if not ready or not ocr:
-        return {"error": "OCR ainda não está pronto"}
+def count_pdf_pages(pdf_path: str) -> int:
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
 
-    file_bytes = await file.read()
-    ext = Path(file.filename).suffix.lower()
 
-    all_texts = []
+def extract_text_layer(pdf_path: str) -> dict[int, dict]:
+    """Read the embedded text layer of every page with ``pdftotext -bbox-layout``.
+
+    Returns, per page number, the text lines and their bounding boxes
+    (``[x_min, y_min, x_max, y_max]`` in PDF points). Pages whose layer
+    has fewer than ``TEXT_LAYER_MIN_CHARS`` alphanumeric characters are
+    left out, since they are scans that need OCR.
+    """
+    try:
+        output = subprocess.run(
+            ["pdftotext", "-bbox-layout", "-enc", "UTF-8", pdf_path, "-"],
+            capture_output=True,
+            check=True,
+            timeout=60,
+        ).stdout
+        root = ET.fromstring(output)
+    except (OSError, subprocess.SubprocessError, ET.ParseError):
+        return {}
+
+    layers = {}
+    for page_number, page in enumerate(root.iter(f"{XHTML_NS}page"), start=1):
+        texts = []
+        boxes = []
+        for line in page.iter(f"{XHTML_NS}line"):
+            words = [word.text or "" for word in line.iter(f"{XHTML_NS}word")]
+            text = " ".join(w for w in words if w).strip()
+            if not text:
+                continue
+            texts.append(text)
+            boxes.append(
+                [round(float(line.get(key, 0)), 1) for key in ("xMin", "yMin", "xMax", "yMax")]
+            )
+        if sum(c.isalnum() for text in texts for c in text) >= TEXT_LAYER_MIN_CHARS:
+            layers[page_number] = {"texts": texts, "boxes": boxes, "scores": [1.0] * len(texts)}
+    return layers
+
+
+async def plan_pages(file_path: str, ext: str) -> tuple[dict[int, dict], dict[int, tuple]]:
+    """Split a file into pages read from the text layer and pages that need OCR.
+
+    Returns:
+        The text-layer results by page number, and the worker pool items
+        by page number for the remaining pages.
+    """
+    if ext != ".pdf":
+        return {}, {1: ("image", file_path)}
+    page_count = await run_in_threadpool(count_pdf_pages, file_path)
+    layers = await run_in_threadpool(extract_text_layer, file_path) if TEXT_LAYER_ENABLED else {}
+    items = {n: ("pdf", file_path, n) for n in range(1, page_count + 1) if n not in layers}
+    return layers, items
+
+
+async def recognize_pages(layers: dict[int, dict], items: dict[int, tuple]) -> AsyncIterator[dict]:
+    """Yield each page's result, in page order, as soon as it is available.
+
+    Every result has ``page``, ``source``, ``texts`` and the aligned
+    ``boxes`` and ``scores``. PDF pages with a usable text layer are read
+    directly (``source="text_layer"``, scores of 1.0); the remaining pages are queued on the
+    worker pool all at once (``source="ocr"``), so they are recognized in
+    parallel and batched with pages from other requests while earlier
+    pages are already being sent to the client. The pages must have been
+    reserved on the pool.
+    """
+    loop = asyncio.get_running_loop()
+    futures = {n: loop.create_future() for n in items}
+
+    async def enqueue() -> None:
+        for n, item in items.items():
+            await pool.submit(item, futures[n])
+
+    producer = asyncio.create_task(enqueue())
+    try:
+        for page_number in sorted(layers.keys() | items.keys()):
+            if page_number in layers:
+                yield {"page": page_number, "source": "text_layer", **layers[page_number]}
+            else:
+                yield {"page": page_number, "source": "ocr", **await futures[page_number]}
+    finally:
+        producer.cancel()
+        for future in futures.values():
+            future.cancel()
+
+
+def find_columns(rows: list[list[dict]]) -> list[tuple[float, float]]:
+    """Find column spans as the x ranges separated by gaps no cell crosses.
+
+    Single-cell rows (titles, headers spanning the page) are ignored so
+    they do not merge every column into one.
+    """
+    spans = sorted((cell["box"][0], cell["box"][2]) for row in rows if len(row) > 1 for cell in row)
+    columns: list[list[float]] = []
+    for x_min, x_max in spans:
+        if columns and x_min <= columns[-1][1]:
+            columns[-1][1] = max(columns[-1][1], x_max)
+        else:
+            columns.append([x_min, x_max])
+    return [(x_min, x_max) for x_min, x_max in columns]
+
+
+def reconstruct_rows(texts: list[str], boxes: list[list[float]], scores: list[float]) -> dict:
+    """Group a page's text boxes into table rows and align them into columns.
+
+    Boxes whose vertical centers are within ``ROW_TOLERANCE`` line heights
+    form a row; cells are then placed in the column whose span they
+    overlap, and cells sharing a column are joined with a space (rows with
+    a single cell, such as titles, are emitted as is). Cells
+    scoring below ``LOW_CONFIDENCE`` are suffixed with ``[?]`` and listed
+    separately so they can be reviewed instead of re-extracted.
+
+    Returns:
+        ``{"tsv": str, "low_confidence": [{"row", "column", "text", "score"}]}``
+    """
+    cells = [
+        {"text": text, "box": box, "score": score, "center": (box[1] + box[3]) / 2}
+        for text, box, score in zip(texts, boxes, scores)
+        if text.strip()
+    ]
+    if not cells:
+        return {"tsv": "", "low_confidence": []}
+
+    heights = sorted(cell["box"][3] - cell["box"][1] for cell in cells)
+    tolerance = max(heights[len(heights) // 2], 1.0) * ROW_TOLERANCE
 
-    if ext == ".pdf":
-        pages = convert_from_bytes(file_bytes, dpi=300)
+    rows: list[list[dict]] = []
+    for cell in sorted(cells, key=lambda c: c["center"]):
+        if rows and abs(cell["center"] - rows[-1][-1]["center"]) <= tolerance:
+            rows[-1].append(cell)
+        else:
+            rows.append([cell])
 
-        for page_index, page in enumerate(pages):
-            img = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2BGR)
-            result = ocr.predict(img)
-            all_texts.extend(result[0]["rec_texts"])
+    columns = find_columns(rows)
 
-    elif ext in [".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff"]:
-        image_np = np.frombuffer(file_bytes, np.uint8)
-        image = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
+    def column_of(cell: dict) -> int:
+        x_min, x_max = cell["box"][0], cell["box"][2]
+        overlaps = [min(x_max, end) - max(x_min, start) for start, end in columns]
+        return max(range(len(columns)), key=overlaps.__getitem__) if columns else 0
 
-        if image is None:
-            return {"error": "Imagem inválida"}
+    lines = []
+    low_confidence = []
+    for row_index, row in enumerate(rows):
+        fields: dict[int, list[str]] = {}
+        for cell in sorted(row, key=lambda c: c["box"][0]):
+            column = column_of(cell)
+            text = " ".join(cell["text"].split())
+            if cell["score"] < LOW_CONFIDENCE:
+                low_confidence.append(
+                    {"row": row_index, "column": column, "text": text, "score": cell["score"]}
+                )
+                text += LOW_CONFIDENCE_MARK
+            fields.setdefault(column, []).append(text)
+        if len(row) == 1:
+            lines.append(next(iter(fields.values()))[0])
+        else:
+            lines.append("\t".join(" ".join(fields.get(i, [])) for i in range(max(fields) + 1)))
 
-        result = ocr.predict(image)
-        all_texts = result[0]["rec_texts"]
+    return {"tsv": "\n".join(lines), "low_confidence": low_confidence}
 
+
+def present_page(page: dict, layout: bool) -> dict:
+    """Shape a stored page result for the response.
+
+    With ``layout`` the boxes and scores are kept and the reconstructed
+    rows are added as ``tsv`` with the ``low_confidence`` cells; without it
+    only the flat ``texts`` are returned, as before.
+    """
+    if not layout:
+        return {key: page[key] for key in ("page", "source", "texts")}
+    return {
+        **page,
+        **reconstruct_rows(page["texts"], page.get("boxes", []), page.get("scores", [])),
+    }
+
+
+def build_result(file_hash: str, pages: list[dict]) -> dict:
+    """Assemble the stored result from the per-page results."""
+    texts = [text for page in pages for text in page["texts"]]
+    return {
+        "request_id": file_hash,
+        "hash": file_hash,
+        "lines": len(texts),
+        "texts": texts,
+        "pages": pages,
+    }
+
+
+def summarize(result: dict, layout: bool = False) -> dict:
+    """The plain /ocr response: all lines plus each page's path, and its layout if asked."""
+    if layout:
+        pages = [present_page(page, layout=True) for page in result["pages"]]
     else:
+        pages = [{"page": page["page"], "source": page["source"]} for page in result["pages"]]
+    return {**result, "pages": pages}
+
+
+def stream_line(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+async def stream_cached(result: dict, layout: bool) -> AsyncIterator[str]:
+    for page in result["pages"]:
+        yield stream_line(present_page(page, layout))
+    summary = summarize(result)
+    del summary["texts"]
+    yield stream_line({**summary, "cached": True})
+
+
+async def stream_results(
+    file_path: str, layers: dict[int, dict], items: dict[int, tuple], file_hash: str, layout: bool
+) -> AsyncIterator[str]:
+    """Emit one NDJSON line per recognized page followed by a summary line."""
+    pages = []
+    try:
+        async for page in recognize_pages(layers, items):
+            pages.append(page)
+            yield stream_line(present_page(page, layout))
+    except Exception as exc:
+        yield stream_line({"error": str(exc)})
+        return
+    finally:
+        Path(file_path).unlink(missing_ok=True)
+
+    result = build_result(file_hash, pages)
+    await run_in_threadpool(cache.set, cache_key(file_hash), result)
+    summary = summarize(result)
+    del summary["texts"]
+    yield stream_line({**summary, "cached": False})
+
+
+def spool_upload(upload, ext: str) -> tuple[str, str]:
+    """Copy an upload to a temporary file, hashing it on the way."""
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
+        while chunk := upload.read(1024 * 1024):
+            digest.update(chunk)
+            tmp.write(chunk)
+    return tmp.name, digest.hexdigest()
+
+
+@app.get("/ocr/{file_hash}")
+async def get_ocr_result(file_hash: str, layout: bool = Query(False)):
+    result = await run_in_threadpool(cache.get, cache_key(file_hash))
+    if result is None:
+        return JSONResponse(status_code=404, content={"error": "Resultado não encontrado"})
+    return {**summarize(result, layout), "cached": True}
+
+
+@app.post("/ocr")
+async def ocr_file(
+    file: UploadFile = File(...),
+    stream: bool = Query(False),
+    layout: bool = Query(False),
+):
+    if not ready:
+        return {"error": "OCR ainda não está pronto"}
+
+    ext = Path(file.filename).suffix.lower()
+    if ext != ".pdf" and ext not in IMAGE_EXTENSIONS:
         return {"error": f"Tipo de arquivo não suportado: {ext}"}
 
-    request_id = str(uuid.uuid4())
-    output_file = DATA_DIR / f"{request_id}.txt"
+    # O upload vai para disco em vez da memória; as páginas são lidas dali uma a uma.
+    file_path, file_hash = await run_in_threadpool(spool_upload, file.file, ext)
+
+    cached = await run_in_threadpool(cache.get, cache_key(file_hash))
+    if cached is not None:
+        Path(file_path).unlink(missing_ok=True)
+        if stream:
+            return StreamingResponse(
+                stream_cached(cached, layout), media_type="application/x-ndjson"
+            )
+        return {**summarize(cached, layout), "cached": True}
+
+    try:
+        layers, items = await plan_pages(file_path, ext)
+    except Exception as exc:
+        Path(file_path).unlink(missing_ok=True)
+        return {"error": str(exc)}
+
+    # A requisição só entra se todas as suas páginas couberem na fila.
+    reservation = pool.reserve(len(items))
+    if reservation is None:
+        Path(file_path).unlink(missing_ok=True)
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Fila de OCR cheia, tente novamente"},
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    def cleanup() -> None:
+        reservation.release()
+        Path(file_path).unlink(missing_ok=True)
+
+    if stream:
+        return CleanupStreamingResponse(
+            stream_results(file_path, layers, items, file_hash, layout),
+            cleanup,
+            media_type="application/x-ndjson",
+        )
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(all_texts))
+    pages = []
+    try:
+        async for page in recognize_pages(layers, items):
+            pages.append(page)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    finally:
+        cleanup()
 
-    return {"request_id": request_id, "lines": len(all_texts), "texts": all_texts}
+    result = build_result(file_hash, pages)
+    await run_in_threadpool(cache.set, cache_key(file_hash), result)
+    return {**summarize(result, layout), "cached": False}
@@ -5,6 +5,10 @@ from typing import Annotated
 from fastapi import Depends, Request
 from langgraph.graph.state import CompiledStateGraph
 
+from src.api.jobs import JobQueue
+from src.graphs import AnalystAgent
+from src.graphs.nodes import CompanySearch, MerchantCategoryMemo, NgramCategoryClassifier
+
 
 def get_processing_graph(request: Request) -> CompiledStateGraph:
     """Get the processing graph from app state.
@@ -18,4 +22,69 @@ def get_processing_graph(request: Request) -> CompiledStateGraph:
     return request.state.processing_graph
 
 
+def get_job_queue(request: Request) -> JobQueue:
+    """Get the processing job queue from app state.
+
+    Args:
+        request: FastAPI request object containing app state.
+
+    Returns:
+        The running job queue.
+    """
+    return request.state.job_queue
+
+
+def get_merchant_memo(request: Request) -> MerchantCategoryMemo:
+    """Get the merchant category memo from app state.
+
+    Args:
+        request: FastAPI request object containing app state.
+
+    Returns:
+        The memo shared by the processing graph.
+    """
+    return request.state.merchant_memo
+
+
+def get_company_search(request: Request) -> CompanySearch:
+    """Get the categorizer's company search from app state.
+
+    Args:
+        request: FastAPI request object containing app state.
+
+    Returns:
+        The search front-end shared by the processing graph.
+    """
+    return request.state.company_search
+
+
+def get_category_classifier(request: Request) -> NgramCategoryClassifier:
+    """Get the local category classifier from app state.
+
+    Args:
+        request: FastAPI request object containing app state.
+
+    Returns:
+        The classifier shared by the processing graph.
+    """
+    return request.state.category_classifier
+
+
+def get_analyst_agent(request: Request) -> AnalystAgent:
+    """Get the chat analyst agent from app state.
+
+    Args:
+        request: FastAPI request object containing app state.
+
+    Returns:
+        The long-lived analyst agent.
+    """
+    return request.state.analyst_agent
+
+
 ProcessingGraphDep = Annotated[CompiledStateGraph, Depends(get_processing_graph)]
+JobQueueDep = Annotated[JobQueue, Depends(get_job_queue)]
+MerchantMemoDep = Annotated[MerchantCategoryMemo, Depends(get_merchant_memo)]
+CompanySearchDep = Annotated[CompanySearch, Depends(get_company_search)]
+CategoryClassifierDep = Annotated[NgramCategoryClassifier, Depends(get_category_classifier)]
+AnalystAgentDep = Annotated[AnalystAgent, Depends(get_analyst_agent)]
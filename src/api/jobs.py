@@ -0,0 +1,223 @@
+"""In-process job queue for asynchronous statement processing."""
+
+import asyncio
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timezone
+from enum import StrEnum
+from logging import getLogger
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+logger = getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    """Lifecycle states of a processing job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job(BaseModel):
+    """A unit of work tracked by the job queue.
+
+    ``events`` buffers the progress published while the job runs, for
+    followers that subscribe late. It is emptied once the job finishes,
+    since the result supersedes it and retained jobs would otherwise keep
+    every event payload alive.
+    """
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    filename: str
+    key: str | None = None
+    status: JobStatus = JobStatus.QUEUED
+    result: Any = None
+    error: str | None = None
+    events: list[Any] = Field(default_factory=list)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = None
+
+
+class BatchItem(BaseModel):
+    """One file of a batch: its job, or why it was not queued."""
+
+    filename: str
+    job_id: str | None = None
+    error: str | None = None
+
+
+class Batch(BaseModel):
+    """A group of jobs submitted together."""
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    items: list[BatchItem]
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class JobQueue:
+    """Bounded queue drained by a fixed pool of asyncio workers.
+
+    Jobs are coroutine factories executed on the running event loop, so the
+    pool size bounds how many statements are processed concurrently while
+    the queue size bounds how many may wait. Finished jobs are kept for
+    status lookups up to ``retention`` entries, oldest evicted first.
+    """
+
+    def __init__(self, workers: int, max_size: int, retention: int = 1000) -> None:
+        self.workers = workers
+        self.retention = retention
+        self._queue: asyncio.Queue[tuple[Job, Callable[[], Awaitable[Any]]]] = asyncio.Queue(
+            maxsize=max_size
+        )
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._batches: OrderedDict[str, Batch] = OrderedDict()
+        self._tasks: list[asyncio.Task] = []
+        self._changed = asyncio.Event()
+
+    async def start(self) -> None:
+        """Spawn the worker tasks."""
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks and wait for them to exit."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self, filename: str, func: Callable[[], Awaitable[Any]], key: str | None = None
+    ) -> Job:
+        """Enqueue a job without waiting.
+
+        Args:
+            filename: Name of the uploaded file, for reporting.
+            func: Zero-argument coroutine factory performing the work.
+            key: Optional identity of the work, see ``find_active``.
+
+        Returns:
+            The queued job.
+
+        Raises:
+            QueueFullError: If the queue has no free slot.
+        """
+        job = Job(filename=filename, key=key)
+        try:
+            self._queue.put_nowait((job, func))
+        except asyncio.QueueFull as exc:
+            raise QueueFullError("Processing queue is full") from exc
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def record_completed(self, filename: str, result: Any, key: str | None = None) -> Job:
+        """Register a job whose result is already known, without running anything."""
+        now = datetime.now(timezone.utc)
+        job = Job(
+            filename=filename,
+            key=key,
+            status=JobStatus.COMPLETED,
+            result=result,
+            created_at=now,
+            finished_at=now,
+        )
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def free_slots(self) -> int:
+        """Number of jobs that can be submitted before the queue is full."""
+        return self._queue.maxsize - self._queue.qsize()
+
+    def add_batch(self, items: list[BatchItem]) -> Batch:
+        """Register a batch of already submitted jobs, keeping ``retention`` batches."""
+        batch = Batch(items=items)
+        self._batches[batch.id] = batch
+        while len(self._batches) > self.retention:
+            self._batches.popitem(last=False)
+        return batch
+
+    def get_batch(self, batch_id: str) -> Batch | None:
+        """Look up a batch by id."""
+        return self._batches.get(batch_id)
+
+    def get(self, job_id: str) -> Job | None:
+        """Look up a job by id."""
+        return self._jobs.get(job_id)
+
+    def find_active(self, key: str) -> Job | None:
+        """Return a queued or running job submitted with the given key."""
+        for job in reversed(self._jobs.values()):
+            if job.key == key and job.finished_at is None:
+                return job
+        return None
+
+    def publish(self, job: Job, event: Any) -> None:
+        """Record a progress event on a job and wake up its followers."""
+        job.events.append(event)
+        self._notify()
+
+    async def follow(self, job: Job, heartbeat: float | None = None) -> AsyncIterator[Any]:
+        """Yield a job's progress events, past ones first, until the job finishes.
+
+        A follower that subscribes after the job finished gets no events and
+        should read ``job.result`` or ``job.error`` instead.
+
+        Args:
+            job: The job to follow.
+            heartbeat: Seconds without events after which None is yielded,
+                so the caller can keep an idle connection alive.
+        """
+        events = job.events
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(events):
+                yield events[index]
+                index += 1
+            if job.finished_at is not None:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+            except TimeoutError:
+                yield None
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _worker(self) -> None:
+        while True:
+            job, func = await self._queue.get()
+            job.status = JobStatus.RUNNING
+            try:
+                job.result = await func()
+                job.status = JobStatus.COMPLETED
+            except Exception as e:
+                logger.exception("Job %s failed", job.id)
+                job.error = str(e)
+                job.status = JobStatus.FAILED
+            finally:
+                job.finished_at = datetime.now(timezone.utc)
+                job.events = []
+                self._queue.task_done()
+                self._notify()
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs once retention is exceeded."""
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None][:excess]:
+            del self._jobs[job_id]
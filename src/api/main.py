@@ -1,5 +1,6 @@
 """FastAPI application entry point."""
 
+import asyncio
 from contextlib import asynccontextmanager
 from logging import getLogger
 
@@ -7,8 +8,12 @@ import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.api.routes import chat, processing
-from src.graphs import build_processing_graph
+from src.api.jobs import JobQueue
+from src.api.routes import chat, metrics, processing, stats
+from src.api.uploads import UploadLimitMiddleware
+from src.database import init_db
+from src.graphs import AnalystAgent, ChatThreadStore, build_processing_graph
+from src.graphs.nodes import MerchantCategoryMemo, NgramCategoryClassifier, build_company_search
 from src.parsers import OCRClient
 from src.settings.config import settings
 
@@ -22,15 +27,58 @@ async def lifespan(app: FastAPI):
     Initializes resources on startup and cleans up on shutdown.
     """
     client = httpx.AsyncClient(
-        base_url=settings.ocr_service_base_url, timeout=settings.ocr_service_timeout
+        base_url=settings.ocr_service_base_url,
+        timeout=settings.ocr_service_timeout,
+        limits=httpx.Limits(
+            max_connections=settings.ocr_max_connections,
+            max_keepalive_connections=settings.ocr_max_connections,
+        ),
     )
-    ocr_client = OCRClient(client)
-    processing_graph = build_processing_graph(ocr_client)
+    ocr_client = OCRClient(
+        client,
+        max_concurrency=settings.ocr_max_concurrency,
+        max_retries=settings.ocr_max_retries,
+        retry_backoff=settings.ocr_retry_backoff,
+    )
+    init_db()
+    merchant_memo = MerchantCategoryMemo()
+    company_search = build_company_search()
+    category_classifier = NgramCategoryClassifier(
+        threshold=settings.classifier_threshold,
+        neighbors=settings.classifier_neighbors,
+        max_examples=settings.classifier_max_examples,
+    )
+    await asyncio.to_thread(category_classifier.train)
+    processing_graph = build_processing_graph(
+        ocr_client, merchant_memo, company_search, category_classifier
+    )
+    analyst_agent = AnalystAgent(
+        fast_path=settings.chat_fast_path,
+        threads=ChatThreadStore(
+            settings.chat_threads_path,
+            ttl_seconds=settings.chat_thread_ttl_seconds,
+            max_tokens=settings.chat_thread_max_tokens,
+        ),
+    )
+    job_queue = JobQueue(
+        workers=settings.processing_workers,
+        max_size=settings.processing_queue_size,
+        retention=settings.processing_job_retention,
+    )
+    await job_queue.start()
     logger.debug("Application startup complete")
 
     try:
-        yield {"processing_graph": processing_graph}
+        yield {
+            "processing_graph": processing_graph,
+            "job_queue": job_queue,
+            "merchant_memo": merchant_memo,
+            "company_search": company_search,
+            "category_classifier": category_classifier,
+            "analyst_agent": analyst_agent,
+        }
     finally:
+        await job_queue.stop()
         await ocr_client.aclose()
         logger.debug("Application shutdown complete")
 
@@ -49,9 +97,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(UploadLimitMiddleware)
 
 app.include_router(processing.router)
 app.include_router(chat.router)
+app.include_router(metrics.router)
+app.include_router(stats.router)
 
 
 @app.get("/health")
@@ -1,23 +1,58 @@
 """Chat API routes."""
 
+from logging import getLogger
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from src.api.dependencies import AnalystAgentDep
+from src.api.schemas import ChatEvent, ChatRequest, ChatResponse
+from src.api.sse import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse
 
-from src.api.schemas import ChatRequest, ChatResponse
-from src.graphs import get_analyst_response
+logger = getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
 @router.post("", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest, analyst: AnalystAgentDep) -> ChatResponse:
     """Process a natural language query about transaction data.
 
     Uses an LLM agent with SQL tools to answer questions about
     the stored transactions.
     """
     try:
-        response = get_analyst_response(request.query)
+        response = await analyst.arespond(request.query, request.thread_id)
         return ChatResponse(success=True, response=response)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, analyst: AnalystAgentDep) -> StreamingResponse:
+    """Answer a natural language query as server-sent events.
+
+    The agent's SQL queries and their results are forwarded as they run
+    and the answer as it is generated, token by token. The stream ends
+    with a ``done`` event holding the full answer, or an ``error`` event.
+    """
+
+    async def event_stream():
+        answer: list[str] = []
+        try:
+            async for item in analyst.astream_response(request.query, request.thread_id):
+                event = ChatEvent(**item)
+                if event.event == "token":
+                    answer.append(event.content)
+                elif event.event == "tool_call":
+                    # Text before a tool call is the agent thinking aloud, not the answer.
+                    answer.clear()
+                yield format_sse(event)
+        except Exception as e:
+            logger.exception("Chat stream failed")
+            yield format_sse(ChatEvent(event="error", error=str(e)))
+            return
+        yield format_sse(ChatEvent(event="done", content="".join(answer)))
+
+    return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
@@ -0,0 +1,46 @@
+"""Metrics API routes."""
+
+import asyncio
+
+from fastapi import APIRouter
+
+from src.api.dependencies import (
+    AnalystAgentDep,
+    CategoryClassifierDep,
+    CompanySearchDep,
+    MerchantMemoDep,
+)
+from src.api.schemas import (
+    AnalystSQLStats,
+    CacheStats,
+    ChatRouterStats,
+    LLMCacheStats,
+    MetricsResponse,
+    SearchStats,
+)
+from src.llm import get_llm_cache
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_model=MetricsResponse)
+async def get_metrics(
+    merchant_memo: MerchantMemoDep,
+    company_search: CompanySearchDep,
+    category_classifier: CategoryClassifierDep,
+    analyst: AnalystAgentDep,
+) -> MetricsResponse:
+    """Report cache effectiveness counters for the processing pipeline, LLM calls and chat."""
+    llm_cache = get_llm_cache()
+    search_stats = await asyncio.to_thread(company_search.stats)
+    llm_cache_stats = await asyncio.to_thread(llm_cache.stats) if llm_cache else None
+    threads_stats = await asyncio.to_thread(analyst.threads.stats) if analyst.threads else None
+    return MetricsResponse(
+        merchant_memo=CacheStats(**merchant_memo.stats()),
+        company_search=SearchStats(**search_stats),
+        local_classifier=CacheStats(**category_classifier.stats()),
+        llm_cache=LLMCacheStats(**llm_cache_stats) if llm_cache_stats else None,
+        chat_router=ChatRouterStats(**analyst.router.stats()) if analyst.router else None,
+        analyst_sql=AnalystSQLStats(**analyst.executor.stats()),
+        chat_threads=CacheStats(**threads_stats) if threads_stats else None,
+    )
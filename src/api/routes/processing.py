@@ -1,63 +1,485 @@
 """Document processing API routes."""
 
+import asyncio
+import hashlib
+import io
 import tempfile
+import time
+import zipfile
+from collections.abc import Callable
 from pathlib import Path
+from typing import BinaryIO
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from langgraph.graph.state import CompiledStateGraph
 
-from src.api.dependencies import ProcessingGraphDep
-from src.api.schemas import SUPPORTED_FILE_TYPES, ProcessingResponse, TransactionResponse
+from src.api.dependencies import JobQueueDep, ProcessingGraphDep
+from src.api.jobs import Batch, BatchItem, Job, JobQueue, JobStatus, QueueFullError
+from src.api.schemas import (
+    SUPPORTED_FILE_TYPES,
+    BatchFileStatus,
+    BatchResponse,
+    JobResponse,
+    JobStatusResponse,
+    ProcessingEvent,
+    ProcessingResponse,
+    TransactionResponse,
+)
+from src.api.sse import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse
+from src.database import get_ingestion, save_ingestion
+from src.models import Transaction
+from src.settings.config import settings
 
 router = APIRouter(prefix="/process", tags=["processing"])
 
+RETRY_AFTER_SECONDS = 5
+HASH_CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+SSE_HEARTBEAT_SECONDS = 15
 
-@router.post("", response_model=ProcessingResponse)
-async def process_document(
-    graph: ProcessingGraphDep,
-    file: UploadFile = File(...),
+NODE_EVENTS = {
+    "extractor_node": "extracted",
+    "categorizer_node": "categorized",
+    "saver_node": "saved",
+}
+
+
+def hash_upload(file: BinaryIO) -> str:
+    """Return the SHA-256 of an upload, reading it in chunks and rewinding it."""
+    file.seek(0)
+    digest = hashlib.sha256()
+    while chunk := file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def take_upload(file: UploadFile) -> BinaryIO:
+    """Take ownership of an upload's spooled file so it outlives the request.
+
+    FastAPI closes form files once the response is sent, but the job reads
+    the upload afterwards. The handle is swapped out of the ``UploadFile``
+    and the job closes it instead, so the bytes are never copied.
+    """
+    handle = file.file
+    file.file = io.BytesIO()
+    handle.seek(0)
+    return handle
+
+
+def to_transaction_response(txn: Transaction) -> TransactionResponse:
+    """Convert an extracted transaction into its API representation."""
+    return TransactionResponse(
+        date=txn.transaction_date,
+        merchant=txn.merchant,
+        description=txn.description,
+        amount=txn.amount,
+        category=txn.category,
+    )
+
+
+async def run_processing(
+    graph: CompiledStateGraph,
+    upload: BinaryIO,
+    filename: str,
+    file_hash: str,
+    on_event: Callable[[ProcessingEvent], None] | None = None,
 ) -> ProcessingResponse:
-    """Process an uploaded bank statement (PDF or CSV).
+    """Run the processing graph on an upload and build the response.
+
+    The graph reads the spooled upload in place and it is closed once the
+    graph has finished with it. The graph is streamed, so ``on_event``
+    gets an event as each node finishes, carrying the transactions as soon
+    as they are extracted and again once categorized, plus the nodes' own
+    events such as ``ocr_completed``. The response is recorded under the
+    file hash so a re-upload of the same bytes can be answered without
+    processing, unless nothing was extracted: an empty result may come
+    from a failed OCR or LLM pass, so a re-upload is processed again.
+    """
+    state: dict = {"file": upload, "file_name": filename, "file_hash": file_hash}
+    started = previous = time.perf_counter()
+
+    def emit(**fields) -> None:
+        nonlocal previous
+        now = time.perf_counter()
+        event = ProcessingEvent(
+            **fields, elapsed=round(now - started, 3), duration=round(now - previous, 3)
+        )
+        previous = now
+        if on_event is not None:
+            on_event(event)
+
+    try:
+        async for mode, chunk in graph.astream(state, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                emit(**chunk)
+                continue
+            for node, update in chunk.items():
+                state.update(update or {})
+                transactions = (update or {}).get("transactions")
+                emit(
+                    event=NODE_EVENTS.get(node, node),
+                    transaction_count=len(state.get("transactions", [])),
+                    transactions=[to_transaction_response(t) for t in transactions]
+                    if transactions is not None
+                    else None,
+                )
+    finally:
+        upload.close()
+
+    transactions = [to_transaction_response(txn) for txn in state.get("transactions", [])]
+    response = ProcessingResponse(
+        success=True,
+        message=f"Successfully processed {filename}",
+        transactions=transactions,
+        transaction_count=len(transactions),
+    )
+    if transactions:
+        await asyncio.to_thread(
+            save_ingestion, file_hash, filename, len(transactions), response.model_dump_json()
+        )
+    return response
+
 
-    Extracts transactions from the document and saves them to the database.
+def check_upload(filename: str | None, size: int | None) -> None:
+    """Reject uploads without a name, of an unsupported type or above the size limit.
+
+    Raises:
+        HTTPException: 400 for a missing name or unsupported type, 413 when
+            the file is larger than ``max_upload_bytes``.
     """
-    if not file.filename:
+    if not filename:
         raise HTTPException(status_code=400, detail="No filename provided")
 
-    extension = Path(file.filename).suffix.lower()
+    extension = Path(filename).suffix.lower()
     if extension not in SUPPORTED_FILE_TYPES:
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported file format: {extension}. Supported formats: {SUPPORTED_FILE_TYPES}",
         )
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    if size is not None and size > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"File exceeds the {settings.max_upload_bytes} byte upload limit",
+        )
+
+
+async def enqueue_upload(
+    graph: CompiledStateGraph, job_queue: JobQueue, filename: str, upload: BinaryIO
+) -> Job:
+    """Queue an upload for processing, reusing stored or in-flight results.
+
+    Uploads are identified by the SHA-256 of their bytes: a file that was
+    already processed gets a completed job with the stored result, and one
+    that is still being processed gets the existing job. Takes ownership of
+    ``upload``, which is closed here unless a new job was queued for it.
+
+    Raises:
+        QueueFullError: If a new job is needed and the queue is full.
+    """
+    file_hash = await asyncio.to_thread(hash_upload, upload)
+
+    stored = await asyncio.to_thread(get_ingestion, file_hash)
+    if stored is not None:
+        upload.close()
+        return job_queue.record_completed(
+            filename, ProcessingResponse.model_validate_json(stored), key=file_hash
+        )
+
+    active = job_queue.find_active(file_hash)
+    if active is not None:
+        upload.close()
+        return active
+
+    def publish(event: ProcessingEvent) -> None:
+        job_queue.publish(job, event)
 
     try:
-        result = graph.invoke({"file_path": tmp_path})
-
-        transactions = [
-            TransactionResponse(
-                date=txn.transaction_date,
-                merchant=txn.merchant,
-                description=txn.description,
-                amount=txn.amount,
-                category=txn.category,
+        job = job_queue.submit(
+            filename,
+            lambda: run_processing(graph, upload, filename, file_hash, publish),
+            key=file_hash,
+        )
+    except QueueFullError:
+        upload.close()
+        raise
+    return job
+
+
+def unpack_zip(
+    archive_file: BinaryIO, max_files: int
+) -> list[tuple[str, BinaryIO | None, str | None]]:
+    """Split a ZIP upload into its statements.
+
+    Each supported member is decompressed into its own spooled file.
+    Directories and hidden or macOS metadata entries are skipped; other
+    members are returned with the reason they were rejected. The archive's
+    directory is checked before anything is decompressed, and members are
+    read no further than ``max_upload_bytes`` whatever size they declare.
+
+    Args:
+        archive_file: The uploaded archive, closed once unpacked.
+        max_files: Number of statements the batch can still take.
+
+    Returns:
+        ``(filename, handle, error)`` per member, with exactly one of
+        ``handle`` and ``error`` set.
+
+    Raises:
+        HTTPException: 400 when the archive holds more than ``max_files``
+            statements or declares more than ``batch_max_files`` times
+            ``max_upload_bytes`` of them.
+    """
+    entries: list[tuple[str, BinaryIO | None, str | None]] = []
+    try:
+        with zipfile.ZipFile(archive_file) as archive:
+            members = [
+                info
+                for info in archive.infolist()
+                if not info.is_dir()
+                and not info.filename.startswith("__MACOSX/")
+                and not Path(info.filename).name.startswith(".")
+            ]
+            check_archive(members, max_files)
+            for info in members:
+                name = Path(info.filename).name
+                try:
+                    check_upload(name, info.file_size)
+                except HTTPException as e:
+                    entries.append((name, None, e.detail))
+                    continue
+
+                member = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+                with archive.open(info) as source:
+                    remaining = settings.max_upload_bytes + 1
+                    while remaining and (chunk := source.read(min(HASH_CHUNK_SIZE, remaining))):
+                        member.write(chunk)
+                        remaining -= len(chunk)
+                if member.tell() > settings.max_upload_bytes:
+                    member.close()
+                    entries.append((name, None, "File exceeds the upload limit"))
+                    continue
+                member.seek(0)
+                entries.append((name, member, None))
+    except zipfile.BadZipFile as e:
+        entries.append(("archive", None, f"Invalid ZIP archive: {e}"))
+    except HTTPException:
+        for _, handle, _ in entries:
+            if handle is not None:
+                handle.close()
+        raise
+    finally:
+        archive_file.close()
+    return entries
+
+
+def check_archive(members: list[zipfile.ZipInfo], max_files: int) -> None:
+    """Reject an archive from its directory alone, before any member is decompressed.
+
+    Raises:
+        HTTPException: 400 when there are more than ``max_files`` members or
+            their declared sizes add up to more than a full batch.
+    """
+    if len(members) > max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Archive has {len(members)} files, the batch can take {max(max_files, 0)}",
+        )
+    total = sum(info.file_size for info in members)
+    limit = settings.batch_max_files * settings.max_upload_bytes
+    if total > limit:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Archive expands to {total} bytes, the limit is {limit}",
+        )
+
+
+def build_batch_response(batch: Batch, job_queue: JobQueue) -> BatchResponse:
+    """Combine the current state of a batch's jobs into per-file and aggregate status."""
+    files = []
+    for item in batch.items:
+        job = job_queue.get(item.job_id) if item.job_id else None
+        if job is None:
+            files.append(
+                BatchFileStatus(
+                    filename=item.filename,
+                    job_id=item.job_id,
+                    status=JobStatus.FAILED,
+                    error=item.error or "Job is no longer tracked",
+                )
             )
-            for txn in result["transactions"]
-        ]
+            continue
+        files.append(
+            BatchFileStatus(
+                filename=item.filename,
+                job_id=job.id,
+                status=job.status,
+                transaction_count=job.result.transaction_count
+                if job.status == JobStatus.COMPLETED
+                else None,
+                error=job.error,
+            )
+        )
+
+    pending = any(f.status in (JobStatus.QUEUED, JobStatus.RUNNING) for f in files)
+    return BatchResponse(
+        batch_id=batch.id,
+        status=JobStatus.RUNNING if pending else JobStatus.COMPLETED,
+        total_files=len(files),
+        completed=sum(1 for f in files if f.status == JobStatus.COMPLETED),
+        failed=sum(1 for f in files if f.status == JobStatus.FAILED),
+        transaction_count=sum(f.transaction_count or 0 for f in files),
+        files=files,
+    )
+
+
+@router.post("", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def process_document(
+    graph: ProcessingGraphDep,
+    job_queue: JobQueueDep,
+    file: UploadFile = File(...),
+) -> JobResponse:
+    """Queue an uploaded bank statement (PDF or CSV) for processing.
+
+    Returns a job id immediately; poll ``GET /process/{job_id}`` for the
+    extracted transactions. Responds with 413 when the file exceeds the
+    configured upload limit and 429 when the queue is full. Re-uploads of
+    a processed or in-flight file reuse its result or job.
+    """
+    check_upload(file.filename, file.size)
+
+    try:
+        job = await enqueue_upload(graph, job_queue, file.filename, take_upload(file))
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    return JobResponse(job_id=job.id, status=job.status, filename=job.filename)
+
+
+@router.post("/batch", response_model=BatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def process_batch(
+    graph: ProcessingGraphDep,
+    job_queue: JobQueueDep,
+    files: list[UploadFile] = File(...),
+) -> BatchResponse:
+    """Queue several statements, given as files and/or ZIP archives, at once.
+
+    Every statement becomes its own job on the shared queue, so the batch
+    runs with the queue's worker concurrency and takes roughly as long as
+    its slowest statement. Files that cannot be queued are reported per
+    file instead of failing the batch. Poll ``GET /process/batch/{batch_id}``
+    for per-file results and aggregate counts. Responds with 400 when the
+    batch has more than ``batch_max_files`` statements, or a ZIP archive
+    would expand beyond a full batch, and 429 when the queue cannot take
+    all of them.
+    """
+    entries: list[tuple[str, BinaryIO | None, str | None]] = []
+    for file in files:
+        if Path(file.filename or "").suffix.lower() == ".zip":
+            remaining = settings.batch_max_files - len(entries)
+            try:
+                members = await asyncio.to_thread(unpack_zip, take_upload(file), remaining)
+            except HTTPException:
+                for _, handle, _ in entries:
+                    if handle is not None:
+                        handle.close()
+                raise
+            entries.extend(members)
+            continue
+        try:
+            check_upload(file.filename, file.size)
+        except HTTPException as e:
+            entries.append((file.filename or "", None, e.detail))
+            continue
+        entries.append((file.filename, take_upload(file), None))
 
-        return ProcessingResponse(
-            success=True,
-            message=f"Successfully processed {file.filename}",
-            transactions=transactions,
-            transaction_count=len(transactions),
+    handles = [handle for _, handle, _ in entries if handle is not None]
+    rejection = None
+    if len(entries) > settings.batch_max_files:
+        rejection = HTTPException(
+            status_code=400,
+            detail=f"Batch has {len(entries)} files, the limit is {settings.batch_max_files}",
+        )
+    elif len(handles) > job_queue.free_slots():
+        rejection = HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Processing queue cannot take the whole batch",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
         )
+    if rejection is not None:
+        for handle in handles:
+            handle.close()
+        raise rejection
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    items = []
+    for filename, handle, error in entries:
+        if handle is None:
+            items.append(BatchItem(filename=filename, error=error))
+            continue
+        try:
+            job = await enqueue_upload(graph, job_queue, filename, handle)
+        except QueueFullError as e:
+            items.append(BatchItem(filename=filename, error=str(e)))
+            continue
+        items.append(BatchItem(filename=filename, job_id=job.id))
 
-    finally:
-        Path(tmp_path).unlink(missing_ok=True)
+    return build_batch_response(job_queue.add_batch(items), job_queue)
+
+
+@router.get("/batch/{batch_id}", response_model=BatchResponse)
+async def get_batch_status(batch_id: str, job_queue: JobQueueDep) -> BatchResponse:
+    """Return per-file statuses and aggregate counts of a batch."""
+    batch = job_queue.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+    return build_batch_response(batch, job_queue)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, job_queue: JobQueueDep) -> StreamingResponse:
+    """Stream a processing job's progress as server-sent events.
+
+    Past events are replayed first while the job runs, so the stream can be
+    opened at any point after the upload; once the job has finished, only
+    its outcome is sent. The transactions are pushed with the
+    ``extracted`` event, before categorization has started, and the stream
+    ends with ``completed`` or ``failed``. A comment line is sent every
+    ``SSE_HEARTBEAT_SECONDS`` while nothing happens.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    async def event_stream():
+        async for event in job_queue.follow(job, heartbeat=SSE_HEARTBEAT_SECONDS):
+            yield ": keep-alive\n\n" if event is None else format_sse(event)
+        if job.status == JobStatus.COMPLETED:
+            yield format_sse(ProcessingEvent(event="completed", result=job.result))
+        else:
+            yield format_sse(ProcessingEvent(event="failed", error=job.error))
+
+    return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str, job_queue: JobQueueDep) -> JobStatusResponse:
+    """Return the status of a processing job and its result once completed."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        filename=job.filename,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        result=job.result,
+        error=job.error,
+    )
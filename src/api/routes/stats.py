@@ -0,0 +1,46 @@
+"""Spending statistics API routes served from the rollup tables."""
+
+from datetime import date
+
+from fastapi import APIRouter, Query
+
+from src.api.schemas import CategoryTotal, DailyTotal, MerchantTotal
+from src.database import get_category_totals, get_daily_totals, get_merchant_totals
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/categories", response_model=list[CategoryTotal])
+def category_stats(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category: str | None = None,
+) -> list[CategoryTotal]:
+    """Monthly totals per category.
+
+    Months are included when they overlap the requested date range.
+    """
+    rows = get_category_totals(start_date, end_date, category)
+    return [CategoryTotal(**row) for row in rows]
+
+
+@router.get("/merchants", response_model=list[MerchantTotal])
+def merchant_stats(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category: str | None = None,
+    limit: int = Query(default=20, ge=1, le=1000),
+) -> list[MerchantTotal]:
+    """Merchants ranked by spending over the months overlapping the date range."""
+    rows = get_merchant_totals(start_date, end_date, category, limit)
+    return [MerchantTotal(**row) for row in rows]
+
+
+@router.get("/daily", response_model=list[DailyTotal])
+def daily_stats(
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[DailyTotal]:
+    """Daily totals within the date range."""
+    rows = get_daily_totals(start_date, end_date)
+    return [DailyTotal(**row) for row in rows]
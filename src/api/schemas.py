@@ -1,9 +1,11 @@
 """Pydantic schemas for API requests and responses."""
 
-from datetime import date
+from datetime import date, datetime
 
 from pydantic import BaseModel, Field
 
+from src.api.jobs import JobStatus
+
 SUPPORTED_FILE_TYPES = [".pdf", ".csv"]
 
 
@@ -26,10 +28,92 @@ class ProcessingResponse(BaseModel):
     transaction_count: int = 0
 
 
+class JobResponse(BaseModel):
+    """Response returned when a document is queued for processing."""
+
+    job_id: str
+    status: JobStatus
+    filename: str
+
+
+class JobStatusResponse(BaseModel):
+    """Status of a processing job, including its result once finished."""
+
+    job_id: str
+    status: JobStatus
+    filename: str
+    created_at: datetime
+    finished_at: datetime | None = None
+    result: ProcessingResponse | None = None
+    error: str | None = None
+
+
+class ProcessingEvent(BaseModel):
+    """A progress event of a processing job, sent over ``/process/{job_id}/events``.
+
+    ``event`` is ``ocr_completed``, ``extracted``, ``categorized`` or
+    ``saved`` while the graph runs, then ``completed`` (with ``result``) or
+    ``failed`` (with ``error``). ``elapsed`` counts seconds since the job
+    started and ``duration`` the seconds spent in the step.
+    """
+
+    event: str
+    elapsed: float | None = None
+    duration: float | None = None
+    pages: int | None = None
+    transaction_count: int | None = None
+    transactions: list[TransactionResponse] | None = None
+    result: ProcessingResponse | None = None
+    error: str | None = None
+
+
+class BatchFileStatus(BaseModel):
+    """Status of one file within a batch."""
+
+    filename: str
+    job_id: str | None = None
+    status: JobStatus
+    transaction_count: int | None = None
+    error: str | None = None
+
+
+class BatchResponse(BaseModel):
+    """Per-file statuses of a batch upload plus aggregate counts."""
+
+    batch_id: str
+    status: JobStatus
+    total_files: int
+    completed: int
+    failed: int
+    transaction_count: int
+    files: list[BatchFileStatus]
+
+
 class ChatRequest(BaseModel):
     """Request body for the chat endpoint."""
 
     query: str = Field(..., min_length=1, description="Natural language question")
+    thread_id: str | None = Field(
+        None,
+        max_length=128,
+        description="Conversation to continue; follow-ups see its earlier questions and results",
+    )
+
+
+class ChatEvent(BaseModel):
+    """An event of a streamed chat answer, sent by ``/chat/stream``.
+
+    ``token`` events carry pieces of the answer in ``content``;
+    ``tool_call`` and ``tool_result`` report the agent's queries. The
+    stream ends with ``done``, whose ``content`` is the final answer, or
+    ``error``.
+    """
+
+    event: str
+    content: str | None = None
+    name: str | None = None
+    args: dict | None = None
+    error: str | None = None
 
 
 class ChatResponse(BaseModel):
@@ -38,3 +122,93 @@ class ChatResponse(BaseModel):
     success: bool
     response: str
     error: str | None = None
+
+
+class RollupTotals(BaseModel):
+    """Aggregated amounts shared by every rollup row."""
+
+    total: float
+    income: float
+    expenses: float
+    transaction_count: int
+
+
+class CategoryTotal(RollupTotals):
+    """Totals for one category in one month."""
+
+    month: str
+    category: str
+
+
+class MerchantTotal(RollupTotals):
+    """Totals for one merchant over the requested period."""
+
+    merchant: str
+    category: str
+
+
+class DailyTotal(RollupTotals):
+    """Totals for one day."""
+
+    day: date
+
+
+class CacheStats(BaseModel):
+    """Hit/miss counters for a cache layer."""
+
+    hits: int
+    misses: int
+    hit_rate: float
+    size: int
+
+
+class SearchStats(CacheStats):
+    """Counters for the categorizer's company search."""
+
+    coalesced: int
+
+
+class LLMCacheStats(CacheStats):
+    """Counters for the LLM response cache."""
+
+    tokens_saved: int
+
+
+class PathLatency(BaseModel):
+    """Latency of the chat questions answered by one path."""
+
+    count: int
+    mean_ms: float
+    max_ms: float
+
+
+class ChatRouterStats(BaseModel):
+    """Counters for the chat fast path, with latency per intent and for the agent."""
+
+    hits: int
+    misses: int
+    hit_rate: float
+    intents: dict[str, int]
+    latency: dict[str, PathLatency]
+
+
+class AnalystSQLStats(BaseModel):
+    """Counters for the SQL run by the chat analyst agent."""
+
+    queries: int
+    rejected: int
+    timed_out: int
+    truncated: int
+    errors: int
+
+
+class MetricsResponse(BaseModel):
+    """Response from the metrics endpoint."""
+
+    merchant_memo: CacheStats
+    company_search: SearchStats
+    local_classifier: CacheStats
+    llm_cache: LLMCacheStats | None = None
+    chat_router: ChatRouterStats | None = None
+    analyst_sql: AnalystSQLStats
+    chat_threads: CacheStats | None = None
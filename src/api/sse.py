@@ -0,0 +1,11 @@
+"""Server-sent event encoding shared by the streaming routes."""
+
+from src.api.schemas import ChatEvent, ProcessingEvent
+
+SSE_HEADERS = {"Cache-Control": "no-cache"}
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def format_sse(event: ProcessingEvent | ChatEvent) -> str:
+    """Encode an event as a server-sent event named after its ``event`` field."""
+    return f"event: {event.event}\ndata: {event.model_dump_json(exclude_none=True)}\n\n"
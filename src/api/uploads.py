@@ -0,0 +1,81 @@
+"""Request body limits enforced before upload routes parse their forms."""
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.settings.config import settings
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def upload_body_limit(method: str, path: str) -> int | None:
+    """Return the largest request body accepted by an upload route, or None if unbounded.
+
+    A single upload may carry one file of ``max_upload_bytes``, a batch up
+    to ``batch_max_files`` of them, plus room for the multipart framing.
+    """
+    if method != "POST":
+        return None
+    if path == "/process":
+        return settings.max_upload_bytes + MULTIPART_OVERHEAD_BYTES
+    if path == "/process/batch":
+        return settings.batch_max_files * settings.max_upload_bytes + MULTIPART_OVERHEAD_BYTES
+    return None
+
+
+class UploadLimitMiddleware:
+    """Answer 413 to upload requests whose body exceeds ``upload_body_limit``.
+
+    FastAPI spools the whole multipart form before a route runs, so the
+    route's own size checks only happen once an oversized body has been
+    read. A declared ``Content-Length`` above the limit is refused before
+    anything is read; otherwise the body is counted as it arrives, and once
+    it goes past the limit the 413 is sent and the app sees a disconnect,
+    so reading stops there.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = (
+            upload_body_limit(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        )
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": f"Request body exceeds the {limit} byte upload limit"}, status_code=413
+        )
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            await response(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    if not started:
+                        await response(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            if rejected:
+                return
+            started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
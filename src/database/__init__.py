@@ -3,17 +3,49 @@
 from src.database.database import (
     DATABASE_URL,
     Base,
+    DailyTotalModel,
+    IngestionModel,
+    MerchantCategoryModel,
+    MonthlyCategoryTotalModel,
+    MonthlyMerchantTotalModel,
     TransactionModel,
+    create_db_engine,
     engine,
+    get_category_totals,
+    get_daily_totals,
+    get_ingestion,
+    get_labeled_merchants,
+    get_merchant_categories,
+    get_merchant_totals,
     init_db,
+    rebuild_rollups,
+    save_ingestion,
+    save_merchant_categories,
     save_transactions,
+    transaction_fingerprints,
 )
 
 __all__ = [
     "DATABASE_URL",
     "Base",
+    "DailyTotalModel",
+    "IngestionModel",
+    "MerchantCategoryModel",
+    "MonthlyCategoryTotalModel",
+    "MonthlyMerchantTotalModel",
     "TransactionModel",
+    "create_db_engine",
     "engine",
+    "get_category_totals",
+    "get_daily_totals",
+    "get_ingestion",
+    "get_labeled_merchants",
+    "get_merchant_categories",
+    "get_merchant_totals",
     "init_db",
+    "rebuild_rollups",
+    "save_ingestion",
+    "save_merchant_categories",
     "save_transactions",
+    "transaction_fingerprints",
 ]
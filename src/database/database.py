@@ -1,11 +1,74 @@
-from datetime import date
+import hashlib
+from datetime import date, datetime, timezone
 
-from sqlalchemy import Date, Float, String, create_engine
+from sqlalchemy import (
+    URL,
+    Connection,
+    Date,
+    DateTime,
+    Engine,
+    Float,
+    Integer,
+    String,
+    Text,
+    bindparam,
+    create_engine,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
 
-DATABASE_URL = "sqlite:///data/database/pfm.db"
+from src.settings.config import settings
 
-engine = create_engine(DATABASE_URL)
+DATABASE_URL = settings.database_url
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": "-65536",
+    "temp_store": "MEMORY",
+    "busy_timeout": "5000",
+}
+
+
+def create_db_engine(
+    url: str | URL = DATABASE_URL, read_only: bool = False, pool_size: int | None = None
+) -> Engine:
+    """Create an engine whose SQLite connections use WAL and tuned pragmas.
+
+    WAL lets chat queries read while ingestion writes, and
+    ``synchronous=NORMAL`` is durable under WAL while avoiding an fsync
+    per commit.
+
+    Args:
+        url: Database URL.
+        read_only: Set ``query_only`` on every connection, so statements that
+            would write fail instead of taking the write lock.
+        pool_size: Fixed number of pooled connections, with no overflow, to
+            bound how many statements run at once. Defaults to SQLAlchemy's pool.
+    """
+    pool_options = {"pool_size": pool_size, "max_overflow": 0} if pool_size else {}
+    db_engine = create_engine(url, **pool_options)
+    pragmas = {**SQLITE_PRAGMAS, "query_only": "ON"} if read_only else SQLITE_PRAGMAS
+
+    @event.listens_for(db_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return db_engine
+
+
+engine = create_db_engine()
 
 
 class Base(DeclarativeBase):
@@ -16,25 +79,480 @@ class TransactionModel(Base):
     __tablename__ = "transactions"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    transaction_date: Mapped[date] = mapped_column(Date)
-    merchant: Mapped[str] = mapped_column(String)
+    transaction_date: Mapped[date] = mapped_column(Date, index=True)
+    merchant: Mapped[str] = mapped_column(String, index=True)
     description: Mapped[str] = mapped_column(String)
     amount: Mapped[float] = mapped_column(Float)
+    category: Mapped[str] = mapped_column(String, index=True)
+    category_source: Mapped[str | None] = mapped_column(String)
+    source_file: Mapped[str] = mapped_column(String, index=True)
+    fingerprint: Mapped[str | None] = mapped_column(String, index=True, unique=True)
+
+
+class IngestionModel(Base):
+    __tablename__ = "ingestions"
+
+    file_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    filename: Mapped[str] = mapped_column(String)
+    transaction_count: Mapped[int] = mapped_column(Integer)
+    result: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class MerchantCategoryModel(Base):
+    __tablename__ = "merchant_categories"
+
+    merchant_key: Mapped[str] = mapped_column(String, primary_key=True)
     category: Mapped[str] = mapped_column(String)
-    source_file: Mapped[str] = mapped_column(String)
+    confirmations: Mapped[int] = mapped_column(Integer, default=1)
+
+
+class MonthlyCategoryTotalModel(Base):
+    __tablename__ = "monthly_category_totals"
+
+    month: Mapped[str] = mapped_column(String, primary_key=True)
+    category: Mapped[str] = mapped_column(String, primary_key=True)
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+    income: Mapped[float] = mapped_column(Float, default=0.0)
+    expenses: Mapped[float] = mapped_column(Float, default=0.0)
+    transaction_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class MonthlyMerchantTotalModel(Base):
+    __tablename__ = "monthly_merchant_totals"
+
+    month: Mapped[str] = mapped_column(String, primary_key=True)
+    merchant: Mapped[str] = mapped_column(String, primary_key=True)
+    category: Mapped[str] = mapped_column(String, primary_key=True)
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+    income: Mapped[float] = mapped_column(Float, default=0.0)
+    expenses: Mapped[float] = mapped_column(Float, default=0.0)
+    transaction_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DailyTotalModel(Base):
+    __tablename__ = "daily_totals"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+    income: Mapped[float] = mapped_column(Float, default=0.0)
+    expenses: Mapped[float] = mapped_column(Float, default=0.0)
+    transaction_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+ROLLUP_TOTAL_COLUMNS = ("total", "income", "expenses", "transaction_count")
+ROLLUP_MODELS = (MonthlyCategoryTotalModel, MonthlyMerchantTotalModel, DailyTotalModel)
 
 
 def init_db(db_engine=None) -> None:
-    """Initialize the database by creating all tables."""
+    """Initialize the database by creating all tables and indexes.
+
+    Called once at application startup. Indexes missing from an existing
+    transactions table are added, and rollup tables created on a database
+    that already holds transactions are backfilled from them.
+    """
     target_engine = db_engine or engine
+    had_rollups = inspect(target_engine).has_table(DailyTotalModel.__tablename__)
     Base.metadata.create_all(target_engine)
+    _add_missing_columns(target_engine)
+    for index in TransactionModel.__table__.indexes:
+        index.create(target_engine, checkfirst=True)
+    if not had_rollups:
+        rebuild_rollups(target_engine)
+
+
+def _add_missing_columns(db_engine: Engine) -> None:
+    """Add nullable columns introduced after a table was first created."""
+    columns = {column["name"] for column in inspect(db_engine).get_columns("transactions")}
+    for name in ("fingerprint", "category_source"):
+        if name not in columns:
+            with db_engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE transactions ADD COLUMN {name} VARCHAR"))
+
+
+def _rollup_deltas(transactions: list[dict], sign: int = 1) -> dict[type[Base], list[dict]]:
+    """Aggregate transactions into per-key deltas for each rollup table.
+
+    With ``sign=-1`` the deltas remove the transactions from the rollups.
+    """
+    by_category: dict[tuple, list] = {}
+    by_merchant: dict[tuple, list] = {}
+    by_day: dict[tuple, list] = {}
+    for txn in transactions:
+        txn_date = txn["transaction_date"]
+        month = f"{txn_date.year:04d}-{txn_date.month:02d}"
+        amount = txn["amount"]
+        delta = [
+            sign * amount,
+            sign * amount if amount > 0 else 0.0,
+            sign * amount if amount < 0 else 0.0,
+            sign,
+        ]
+        for totals, key in (
+            (by_category, (month, txn["category"])),
+            (by_merchant, (month, txn["merchant"], txn["category"])),
+            (by_day, (txn_date,)),
+        ):
+            row = totals.get(key)
+            if row is None:
+                totals[key] = list(delta)
+            else:
+                for i, value in enumerate(delta):
+                    row[i] += value
+
+    def to_rows(totals: dict[tuple, list], key_columns: tuple[str, ...]) -> list[dict]:
+        return [
+            {**dict(zip(key_columns, key)), **dict(zip(ROLLUP_TOTAL_COLUMNS, values))}
+            for key, values in totals.items()
+        ]
+
+    return {
+        MonthlyCategoryTotalModel: to_rows(by_category, ("month", "category")),
+        MonthlyMerchantTotalModel: to_rows(by_merchant, ("month", "merchant", "category")),
+        DailyTotalModel: to_rows(by_day, ("day",)),
+    }
+
+
+def apply_rollups(conn: Connection, transactions: list[dict], sign: int = 1) -> None:
+    """Add (or with ``sign=-1`` remove) transactions to the rollup tables.
 
+    Runs within the caller's transaction. Rollup rows left without any
+    transaction are deleted.
+    """
+    for model, rows in _rollup_deltas(transactions, sign).items():
+        if not rows:
+            continue
+        stmt = sqlite_insert(model)
+        table = model.__table__
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={col: table.c[col] + stmt.excluded[col] for col in ROLLUP_TOTAL_COLUMNS},
+        )
+        conn.execute(stmt, rows)
+        if sign < 0:
+            conn.execute(delete(model).where(model.transaction_count <= 0))
 
-def save_transactions(transactions: list[dict], db_engine=None) -> None:
-    """Save a list of transaction dictionaries to the database."""
+
+def rebuild_rollups(db_engine=None) -> None:
+    """Recompute every rollup table from the transactions table."""
     target_engine = db_engine or engine
+    with target_engine.begin() as conn:
+        for model in ROLLUP_MODELS:
+            conn.execute(delete(model))
+        rows = conn.execute(
+            select(
+                TransactionModel.transaction_date,
+                TransactionModel.merchant,
+                TransactionModel.amount,
+                TransactionModel.category,
+            )
+        ).mappings()
+        apply_rollups(conn, [dict(row) for row in rows])
+
+
+def _normalize_text(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+def transaction_fingerprints(transactions: list[dict]) -> list[str]:
+    """Compute a stable SHA-256 fingerprint for each transaction.
+
+    The fingerprint covers date, merchant, description and amount, plus the
+    occurrence number of identical rows within the batch, so two equal
+    purchases on the same day stay distinct while re-uploading the same
+    statement produces the same fingerprints.
+    """
+    occurrences: dict[str, int] = {}
+    fingerprints = []
+    for txn in transactions:
+        base = "|".join(
+            [
+                txn["transaction_date"].isoformat(),
+                _normalize_text(txn["merchant"]),
+                _normalize_text(txn["description"]),
+                f"{txn['amount']:.2f}",
+            ]
+        )
+        occurrence = occurrences.get(base, 0)
+        occurrences[base] = occurrence + 1
+        fingerprints.append(hashlib.sha256(f"{base}|{occurrence}".encode()).hexdigest())
+    return fingerprints
+
+
+FINGERPRINT_LOOKUP_BATCH = 500
+
+
+def _existing_transactions(conn: Connection, fingerprints: list[str]) -> dict[str, dict]:
+    """Fetch stored transactions by fingerprint, keyed by fingerprint."""
+    existing: dict[str, dict] = {}
+    for i in range(0, len(fingerprints), FINGERPRINT_LOOKUP_BATCH):
+        rows = conn.execute(
+            select(
+                TransactionModel.fingerprint,
+                TransactionModel.transaction_date,
+                TransactionModel.merchant,
+                TransactionModel.amount,
+                TransactionModel.category,
+                TransactionModel.category_source,
+            ).where(
+                TransactionModel.fingerprint.in_(fingerprints[i : i + FINGERPRINT_LOOKUP_BATCH])
+            )
+        ).mappings()
+        existing.update({row["fingerprint"]: dict(row) for row in rows})
+    return existing
+
+
+def save_transactions(transactions: list[dict], db_engine=None) -> int:
+    """Upsert a list of transaction dictionaries into the database.
+
+    Transactions are matched on their fingerprint: new ones are written
+    with a single executemany insert, and already stored ones only have
+    their category updated when it changed. The optional
+    ``category_source`` records where a category came from (``"agent"``,
+    ``"memo"``, ``"classifier"`` or ``"extraction"``); it follows a changed
+    category, and a stored category the agent has now reviewed is marked
+    ``"agent"``. The rollup tables are updated in the same database
+    transaction.
+
+    The write lock is taken before the fingerprints are looked up, so
+    concurrent saves of the same statement are serialized: the second one
+    sees the rows of the first as existing instead of failing on the
+    unique fingerprint index.
+
+    Returns:
+        The number of newly inserted transactions.
+    """
+    if not transactions:
+        return 0
+    rows = [
+        {**txn, "category_source": txn.get("category_source"), "fingerprint": fingerprint}
+        for txn, fingerprint in zip(transactions, transaction_fingerprints(transactions))
+    ]
+    target_engine = db_engine or engine
+    with target_engine.begin() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        existing = _existing_transactions(conn, [row["fingerprint"] for row in rows])
+        new_rows = [row for row in rows if row["fingerprint"] not in existing]
+        recategorized = [
+            row
+            for row in rows
+            if row["fingerprint"] in existing
+            and existing[row["fingerprint"]]["category"] != row["category"]
+        ]
+        reviewed = [
+            row
+            for row in rows
+            if row["fingerprint"] in existing
+            and existing[row["fingerprint"]]["category"] == row["category"]
+            and row["category_source"] == "agent"
+            and existing[row["fingerprint"]]["category_source"] != "agent"
+        ]
+
+        if new_rows:
+            conn.execute(insert(TransactionModel), new_rows)
+            apply_rollups(conn, new_rows)
+
+        if recategorized or reviewed:
+            table = TransactionModel.__table__
+            conn.execute(
+                update(table)
+                .where(table.c.fingerprint == bindparam("match_fingerprint"))
+                .values(
+                    category=bindparam("new_category"),
+                    category_source=bindparam("new_category_source"),
+                ),
+                [
+                    {
+                        "match_fingerprint": row["fingerprint"],
+                        "new_category": row["category"],
+                        "new_category_source": row["category_source"],
+                    }
+                    for row in recategorized + reviewed
+                ],
+            )
+        if recategorized:
+            stored = [existing[row["fingerprint"]] for row in recategorized]
+            apply_rollups(conn, stored, sign=-1)
+            apply_rollups(
+                conn,
+                [{**txn, "category": row["category"]} for txn, row in zip(stored, recategorized)],
+            )
+
+    return len(new_rows)
+
+
+def get_ingestion(file_hash: str, db_engine=None) -> str | None:
+    """Return the stored processing result for a file hash, if any."""
+    target_engine = db_engine or engine
+    with Session(target_engine) as session:
+        ingestion = session.get(IngestionModel, file_hash)
+        return ingestion.result if ingestion else None
+
+
+def save_ingestion(
+    file_hash: str, filename: str, transaction_count: int, result: str, db_engine=None
+) -> None:
+    """Record the processing result for a file hash."""
+    target_engine = db_engine or engine
+    stmt = sqlite_insert(IngestionModel).values(
+        file_hash=file_hash,
+        filename=filename,
+        transaction_count=transaction_count,
+        result=result,
+        created_at=datetime.now(timezone.utc),
+    )
+    stmt = stmt.on_conflict_do_nothing(index_elements=[IngestionModel.file_hash])
+    with target_engine.begin() as conn:
+        conn.execute(stmt)
+
+
+def _month_range(query, model, start_date: date | None, end_date: date | None):
+    if start_date is not None:
+        query = query.where(model.month >= start_date.strftime("%Y-%m"))
+    if end_date is not None:
+        query = query.where(model.month <= end_date.strftime("%Y-%m"))
+    return query
+
+
+def get_category_totals(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category: str | None = None,
+    db_engine=None,
+) -> list[dict]:
+    """Read monthly totals per category, filtered by month range and category."""
+    target_engine = db_engine or engine
+    query = _month_range(
+        select(MonthlyCategoryTotalModel), MonthlyCategoryTotalModel, start_date, end_date
+    )
+    if category is not None:
+        query = query.where(MonthlyCategoryTotalModel.category == category)
+    query = query.order_by(MonthlyCategoryTotalModel.month, MonthlyCategoryTotalModel.category)
+    with Session(target_engine) as session:
+        return [_row_to_dict(row) for row in session.scalars(query)]
+
+
+def get_merchant_totals(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category: str | None = None,
+    limit: int | None = None,
+    db_engine=None,
+) -> list[dict]:
+    """Read merchant totals summed over a month range, biggest spend first."""
+    target_engine = db_engine or engine
+    model = MonthlyMerchantTotalModel
+    query = _month_range(
+        select(
+            model.merchant,
+            model.category,
+            func.sum(model.total).label("total"),
+            func.sum(model.income).label("income"),
+            func.sum(model.expenses).label("expenses"),
+            func.sum(model.transaction_count).label("transaction_count"),
+        ),
+        model,
+        start_date,
+        end_date,
+    )
+    if category is not None:
+        query = query.where(model.category == category)
+    query = query.group_by(model.merchant, model.category).order_by(func.sum(model.expenses))
+    if limit is not None:
+        query = query.limit(limit)
+    with Session(target_engine) as session:
+        return [dict(row) for row in session.execute(query).mappings()]
+
+
+def get_daily_totals(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    db_engine=None,
+) -> list[dict]:
+    """Read daily totals within a date range."""
+    target_engine = db_engine or engine
+    query = select(DailyTotalModel)
+    if start_date is not None:
+        query = query.where(DailyTotalModel.day >= start_date)
+    if end_date is not None:
+        query = query.where(DailyTotalModel.day <= end_date)
+    query = query.order_by(DailyTotalModel.day)
+    with Session(target_engine) as session:
+        return [_row_to_dict(row) for row in session.scalars(query)]
+
+
+def _row_to_dict(row: Base) -> dict:
+    return {column.key: getattr(row, column.key) for column in row.__table__.columns}
+
+
+def get_merchant_categories(merchant_keys: list[str], db_engine=None) -> dict[str, str]:
+    """Look up stored categories for normalized merchant keys.
+
+    Returns:
+        Mapping of the keys that are known to their category.
+    """
+    if not merchant_keys:
+        return {}
+    target_engine = db_engine or engine
+    stmt = select(MerchantCategoryModel.merchant_key, MerchantCategoryModel.category).where(
+        MerchantCategoryModel.merchant_key.in_(merchant_keys)
+    )
     with Session(target_engine) as session:
-        for txn in transactions:
-            model = TransactionModel(**txn)
-            session.add(model)
+        return {key: category for key, category in session.execute(stmt)}
+
+
+def save_merchant_categories(categories: dict[str, str], db_engine=None) -> None:
+    """Upsert confirmed categories for normalized merchant keys."""
+    if not categories:
+        return
+    target_engine = db_engine or engine
+    stmt = sqlite_insert(MerchantCategoryModel).values(
+        [{"merchant_key": key, "category": category} for key, category in categories.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MerchantCategoryModel.merchant_key],
+        set_={
+            "category": stmt.excluded.category,
+            "confirmations": MerchantCategoryModel.confirmations + 1,
+        },
+    )
+    with Session(target_engine) as session:
+        session.execute(stmt)
         session.commit()
+
+
+def get_labeled_merchants(
+    limit: int | None = None,
+    exclude_category: str | None = None,
+    category_source: str | None = None,
+    db_engine=None,
+) -> list[tuple[str, str, str, int]]:
+    """Count stored transactions per distinct merchant, description and category.
+
+    Used to train the local category classifier. The most frequent
+    combinations come first.
+
+    Args:
+        limit: Maximum number of combinations to return.
+        exclude_category: Category left out, e.g. the unconfirmed ``"Other"``.
+        category_source: Only count transactions whose category came from
+            this source, e.g. ``"agent"``.
+        db_engine: Engine to query instead of the default one.
+
+    Returns:
+        ``(merchant, description, category, count)`` tuples.
+    """
+    target_engine = db_engine or engine
+    count = func.count().label("count")
+    stmt = select(
+        TransactionModel.merchant, TransactionModel.description, TransactionModel.category, count
+    ).group_by(TransactionModel.merchant, TransactionModel.description, TransactionModel.category)
+    if exclude_category is not None:
+        stmt = stmt.where(TransactionModel.category != exclude_category)
+    if category_source is not None:
+        stmt = stmt.where(TransactionModel.category_source == category_source)
+    stmt = stmt.order_by(count.desc()).limit(limit)
+    with Session(target_engine) as session:
+        return [tuple(row) for row in session.execute(stmt)]
@@ -1,7 +1,15 @@
 """LangGraph workflows for statement processing and chat."""
 
-from src.graphs.chat import get_analyst_response
+from src.graphs.chat import AnalystAgent
+from src.graphs.chat_router import FastPathRouter
+from src.graphs.chat_threads import ChatThreadStore
 from src.graphs.graph_processing import build_processing_graph
 from src.graphs.state import ProcessingState
 
-__all__ = ["build_processing_graph", "get_analyst_response", "ProcessingState"]
+__all__ = [
+    "AnalystAgent",
+    "ChatThreadStore",
+    "FastPathRouter",
+    "build_processing_graph",
+    "ProcessingState",
+]
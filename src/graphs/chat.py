@@ -1,23 +1,45 @@
 """Chat agent for querying transaction data using natural language."""
 
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator
+
 from langchain.agents import create_agent
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
 from langchain_community.utilities import SQLDatabase
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from sqlalchemy import text
 
-from src.database import DATABASE_URL
+from src.database import engine
+from src.graphs.chat_router import FastPathAnswer, FastPathRouter
+from src.graphs.chat_threads import ChatThreadStore
+from src.graphs.sql_guard import BoundedSQLExecutor, build_query_tool, build_sql_executor
 from src.llm import get_llm
 
+ANALYST_TABLES = [
+    "transactions",
+    "monthly_category_totals",
+    "monthly_merchant_totals",
+    "daily_totals",
+]
+TOOL_RESULT_PREVIEW_CHARS = 500
+
 SYSTEM_MESSAGE = """You are a helpful financial analyst assistant. You have access to a
-SQLite database containing transaction data with the following schema:
+SQLite database containing transaction data. Amounts are positive for income and negative for
+expenses. The schema, with a few sample rows per table, is:
+
+{schema}
 
-Table: transactions
-- id: Primary key
-- date: Transaction date
-- merchant: Name of the merchant
-- description: Transaction description
-- amount: Transaction amount (positive for income, negative for expenses)
-- category: Transaction category
-- source_file: Source file the transaction was extracted from
+The monthly_category_totals, monthly_merchant_totals and daily_totals tables are kept up to date
+with pre-aggregated sums of the transactions table (month is formatted YYYY-MM, expenses are
+negative). Prefer them for totals, averages and rankings by month, category, merchant or day, and
+only query transactions when individual rows are needed.
 
 When answering questions:
 1. Use SQL queries to find the relevant data
@@ -25,31 +47,164 @@ When answering questions:
 3. Format monetary values appropriately
 4. If asked about spending or expenses, focus on the amounts and categories
 5. Be helpful and informative about the user's financial data
-"""
 
+Queries are read-only, time-limited and return at most {max_rows} rows, so aggregate in SQL rather
+than fetching raw transactions. If a query is rejected, follow the error's advice and rewrite it.
+"""
 
-def get_analyst_response(query: str) -> str:
-    """Process a natural language query about transactions and return a response.
 
-    Args:
-        query: Natural language question about the transaction data.
+class AnalystAgent:
+    """SQL analyst agent built once and shared by all chat requests.
 
-    Returns:
-        A string response answering the user's question.
+    The table schema is rendered into the system prompt up front, so the
+    agent can query directly instead of listing tables and fetching their
+    schema on every question. The agent is rebuilt only when SQLite's
+    ``schema_version`` changes. With ``fast_path``, common question shapes
+    are answered by ``FastPathRouter`` from SQL templates without the LLM.
+    Every query, templated or written by the agent, runs through
+    ``executor``'s read-only pool, and the agent's own SQL is bounded by
+    ``BoundedSQLExecutor``. Questions asked with a ``thread_id`` are
+    answered with the thread's earlier messages, kept in ``threads``, so
+    follow-ups can build on previous questions and query results.
     """
-    db = SQLDatabase.from_uri(DATABASE_URL)
 
-    llm = get_llm(temperature=0)
+    def __init__(
+        self,
+        db_engine=None,
+        fast_path: bool = True,
+        executor: BoundedSQLExecutor | None = None,
+        threads: ChatThreadStore | None = None,
+    ) -> None:
+        self.engine = db_engine or engine
+        self.threads = threads
+        self.executor = executor or build_sql_executor(self.engine)
+        self.router = FastPathRouter(self.executor.engine) if fast_path else None
+        self.llm = get_llm(temperature=0)
+        self.schema_version: int | None = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _current_schema_version(self) -> int:
+        with self.executor.engine.connect() as conn:
+            return conn.execute(text("PRAGMA schema_version")).scalar_one()
+
+    def refresh(self) -> None:
+        """Rebuild the agent if the database schema changed since the last build."""
+        with self._lock:
+            version = self._current_schema_version()
+            if version == self.schema_version:
+                return
+
+            db = SQLDatabase(self.executor.engine, include_tables=ANALYST_TABLES)
+            self.schema = db.get_table_info()
+            self.agent = create_agent(
+                self.llm,
+                [build_query_tool(self.executor)],
+                system_prompt=SYSTEM_MESSAGE.format(
+                    schema=self.schema, max_rows=self.executor.max_rows
+                ),
+            )
+            self.schema_version = version
+
+    async def arespond(self, query: str, thread_id: str | None = None) -> str:
+        """Answer a natural language question about the transactions.
+
+        Args:
+            query: Natural language question about the transaction data.
+            thread_id: Conversation the question belongs to, if any.
+
+        Returns:
+            A string response answering the user's question.
+        """
+        started = time.perf_counter()
+        history = await self._history(thread_id)
+        fast = await self._fast_path(query)
+        if fast is not None:
+            self.router.record(fast.intent, time.perf_counter() - started)
+            await self._remember(thread_id, [*history, HumanMessage(query), AIMessage(fast.answer)])
+            return fast.answer
+
+        await asyncio.to_thread(self.refresh)
+
+        result = await self.agent.ainvoke({"messages": [*history, HumanMessage(query)]})
+
+        final_message = result["messages"][-1]
+        self._record_agent(started)
+        await self._remember(thread_id, result["messages"])
+        return final_message.content
+
+    async def _history(self, thread_id: str | None) -> list[BaseMessage]:
+        if self.threads is None or thread_id is None:
+            return []
+        return await asyncio.to_thread(self.threads.load, thread_id)
+
+    async def _remember(self, thread_id: str | None, messages: list[BaseMessage]) -> None:
+        if self.threads is not None and thread_id is not None:
+            await asyncio.to_thread(self.threads.save, thread_id, messages)
+
+    async def _fast_path(self, query: str) -> FastPathAnswer | None:
+        if self.router is None:
+            return None
+        return await asyncio.to_thread(self.router.answer, query)
+
+    def _record_agent(self, started: float) -> None:
+        if self.router is not None:
+            self.router.record("agent", time.perf_counter() - started)
+
+    async def astream_response(
+        self, query: str, thread_id: str | None = None
+    ) -> AsyncIterator[dict]:
+        """Answer a question, yielding the agent's steps and text as they are produced.
+
+        Args:
+            query: Natural language question about the transaction data.
+            thread_id: Conversation the question belongs to, if any.
+
+        Yields:
+            ``{"event": "tool_call", "name", "args"}`` when the agent runs a
+            query, ``{"event": "tool_result", "name", "content"}`` with its
+            output cut to ``TOOL_RESULT_PREVIEW_CHARS``, and
+            ``{"event": "token", "content"}`` for each piece of model text.
+            A fast-path answer arrives as a single token.
+        """
+        started = time.perf_counter()
+        history = await self._history(thread_id)
+        fast = await self._fast_path(query)
+        if fast is not None:
+            self.router.record(fast.intent, time.perf_counter() - started)
+            yield {"event": "token", "content": fast.answer}
+            await self._remember(thread_id, [*history, HumanMessage(query), AIMessage(fast.answer)])
+            return
 
-    toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+        await asyncio.to_thread(self.refresh)
 
-    agent = create_agent(
-        llm,
-        toolkit.get_tools(),
-        system_prompt=SYSTEM_MESSAGE,
-    )
+        question = HumanMessage(query)
+        messages = [*history, question]
+        async for mode, chunk in self.agent.astream(
+            {"messages": [*history, question]}, stream_mode=["messages", "updates"]
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if (
+                    isinstance(message, AIMessageChunk)
+                    and metadata.get("langgraph_node") == "model"
+                    and message.text
+                ):
+                    yield {"event": "token", "content": message.text}
+                continue
 
-    result = agent.invoke({"messages": [("user", query)]})
+            for update in chunk.values():
+                for message in (update or {}).get("messages", []):
+                    messages.append(message)
+                    if isinstance(message, AIMessage):
+                        for call in message.tool_calls:
+                            yield {"event": "tool_call", "name": call["name"], "args": call["args"]}
+                    elif isinstance(message, ToolMessage):
+                        yield {
+                            "event": "tool_result",
+                            "name": message.name,
+                            "content": str(message.content)[:TOOL_RESULT_PREVIEW_CHARS],
+                        }
 
-    final_message = result["messages"][-1]
-    return final_message.content
+        self._record_agent(started)
+        await self._remember(thread_id, messages)
@@ -0,0 +1,442 @@
+"""Fast path answering common finance questions with parameterized SQL before the analyst agent."""
+
+import calendar
+import re
+import threading
+import unicodedata
+from collections import Counter
+from collections.abc import Callable
+from datetime import date
+
+from pydantic import BaseModel
+from sqlalchemy import Connection, text
+
+from src.database import engine
+from src.graphs.nodes.categorizer_node.memo import normalize_merchant
+
+MONTH_NUMBERS = {
+    **{name.lower(): i for i, name in enumerate(calendar.month_name) if name},
+    **{name.lower(): i for i, name in enumerate(calendar.month_abbr) if name},
+}
+_MONTHS = "|".join(sorted(MONTH_NUMBERS, key=len, reverse=True))
+
+SPEND = re.compile(r"\b(spend|spent|spending|pay|paid|expenses?|cost)\b")
+INCOME = re.compile(r"\b(earn|earned|income|receive|received|make|made)\b")
+FALLBACK = re.compile(
+    r"\b(and|or|except|excluding|without|not|counting|week|weekly|day|daily|yesterday|today|"
+    r"since|before|after|between|until|quarters?|"
+    r"largest|smallest|biggest (purchase|transaction|expense)s?|transactions?)\b"
+)
+COMPARISON = re.compile(r"\b(than|vs|versus|compare|compared|comparison)\b")
+IGNORED_SUBJECTS = {"total", "all", "everything", "overall", "average"}
+MERCHANT_PHRASE = re.compile(r"\b(?:at|on|from|with|to) (?P<name>[a-z0-9&'* -]+?)$")
+# Words a total or average question may contain besides its period and subject.
+TOTAL_WORDS = {
+    *"how much what what's whats is was were are did do does have has i my me we our in on at "
+    "for from with to of the a total spend spent spending pay paid expense expenses cost earn "
+    "earned income receive received make made average avg mean monthly per month money "
+    "overall all everything".split()
+}
+
+MONTH_OVER_MONTH = re.compile(
+    r"\b(month over month|compare|compared|comparison|change|changed|difference|vs|versus|"
+    r"increase|increased|decrease|decreased|than)\b"
+)
+TOP_MERCHANTS = re.compile(
+    r"\btop ?(?P<n>\d+)? (merchants?|stores?|shops?|places?)\b|"
+    r"\bwhere (did|do|have) i spen[dt] the most\b|\b(biggest|largest) merchants?\b"
+)
+CATEGORY_BREAKDOWN = re.compile(r"\b(by|per|each) category\b|\bbreak ?down\b")
+AVERAGE = re.compile(r"\b(average|avg|mean)\b")
+TOTAL = re.compile(r"\bhow much\b|\btotal (spending|spent|expenses|income)\b")
+
+PERIOD_PATTERNS = (
+    ("last_n_months", re.compile(r"\b(?:in |over |during )?(?:the )?(?:last|past) (\d+) months\b")),
+    ("last_month", re.compile(r"\b(?:in |during )?(?:the )?(?:last|previous|past) month\b")),
+    ("this_month", re.compile(r"\b(?:in |during )?this month\b")),
+    ("last_year", re.compile(r"\b(?:in |during )?(?:the )?(?:last|previous|past) year\b")),
+    ("this_year", re.compile(r"\b(?:in |during )?this year\b")),
+    ("month", re.compile(rf"\b(?:in|during|for|of) ({_MONTHS})(?: (\d{{4}}))?\b")),
+    ("year", re.compile(r"\b(?:in|during|for|of) (\d{4})\b")),
+)
+BARE_PERIOD = re.compile(rf"\b({_MONTHS}|\d{{4}})\b")
+
+
+class Period(BaseModel):
+    """An inclusive range of ``YYYY-MM`` months, open where None."""
+
+    start: str | None = None
+    end: str | None = None
+    label: str = "overall"
+
+
+class FastPathAnswer(BaseModel):
+    """A question answered from a SQL template."""
+
+    intent: str
+    sql: str
+    params: dict
+    answer: str
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, strip accents and punctuation and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", question.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9&'*. -]+", " ", stripped).replace(".", " ").split())
+
+
+def shift_month(year: int, month: int, delta: int) -> tuple[int, int]:
+    """Move a month forwards or backwards by ``delta`` months."""
+    index = year * 12 + month - 1 + delta
+    return index // 12, index % 12 + 1
+
+
+def month_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def month_label(key: str) -> str:
+    year, month = key.split("-")
+    return f"{calendar.month_name[int(month)]} {year}"
+
+
+def parse_period(question: str, today: date) -> tuple[Period | None, str]:
+    """Find the period a normalized question refers to.
+
+    Supports "this/last month", "this/last year", "the last N months", "in
+    March" (the most recent March), "in March 2024" and "in 2024".
+
+    Returns:
+        The period, open-ended when none is mentioned, and the question
+        with the period phrase removed. The period is None when the
+        question mentions a second period ("in March last year", "this year
+        than last year") or another month or year, which one range cannot
+        answer.
+    """
+    current = (today.year, today.month)
+    for kind, pattern in PERIOD_PATTERNS:
+        match = pattern.search(question)
+        if match is None:
+            continue
+        rest = " ".join((question[: match.start()] + question[match.end() :]).split())
+        if BARE_PERIOD.search(rest) or any(other.search(rest) for _, other in PERIOD_PATTERNS):
+            return None, rest
+        if kind == "last_n_months":
+            count = max(int(match.group(1)), 1)
+            start = month_key(*shift_month(*current, -(count - 1)))
+            period = Period(
+                start=start, end=month_key(*current), label=f"in the last {count} months"
+            )
+        elif kind == "last_month":
+            key = month_key(*shift_month(*current, -1))
+            period = Period(start=key, end=key, label="last month")
+        elif kind == "this_month":
+            key = month_key(*current)
+            period = Period(start=key, end=key, label="this month")
+        elif kind == "last_year":
+            year = today.year - 1
+            period = Period(start=f"{year}-01", end=f"{year}-12", label="last year")
+        elif kind == "this_year":
+            period = Period(start=f"{today.year}-01", end=month_key(*current), label="this year")
+        elif kind == "month":
+            month = MONTH_NUMBERS[match.group(1)]
+            year = int(match.group(2)) if match.group(2) else today.year
+            if not match.group(2) and month > today.month:
+                year -= 1
+            key = month_key(year, month)
+            period = Period(start=key, end=key, label=f"in {month_label(key)}")
+        else:
+            year = int(match.group(1))
+            period = Period(start=f"{year}-01", end=f"{year}-12", label=f"in {year}")
+        return period, rest
+    if BARE_PERIOD.search(question):
+        return None, question
+    return Period(), question
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+class FastPathRouter:
+    """Answers a catalogue of common question shapes without the LLM.
+
+    Recognized shapes are totals and monthly averages of spending or
+    income (overall, per category or per merchant), top-N merchants, a
+    breakdown by category and month-over-month change, each over an
+    optional period. They are answered from parameterized SQL on the
+    rollup tables with a templated sentence, and only when the shape, the
+    period and the subject account for the whole question. Anything else
+    returns None and goes to the agent: several categories or periods, an
+    unknown merchant or subject, comparisons other than month over month,
+    and ranges or exclusions the templates cannot express ("since",
+    "before", "not counting").
+
+    ``record`` collects latency per path (the intent name or ``"agent"``).
+    """
+
+    def __init__(self, db_engine=None, today: Callable[[], date] = date.today) -> None:
+        self.engine = db_engine or engine
+        self.today = today
+        self.hits = 0
+        self.misses = 0
+        self.intents: Counter[str] = Counter()
+        self._latency: dict[str, tuple[int, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def answer(self, question: str) -> FastPathAnswer | None:
+        """Answer a question from a SQL template, or return None to use the agent."""
+        result = self._route(normalize_question(question))
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.intents[result.intent] += 1
+        return result
+
+    def record(self, path: str, seconds: float) -> None:
+        """Record how long a question took on a path."""
+        with self._lock:
+            count, total, peak = self._latency.get(path, (0, 0.0, 0.0))
+            self._latency[path] = (count + 1, total + seconds, max(peak, seconds))
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, hits per intent and latency per path in milliseconds."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "intents": dict(self.intents),
+                "latency": {
+                    path: {
+                        "count": count,
+                        "mean_ms": total_seconds / count * 1000,
+                        "max_ms": peak * 1000,
+                    }
+                    for path, (count, total_seconds, peak) in self._latency.items()
+                },
+            }
+
+    def _route(self, question: str) -> FastPathAnswer | None:
+        if not question or FALLBACK.search(question):
+            return None
+        month_over_month = bool(MONTH_OVER_MONTH.search(question)) and "month" in question
+        if COMPARISON.search(question) and not month_over_month:
+            return None
+        period, rest = parse_period(question, self.today())
+        if period is None:
+            return None
+        income = bool(INCOME.search(rest)) and not SPEND.search(rest)
+        if not (SPEND.search(rest) or INCOME.search(rest) or TOP_MERCHANTS.search(rest)):
+            if not CATEGORY_BREAKDOWN.search(rest):
+                return None
+
+        with self.engine.connect() as conn:
+            if month_over_month:
+                return self._month_over_month(conn, question, period)
+            if match := TOP_MERCHANTS.search(rest):
+                return self._top_merchants(conn, rest, period, int(match.group("n") or 5))
+            if CATEGORY_BREAKDOWN.search(rest):
+                return self._category_breakdown(conn, period, income)
+            if AVERAGE.search(rest):
+                return self._total(conn, rest, period, income, average=True)
+            if TOTAL.search(rest):
+                return self._total(conn, rest, period, income, average=False)
+        return None
+
+    def _category(self, conn: Connection, question: str) -> tuple[str | None, bool]:
+        """Find the one known category a question names.
+
+        Returns:
+            The category, and False when several categories are named.
+        """
+        categories = conn.execute(
+            text("SELECT DISTINCT category FROM monthly_category_totals")
+        ).scalars()
+        named = [
+            category
+            for category in categories
+            if re.search(rf"\b{re.escape(normalize_question(category))}\b", question)
+        ]
+        if len(named) > 1:
+            return None, False
+        return (named[0] if named else None), True
+
+    def _merchant(self, conn: Connection, question: str) -> tuple[list[str] | None, bool]:
+        """Find the merchant a question names after "at", "on", "from" or "with".
+
+        The name is compared with the normalized merchant keys used by the
+        merchant memo, matching a key exactly or as its leading words
+        ("uber" matches "uber trip"), so a short or common word does not
+        pick up unrelated merchants.
+
+        Returns:
+            The stored spellings of the merchant, and False when the named
+            merchant is not in the data or matches several merchants.
+        """
+        match = MERCHANT_PHRASE.search(question)
+        if match is None or match.group("name").strip() in IGNORED_SUBJECTS:
+            return None, True
+        name = normalize_merchant(match.group("name"))
+        if not name:
+            return None, False
+        spellings: dict[str, list[str]] = {}
+        for merchant in conn.execute(
+            text("SELECT DISTINCT merchant FROM monthly_merchant_totals")
+        ).scalars():
+            key = normalize_merchant(merchant)
+            if key == name or key.startswith(f"{name} "):
+                spellings.setdefault(key, []).append(merchant)
+        if len(spellings) != 1:
+            return None, False
+        return sorted(next(iter(spellings.values()))), True
+
+    def _where(self, period: Period, **filters) -> tuple[str, dict]:
+        clauses = ["1 = 1"]
+        params: dict = {}
+        if period.start:
+            clauses.append("month >= :start")
+            params["start"] = period.start
+        if period.end:
+            clauses.append("month <= :end")
+            params["end"] = period.end
+        if filters.get("category"):
+            clauses.append("category = :category")
+            params["category"] = filters["category"]
+        if filters.get("merchants"):
+            names = [f":merchant_{i}" for i in range(len(filters["merchants"]))]
+            clauses.append(f"merchant IN ({', '.join(names)})")
+            params.update(
+                (f"merchant_{i}", merchant) for i, merchant in enumerate(filters["merchants"])
+            )
+        return " AND ".join(clauses), params
+
+    def _total(
+        self, conn: Connection, question: str, period: Period, income: bool, average: bool
+    ) -> FastPathAnswer | None:
+        category, single = self._category(conn, question)
+        if not single:
+            return None
+        merchants = None
+        subject = question
+        if category is None:
+            merchants, known = self._merchant(conn, question)
+            if not known:
+                return None
+            if merchants:
+                subject = MERCHANT_PHRASE.sub("", question)
+        else:
+            subject = re.sub(rf"\b{re.escape(normalize_question(category))}\b", "", question)
+        if set(subject.split()) - TOTAL_WORDS:
+            return None
+
+        table = "monthly_merchant_totals" if merchants else "monthly_category_totals"
+        measure = "SUM(income)" if income else "-SUM(expenses)"
+        where, params = self._where(period, category=category, merchants=merchants)
+        if average:
+            sql = (
+                f"SELECT COALESCE(AVG(amount), 0), COUNT(*) FROM (SELECT month, {measure} AS amount "
+                f"FROM {table} WHERE {where} GROUP BY month)"
+            )
+        else:
+            sql = f"SELECT COALESCE({measure}, 0), COUNT(DISTINCT month) FROM {table} WHERE {where}"
+        amount, months = conn.execute(text(sql), params).one()
+
+        verb = "earned" if income else "spent"
+        subject = ""
+        if category:
+            subject = f" from {category}" if income else f" on {category}"
+        elif merchants:
+            subject = f" at {merchants[0]}"
+        if average:
+            answer = (
+                f"On average you {verb} {_money(amount)} per month{subject} {period.label} "
+                f"({months} months with transactions)."
+            )
+        else:
+            answer = f"You {verb} {_money(amount)}{subject} {period.label}."
+        return FastPathAnswer(
+            intent="average" if average else "total", sql=sql, params=params, answer=answer
+        )
+
+    def _top_merchants(
+        self, conn: Connection, question: str, period: Period, limit: int
+    ) -> FastPathAnswer | None:
+        category, single = self._category(conn, question)
+        if not single:
+            return None
+        where, params = self._where(period, category=category)
+        params["limit"] = min(limit, 50)
+        sql = (
+            "SELECT merchant, -SUM(expenses) AS spent FROM monthly_merchant_totals "
+            f"WHERE {where} GROUP BY merchant HAVING spent > 0 ORDER BY spent DESC LIMIT :limit"
+        )
+        rows = conn.execute(text(sql), params).all()
+        subject = f" on {category}" if category else ""
+        if not rows:
+            answer = f"There is no spending{subject} {period.label}."
+        else:
+            lines = [
+                f"{i}. {merchant}: {_money(spent)}" for i, (merchant, spent) in enumerate(rows, 1)
+            ]
+            answer = f"Top merchants by spending{subject} {period.label}:\n" + "\n".join(lines)
+        return FastPathAnswer(intent="top_merchants", sql=sql, params=params, answer=answer)
+
+    def _category_breakdown(self, conn: Connection, period: Period, income: bool) -> FastPathAnswer:
+        measure = "SUM(income)" if income else "-SUM(expenses)"
+        where, params = self._where(period)
+        sql = (
+            f"SELECT category, {measure} AS amount FROM monthly_category_totals "
+            f"WHERE {where} GROUP BY category HAVING amount > 0 ORDER BY amount DESC"
+        )
+        rows = conn.execute(text(sql), params).all()
+        kind = "Income" if income else "Spending"
+        if not rows:
+            answer = f"There is no {kind.lower()} {period.label}."
+        else:
+            lines = [f"- {category}: {_money(amount)}" for category, amount in rows]
+            answer = f"{kind} by category {period.label}:\n" + "\n".join(lines)
+        return FastPathAnswer(intent="category_breakdown", sql=sql, params=params, answer=answer)
+
+    def _month_over_month(
+        self, conn: Connection, question: str, period: Period
+    ) -> FastPathAnswer | None:
+        category, single = self._category(conn, question)
+        if not single:
+            return None
+        if re.search(
+            r"\b(from|since|than|to|with|vs|versus) (the )?(last|previous) month\b", question
+        ):
+            base = month_key(self.today().year, self.today().month)
+        elif period.end:
+            base = period.end
+        else:
+            base = conn.execute(text("SELECT MAX(month) FROM monthly_category_totals")).scalar()
+            if base is None:
+                return None
+        previous = month_key(*shift_month(*map(int, base.split("-")), -1))
+
+        where, params = self._where(Period(start=previous, end=base), category=category)
+        sql = (
+            "SELECT month, -SUM(expenses) FROM monthly_category_totals "
+            f"WHERE {where} GROUP BY month"
+        )
+        spent = dict(conn.execute(text(sql), params).all())
+        current_amount, previous_amount = spent.get(base, 0.0), spent.get(previous, 0.0)
+
+        subject = f" on {category}" if category else ""
+        answer = f"You spent {_money(current_amount)}{subject} in {month_label(base)}"
+        if previous_amount:
+            change = current_amount - previous_amount
+            direction = "up" if change >= 0 else "down"
+            answer += (
+                f", {direction} {abs(change) / previous_amount:.1%} ({change:+,.2f}) from "
+                f"{_money(previous_amount)} in {month_label(previous)}."
+            )
+        else:
+            answer += f", with no spending{subject} in {month_label(previous)}."
+        return FastPathAnswer(intent="month_over_month", sql=sql, params=params, answer=answer)
@@ -0,0 +1,99 @@
+"""Persistent conversation state for chat threads."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict, trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
+
+
+class ChatThreadStore:
+    """Message history of chat threads stored in a SQLite file, with TTL expiry.
+
+    A thread holds the agent's whole conversation state: the questions,
+    the SQL it ran with the rows it got back, and its answers. A follow-up
+    question is answered with that state in context, so the agent can reuse
+    earlier results instead of querying again. On save, the history is
+    trimmed to the most recent turns fitting in ``max_tokens`` (approximate
+    count), always starting on a user message so no tool result is kept
+    without its call. Threads expire ``ttl_seconds`` after their last
+    message.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_tokens: int = 4000) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_tokens = max_tokens
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_threads (thread_id TEXT PRIMARY KEY, "
+                "messages TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, thread_id: str) -> list[BaseMessage]:
+        """Return a thread's messages, or an empty list if it is unknown or expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT messages FROM chat_threads WHERE thread_id = ? AND expires_at > ?",
+                (thread_id, time.time()),
+            ).fetchone()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return []
+            self.hits += 1
+        return messages_from_dict(json.loads(row[0]))
+
+    def trim(self, messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+        """Keep the most recent whole turns fitting in ``max_tokens``."""
+        return trim_messages(
+            messages,
+            max_tokens=self.max_tokens,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+        )
+
+    def save(self, thread_id: str, messages: Sequence[BaseMessage]) -> None:
+        """Store a thread's trimmed messages, renewing its TTL and purging expired threads."""
+        now = time.time()
+        payload = json.dumps([message_to_dict(m) for m in self.trim(messages)], default=str)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chat_threads (thread_id, messages, expires_at) "
+                "VALUES (?, ?, ?)",
+                (thread_id, payload, now + self.ttl_seconds),
+            )
+            conn.execute("DELETE FROM chat_threads WHERE expires_at <= ?", (now,))
+
+    def stats(self) -> dict:
+        """Return hit/miss counters of thread loads and the number of stored threads."""
+        with self._connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM chat_threads").fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": size,
+            }
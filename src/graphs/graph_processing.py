@@ -4,29 +4,48 @@ from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
 from src.graphs.nodes import (
+    CompanySearch,
+    MerchantCategoryMemo,
+    NgramCategoryClassifier,
     build_categorizer_node,
+    build_company_search,
     build_extractor_node,
-    saver_node,
+    build_saver_node,
 )
 from src.graphs.state import ProcessingState
 
 
-def build_processing_graph(ocr_client) -> CompiledStateGraph:
+def build_processing_graph(
+    ocr_client,
+    merchant_memo: MerchantCategoryMemo | None = None,
+    company_search: CompanySearch | None = None,
+    category_classifier: NgramCategoryClassifier | None = None,
+) -> CompiledStateGraph:
     """Build and compile the statement processing graph.
 
     The graph has three nodes:
     1. extractor_node: An agent that loads files and extracts transactions
-    2. categorizer_node: An agent that categorizes transactions using web search
+    2. categorizer_node: Categorizes transactions from the merchant memo and the
+       local classifier, falling back to an agent with web search for the rest
     3. saver_node: Saves extracted transactions to the database
 
     Args:
         ocr_client: The OCR client for PDF processing.
+        merchant_memo: Memo shared by the categorizer and saver nodes. A new
+            one backed by the default database is created if omitted.
+        company_search: Cached search used by the categorizer agent. One is
+            built from the settings if omitted.
+        category_classifier: Local classifier shared by the categorizer and
+            saver nodes. Every memo miss goes to the agent if omitted.
 
     Returns:
         Compiled LangGraph ready for invocation.
     """
+    merchant_memo = merchant_memo or MerchantCategoryMemo()
+    company_search = company_search or build_company_search()
     extractor_node = build_extractor_node(ocr_client)
-    categorizer_node = build_categorizer_node()
+    categorizer_node = build_categorizer_node(merchant_memo, company_search, category_classifier)
+    saver_node = build_saver_node(merchant_memo, category_classifier)
 
     graph_builder = StateGraph(ProcessingState)
 
@@ -1,16 +1,24 @@
 """Graph node functions."""
 
 from src.graphs.nodes.categorizer_node import (
+    CompanySearch,
+    MerchantCategoryMemo,
+    NgramCategoryClassifier,
     build_categorizer_agent,
     build_categorizer_node,
+    build_company_search,
 )
 from src.graphs.nodes.extractor_node import build_extractor_agent, build_extractor_node
-from src.graphs.nodes.node_saver import saver_node
+from src.graphs.nodes.node_saver import build_saver_node
 
 __all__ = [
+    "CompanySearch",
+    "MerchantCategoryMemo",
+    "NgramCategoryClassifier",
     "build_categorizer_agent",
     "build_categorizer_node",
+    "build_company_search",
     "build_extractor_agent",
     "build_extractor_node",
-    "saver_node",
+    "build_saver_node",
 ]
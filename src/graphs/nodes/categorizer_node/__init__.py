@@ -4,5 +4,27 @@ from src.graphs.nodes.categorizer_node.agent import (
     build_categorizer_agent,
     build_categorizer_node,
 )
+from src.graphs.nodes.categorizer_node.classifier import NgramCategoryClassifier
+from src.graphs.nodes.categorizer_node.memo import MerchantCategoryMemo, normalize_merchant
+from src.graphs.nodes.categorizer_node.search import (
+    CompanySearch,
+    FakeSearchBackend,
+    SearchCache,
+    TavilySearchBackend,
+    build_company_search,
+)
+from src.graphs.nodes.categorizer_node.tools import create_categorizer_tools
 
-__all__ = ["build_categorizer_agent", "build_categorizer_node"]
+__all__ = [
+    "CompanySearch",
+    "FakeSearchBackend",
+    "MerchantCategoryMemo",
+    "NgramCategoryClassifier",
+    "SearchCache",
+    "TavilySearchBackend",
+    "build_company_search",
+    "create_categorizer_tools",
+    "build_categorizer_agent",
+    "build_categorizer_node",
+    "normalize_merchant",
+]
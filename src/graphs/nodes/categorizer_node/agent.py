@@ -1,84 +1,172 @@
 """Categorizer agent using LangChain's create_agent with ToolStrategy."""
 
+import asyncio
+
 from langchain.agents import create_agent
 from langchain.agents.structured_output import ToolStrategy
 
+from src.graphs.nodes.categorizer_node.classifier import NgramCategoryClassifier
+from src.graphs.nodes.categorizer_node.memo import MerchantCategoryMemo
 from src.graphs.nodes.categorizer_node.prompts import CATEGORIZER_AGENT_SYSTEM_PROMPT
+from src.graphs.nodes.categorizer_node.search import CompanySearch
 from src.graphs.nodes.categorizer_node.tools import create_categorizer_tools
 from src.graphs.state import ProcessingState
 from src.llm import get_llm
-from src.models import Transaction, TransactionList
+from src.models import CategoryChanges, Transaction
+
+CATEGORIZER_TABLE_HEADER = "id\tdate\tmerchant\tdescription\tamount\tcategory"
+
+
+def _cell(value: str) -> str:
+    return " ".join(value.split())
+
+
+def format_transaction_table(transactions: list[Transaction]) -> str:
+    """Render transactions as a compact tab-separated table keyed by position.
+
+    The description is left empty when it repeats the merchant.
+    """
+    rows = [CATEGORIZER_TABLE_HEADER]
+    for index, txn in enumerate(transactions):
+        description = "" if txn.description == txn.merchant else _cell(txn.description)
+        rows.append(
+            f"{index}\t{txn.transaction_date}\t{_cell(txn.merchant)}\t{description}"
+            f"\t{txn.amount:.2f}\t{txn.category}"
+        )
+    return "\n".join(rows)
+
 
+def apply_category_changes(
+    transactions: list[Transaction], changes: CategoryChanges
+) -> list[Transaction]:
+    """Apply ``{id: category}`` changes to the transactions they refer to.
 
-def build_categorizer_agent():
+    Ids outside the table are ignored, and transactions without a change
+    keep their category, so a dropped or reordered row cannot shift the
+    others.
+    """
+    updates = {
+        change.id: change.category
+        for change in changes.changes
+        if 0 <= change.id < len(transactions)
+    }
+    return [
+        txn.model_copy(update={"category": updates[index]}) if index in updates else txn
+        for index, txn in enumerate(transactions)
+    ]
+
+
+def build_categorizer_agent(company_search: CompanySearch):
     """Create a categorizer agent for improving transaction categories.
 
+    Args:
+        company_search: Search front-end backing the search_company tool.
+
     Returns:
         A compiled agent graph for categorizing transactions.
     """
     llm = get_llm()
-    tools = create_categorizer_tools()
+    tools = create_categorizer_tools(company_search)
 
     return create_agent(
         llm,
         tools,
         system_prompt=CATEGORIZER_AGENT_SYSTEM_PROMPT,
-        response_format=ToolStrategy(TransactionList),
+        response_format=ToolStrategy(CategoryChanges),
     )
 
 
-def build_categorizer_node():
+def build_categorizer_node(
+    merchant_memo: MerchantCategoryMemo,
+    company_search: CompanySearch,
+    category_classifier: NgramCategoryClassifier | None = None,
+):
     """Create a categorizer node function that uses the categorizer agent.
 
+    Args:
+        merchant_memo: Memo of confirmed merchant categories consulted
+            before the agent runs.
+        company_search: Search front-end backing the search_company tool.
+        category_classifier: Optional local classifier consulted for memo
+            misses; only rows it is not confident about reach the agent.
+
     Returns:
         An async function that can be used as a LangGraph node.
     """
-    agent = build_categorizer_agent()
-
-    async def categorizer_node(state: ProcessingState) -> dict:
-        """Categorize transactions using the categorizer agent.
-
-        The agent will:
-        1. Review each transaction's category
-        2. Search for company information when needed
-        3. Return updated transactions with improved categories
-        """
-        transactions = state["transactions"]
-
-        transaction_text = "\n".join(
-            f"- {t.transaction_date}: {t.merchant} - {t.description} "
-            f"(${t.amount:.2f}) [Current category: {t.category}]"
-            for t in transactions
-        )
+    agent = build_categorizer_agent(company_search)
 
+    async def categorize_with_agent(transactions: list[Transaction]) -> list[Transaction] | None:
         result = await agent.ainvoke(
             {
                 "messages": [
-                    ("user", f"Review and categorize these transactions:\n\n{transaction_text}")
+                    (
+                        "user",
+                        "Review and categorize these transactions:\n\n"
+                        + format_transaction_table(transactions),
+                    )
                 ]
             }
         )
 
         structured_response = result.get("structured_response")
         if structured_response is None:
-            return {"status": "categorized"}
-
-        categorized_transactions = []
-        for i, txn in enumerate(structured_response.transactions):
-            source_file = transactions[i].source_file if i < len(transactions) else "uploaded"
-            categorized_transactions.append(
-                Transaction(
-                    transaction_date=txn.transaction_date,
-                    merchant=txn.merchant,
-                    description=txn.description,
-                    amount=txn.amount,
-                    category=txn.category,
-                    source_file=source_file,
-                )
+            return None
+        return apply_category_changes(transactions, structured_response)
+
+    async def categorizer_node(state: ProcessingState) -> dict:
+        """Categorize transactions using the merchant memo, the local classifier and the agent.
+
+        Merchants with a confirmed category are categorized from the memo,
+        then rows resembling labelled history get the local classifier's
+        category; only the remaining transactions go to the agent, which will:
+        1. Review each transaction's category
+        2. Search for company information when needed
+        3. Return only the category changes, applied here by row id
+        """
+        transactions = state["transactions"]
+
+        known = await asyncio.to_thread(
+            merchant_memo.lookup_many, [t.merchant for t in transactions]
+        )
+        resolved = {
+            index: known[txn.merchant]
+            for index, txn in enumerate(transactions)
+            if txn.merchant in known
+        }
+        pending = [index for index in range(len(transactions)) if index not in resolved]
+
+        if category_classifier is not None and pending:
+            predictions = await asyncio.to_thread(
+                category_classifier.predict_many,
+                [(transactions[i].merchant, transactions[i].description) for i in pending],
             )
+            resolved.update(
+                (index, category)
+                for index, category in zip(pending, predictions)
+                if category is not None
+            )
+            pending = [index for index in pending if index not in resolved]
+
+        sources = {index: "memo" for index, txn in enumerate(transactions) if txn.merchant in known}
+        sources.update((index, "classifier") for index in resolved if index not in sources)
+
+        unknown = [transactions[index] for index in pending]
+        categorized = await categorize_with_agent(unknown) if unknown else []
+        if categorized is None:
+            categorized = unknown
+            sources.update((index, "extraction") for index in pending)
+        agent_results = iter(categorized)
+
+        merged = [
+            txn.model_copy(update={"category": resolved[index]})
+            if index in resolved
+            else next(agent_results)
+            for index, txn in enumerate(transactions)
+        ]
 
         return {
-            "transactions": categorized_transactions,
+            "transactions": merged,
+            "category_sources": [sources.get(index, "agent") for index in range(len(merged))],
             "status": "categorized",
         }
 
@@ -0,0 +1,252 @@
+"""Local character n-gram classifier consulted between the memo and the categorizer agent."""
+
+import math
+import threading
+import zlib
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Iterable
+
+import numpy as np
+
+from src.database import get_labeled_merchants
+from src.graphs.nodes.categorizer_node.memo import UNCONFIRMED_CATEGORY, normalize_merchant
+
+NGRAM_SIZES = (3, 4)
+FEATURE_BITS = 20
+DESCRIPTION_WEIGHT = 0.5
+
+ExampleKey = tuple[str, str]
+
+
+def example_key(merchant: str, description: str) -> ExampleKey:
+    """Normalize a transaction's merchant and description into a training key.
+
+    The description is dropped when it normalizes to the merchant, which
+    is how most extracted rows look.
+    """
+    merchant_key = normalize_merchant(merchant)
+    description_key = normalize_merchant(description)
+    return merchant_key, "" if description_key == merchant_key else description_key
+
+
+def ngram_features(key: ExampleKey) -> dict[int, float]:
+    """Hash the character n-grams of a key into an L2-normalized sparse vector.
+
+    Grams are taken from each word-padded text, so ``"pag ifood"`` and
+    ``"ifood"`` share every gram of the shorter one. Description grams
+    weigh ``DESCRIPTION_WEIGHT`` of the merchant's.
+
+    Returns:
+        Mapping of hashed feature index to weight.
+    """
+    mask = (1 << FEATURE_BITS) - 1
+    weights: dict[int, float] = defaultdict(float)
+    for text, weight in zip(key, (1.0, DESCRIPTION_WEIGHT)):
+        if not text:
+            continue
+        padded = f" {text} "
+        for size in NGRAM_SIZES:
+            for start in range(len(padded) - size + 1):
+                gram = padded[start : start + size].encode()
+                weights[zlib.crc32(gram) & mask] += weight
+
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {feature: w / norm for feature, w in weights.items()} if norm else {}
+
+
+class NgramCategoryClassifier:
+    """Nearest-neighbour category classifier over hashed character n-grams.
+
+    Every distinct normalized merchant/description pair seen with a
+    confirmed category is an example, labelled with its most frequent
+    category. A query is scored by cosine similarity against all examples
+    through an inverted index, and the ``neighbors`` most similar ones vote
+    weighted by similarity. The confidence is the winner's share of the
+    vote times its best similarity, so only rows resembling consistently
+    labelled history clear ``threshold``; the rest go to the agent.
+
+    ``update`` adds examples after each ingestion and the index is rebuilt
+    lazily on the next prediction. Hit and miss counts are per transaction,
+    so ``hit_rate`` is the share of memo misses that skipped the agent.
+    """
+
+    def __init__(
+        self,
+        db_engine=None,
+        threshold: float = 0.6,
+        neighbors: int = 5,
+        max_examples: int = 50_000,
+    ) -> None:
+        self.db_engine = db_engine
+        self.threshold = threshold
+        self.neighbors = neighbors
+        self.max_examples = max_examples
+        self.hits = 0
+        self.misses = 0
+        self._examples: OrderedDict[ExampleKey, Counter[str]] = OrderedDict()
+        self._vectors: dict[ExampleKey, dict[int, float]] = {}
+        self._index: tuple | None = None
+        self._lock = threading.Lock()
+
+    def train(self) -> None:
+        """Replace the examples with the labelled history of the ``transactions`` table.
+
+        Only categories the agent reviewed are learned, like in ``update``:
+        rows categorized by the memo or by the classifier itself would
+        otherwise confirm their own predictions on every startup.
+        """
+        rows = get_labeled_merchants(
+            limit=self.max_examples,
+            exclude_category=UNCONFIRMED_CATEGORY,
+            category_source="agent",
+            db_engine=self.db_engine,
+        )
+        with self._lock:
+            self._examples.clear()
+            self._vectors.clear()
+        # Least frequent first, so they are the first evicted past max_examples.
+        self._add(reversed(rows))
+
+    def update(self, transactions: Iterable[tuple[str, str, str]]) -> None:
+        """Learn from newly confirmed transactions.
+
+        ``"Other"`` is not a confirmation and is ignored.
+
+        Args:
+            transactions: ``(merchant, description, category)`` tuples.
+        """
+        self._add(
+            (merchant, description, category, 1) for merchant, description, category in transactions
+        )
+
+    def predict(self, merchant: str, description: str = "") -> tuple[str, float] | None:
+        """Return the most likely category and its confidence, or None without neighbours."""
+        index = self._current_index()
+        if index is None:
+            return None
+        return self._score(index, ngram_features(example_key(merchant, description)))
+
+    def predict_many(self, transactions: list[tuple[str, str]]) -> list[str | None]:
+        """Categorize transactions whose confidence clears the threshold.
+
+        Args:
+            transactions: ``(merchant, description)`` pairs.
+
+        Returns:
+            The predicted category per transaction, or None where it is
+            not confident enough.
+        """
+        index = self._current_index()
+        predictions: list[str | None] = []
+        for merchant, description in transactions:
+            scored = (
+                self._score(index, ngram_features(example_key(merchant, description)))
+                if index is not None
+                else None
+            )
+            predictions.append(scored[0] if scored and scored[1] >= self.threshold else None)
+
+        with self._lock:
+            hits = sum(1 for category in predictions if category is not None)
+            self.hits += hits
+            self.misses += len(predictions) - hits
+        return predictions
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of training examples."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._examples),
+            }
+
+    def _add(self, examples: Iterable[tuple[str, str, str, int]]) -> None:
+        with self._lock:
+            for merchant, description, category, count in examples:
+                if category == UNCONFIRMED_CATEGORY:
+                    continue
+                key = example_key(merchant, description)
+                if not key[0]:
+                    continue
+                if key not in self._examples:
+                    self._examples[key] = Counter()
+                    self._vectors[key] = ngram_features(key)
+                self._examples[key][category] += count
+                self._examples.move_to_end(key)
+            while len(self._examples) > self.max_examples:
+                evicted, _ = self._examples.popitem(last=False)
+                del self._vectors[evicted]
+            self._index = None
+
+    def _current_index(self) -> tuple | None:
+        """Return the inverted index, rebuilding it if examples changed since."""
+        with self._lock:
+            if self._index is None and self._examples:
+                self._index = self._build_index()
+            return self._index
+
+    def _build_index(self) -> tuple:
+        keys = list(self._examples)
+        categories = sorted({counts.most_common(1)[0][0] for counts in self._examples.values()})
+        category_ids = {category: i for i, category in enumerate(categories)}
+        labels = np.array(
+            [category_ids[self._examples[key].most_common(1)[0][0]] for key in keys],
+            dtype=np.intp,
+        )
+
+        rows: list[int] = []
+        features: list[int] = []
+        values: list[float] = []
+        for row, key in enumerate(keys):
+            vector = self._vectors[key]
+            rows.extend([row] * len(vector))
+            features.extend(vector)
+            values.extend(vector.values())
+
+        feature_array = np.array(features, dtype=np.int64)
+        order = np.argsort(feature_array, kind="stable")
+        unique, starts, counts = np.unique(
+            feature_array[order], return_index=True, return_counts=True
+        )
+        postings = {
+            int(feature): (int(start), int(start + count))
+            for feature, start, count in zip(unique, starts, counts)
+        }
+        return (
+            postings,
+            np.array(rows, dtype=np.intp)[order],
+            np.array(values, dtype=np.float64)[order],
+            labels,
+            categories,
+        )
+
+    def _score(self, index: tuple, vector: dict[int, float]) -> tuple[str, float] | None:
+        postings, rows, values, labels, categories = index
+        matched_rows = []
+        matched_weights = []
+        for feature, weight in vector.items():
+            span = postings.get(feature)
+            if span is not None:
+                matched_rows.append(rows[span[0] : span[1]])
+                matched_weights.append(values[span[0] : span[1]] * weight)
+        if not matched_rows:
+            return None
+
+        similarities = np.bincount(
+            np.concatenate(matched_rows),
+            weights=np.concatenate(matched_weights),
+            minlength=len(labels),
+        )
+        k = min(self.neighbors, len(similarities))
+        nearest = np.argpartition(similarities, -k)[-k:]
+        nearest = nearest[similarities[nearest] > 0]
+        votes = np.bincount(
+            labels[nearest], weights=similarities[nearest], minlength=len(categories)
+        )
+        best = int(votes.argmax())
+        best_similarity = similarities[nearest][labels[nearest] == best].max()
+        confidence = votes[best] / votes.sum() * min(best_similarity, 1.0)
+        return categories[best], float(confidence)
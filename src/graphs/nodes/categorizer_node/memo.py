@@ -0,0 +1,154 @@
+"""Persistent merchant-to-category memo consulted before the categorizer agent."""
+
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from src.database import get_merchant_categories, save_merchant_categories
+
+UNCONFIRMED_CATEGORY = "Other"
+
+STATE_CODES = set(
+    "ac al am ap ba ce df es go ma mg ms mt pa pb pe pi pr rj rn ro rr rs sc se sp to".split()
+)
+COUNTRY_CODES = {"br", "bra", "brasil", "brazil"}
+CITY_SUFFIXES = (
+    "sao paulo",
+    "rio de janeiro",
+    "belo horizonte",
+    "porto alegre",
+    "curitiba",
+    "brasilia",
+    "salvador",
+    "recife",
+    "fortaleza",
+    "campinas",
+    "florianopolis",
+    "goiania",
+    "osasco",
+    "barueri",
+)
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_STORE_NUMBER = re.compile(r"\b\w*\d\w*\b")
+
+
+def normalize_merchant(merchant: str) -> str:
+    """Reduce a merchant string to a stable lookup key.
+
+    Lowercases, strips accents and punctuation, drops tokens containing
+    digits (store numbers, card suffixes) and trailing city, state and
+    country names, e.g. ``"Padaria São João #123 - SAO PAULO BR"`` becomes
+    ``"padaria sao joao"``.
+    """
+    decomposed = unicodedata.normalize("NFKD", merchant.casefold())
+    text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    text = _NON_ALNUM.sub(" ", text)
+    text = _STORE_NUMBER.sub(" ", text)
+    tokens = text.split()
+
+    changed = True
+    while changed and len(tokens) > 1:
+        changed = False
+        if tokens[-1] in STATE_CODES or tokens[-1] in COUNTRY_CODES:
+            tokens.pop()
+            changed = True
+            continue
+        tail = " ".join(tokens)
+        for city in CITY_SUFFIXES:
+            city_tokens = city.split()
+            if tail.endswith(" " + city) and len(tokens) > len(city_tokens):
+                del tokens[-len(city_tokens) :]
+                changed = True
+                break
+
+    return " ".join(tokens)
+
+
+class MerchantCategoryMemo:
+    """Merchant category table fronted by an in-memory LRU.
+
+    Lookups hit the LRU first and fall back to the ``merchant_categories``
+    table in a single batched query. Hit and miss counts cover both layers,
+    so ``hit_rate`` is the share of transactions that skipped the agent.
+    """
+
+    def __init__(self, db_engine=None, max_size: int = 10_000) -> None:
+        self.db_engine = db_engine
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup_many(self, merchants: list[str]) -> dict[str, str]:
+        """Find known categories for merchants.
+
+        Args:
+            merchants: Raw merchant names.
+
+        Returns:
+            Mapping of the known raw merchant names to their category.
+        """
+        keys = {merchant: normalize_merchant(merchant) for merchant in merchants}
+
+        found: dict[str, str] = {}
+        with self._lock:
+            for key in set(keys.values()):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+
+        missing = [key for key in set(keys.values()) if key and key not in found]
+        if missing:
+            stored = get_merchant_categories(missing, self.db_engine)
+            self._remember(stored)
+            found.update(stored)
+
+        result = {merchant: found[key] for merchant, key in keys.items() if key in found}
+        with self._lock:
+            hits = sum(1 for merchant in merchants if merchant in result)
+            self.hits += hits
+            self.misses += len(merchants) - hits
+        return result
+
+    def record(self, categories: dict[str, str]) -> None:
+        """Store confirmed categories for merchants.
+
+        Only categories reviewed by the agent or the user are confirmations;
+        recording a category that came from the memo itself would bump its
+        ``confirmations`` without new evidence. ``"Other"`` is not a
+        confirmation and is ignored, so those merchants keep going to the
+        agent.
+
+        Args:
+            categories: Mapping of raw merchant names to their category.
+        """
+        normalized = {
+            normalize_merchant(merchant): category
+            for merchant, category in categories.items()
+            if category != UNCONFIRMED_CATEGORY
+        }
+        normalized.pop("", None)
+        save_merchant_categories(normalized, self.db_engine)
+        self._remember(normalized)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current LRU size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._cache),
+            }
+
+    def _remember(self, categories: dict[str, str]) -> None:
+        with self._lock:
+            for key, category in categories.items():
+                self._cache[key] = category
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
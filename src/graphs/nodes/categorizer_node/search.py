@@ -0,0 +1,193 @@
+"""Cached, coalesced and rate-limited company search for the categorizer agent."""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Protocol
+
+from langchain_tavily import TavilySearch
+
+from src.settings.config import settings
+
+
+class SearchBackend(Protocol):
+    """A web search provider."""
+
+    async def search(self, query: str) -> Any: ...
+
+
+class TavilySearchBackend:
+    """Search backend calling the Tavily API."""
+
+    def __init__(self, max_results: int = 3) -> None:
+        self.tool = TavilySearch(max_results=max_results)
+
+    async def search(self, query: str) -> Any:
+        return await self.tool.ainvoke({"query": query})
+
+
+class FakeSearchBackend:
+    """Offline search backend returning canned results, for tests and local runs."""
+
+    def __init__(self, results: dict[str, Any] | None = None, delay: float = 0.0) -> None:
+        self.results = results or {}
+        self.delay = delay
+        self.calls: list[str] = []
+
+    async def search(self, query: str) -> Any:
+        self.calls.append(query)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.results.get(query, {"query": query, "results": []})
+
+
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so equivalent queries share a cache entry."""
+    return " ".join(query.casefold().split())
+
+
+class SearchCache:
+    """On-disk TTL store for search results backed by a SQLite file."""
+
+    def __init__(self, path: str, ttl_seconds: float) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_results "
+                "(query TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, query: str) -> Any | None:
+        """Return the cached result for a normalized query, if not expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM search_results WHERE query = ? AND expires_at > ?",
+                (query, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, query: str, result: Any) -> None:
+        """Store a result for a normalized query and purge expired entries."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_results (query, result, expires_at) VALUES (?, ?, ?)",
+                (query, json.dumps(result, default=str), now + self.ttl_seconds),
+            )
+            conn.execute("DELETE FROM search_results WHERE expires_at <= ?", (now,))
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+
+
+class RateLimiter:
+    """Spaces calls evenly to stay under a number of calls per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until the next call is allowed."""
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+
+class CompanySearch:
+    """Search front-end adding a TTL cache, single-flight and a rate limit.
+
+    Identical in-flight queries, from the same statement or from concurrent
+    uploads, share one backend call. Results are cached on disk so repeated
+    lookups across days cost a local read.
+    """
+
+    def __init__(
+        self,
+        backend: SearchBackend,
+        cache: SearchCache | None = None,
+        rate_limit: float = 0.0,
+    ) -> None:
+        self.backend = backend
+        self.cache = cache
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def search(self, query: str) -> Any:
+        """Search for a query, serving cached or in-flight results when possible."""
+        key = normalize_query(query)
+
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, query: str) -> Any:
+        await self.rate_limiter.acquire()
+        result = await self.backend.search(query)
+        if self.cache is not None and not (isinstance(result, dict) and "error" in result):
+            await asyncio.to_thread(self.cache.set, key, result)
+        return result
+
+    def stats(self) -> dict:
+        """Return hit/miss/coalesced counters and the number of cached queries.
+
+        Counting the cached queries reads the SQLite cache, so async callers
+        should run this in a worker thread.
+        """
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+            "size": len(self.cache) if self.cache is not None else 0,
+        }
+
+
+def build_company_search() -> CompanySearch:
+    """Create the company search configured by the application settings."""
+    backend: SearchBackend
+    if settings.search_backend == "fake":
+        backend = FakeSearchBackend()
+    else:
+        backend = TavilySearchBackend()
+    cache = SearchCache(settings.search_cache_path, settings.search_cache_ttl_seconds)
+    return CompanySearch(backend, cache, rate_limit=settings.search_rate_limit)
@@ -1,22 +1,31 @@
 """Tools for the categorizer agent."""
 
-from langchain_tavily import TavilySearch
+from typing import Any
 
+from langchain_core.tools import tool
 
-def create_categorizer_tools() -> list:
+from src.graphs.nodes.categorizer_node.search import CompanySearch
+
+
+def create_categorizer_tools(company_search: CompanySearch) -> list:
     """Create tools for the categorizer agent.
 
+    Args:
+        company_search: Cached search front-end shared across uploads.
+
     Returns:
         List of tools for the categorizer agent.
     """
-    search_tool = TavilySearch(
-        name="search_company",
+
+    @tool(
+        "search_company",
         description=(
             "Search the internet for information about a company or merchant. "
             "Use this when you need to understand what a company does to categorize "
             "a transaction correctly. Input should be the company/merchant name."
         ),
-        max_results=3,
     )
+    async def search_company(query: str) -> Any:
+        return await company_search.search(query)
 
-    return [search_tool]
+    return [search_company]
@@ -1,16 +1,27 @@
 """Extractor agent using LangChain's create_agent with ToolStrategy."""
 
-from typing import Callable
+import asyncio
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable
 
 from langchain.agents import create_agent
 from langchain.agents.structured_output import ToolStrategy
+from langgraph.config import get_stream_writer
 
-from src.graphs.nodes.extractor_node.prompts import EXTRACTOR_AGENT_SYSTEM_PROMPT
+from src.graphs.nodes.extractor_node.chunking import LineChunker, merge_transaction_lists
+from src.graphs.nodes.extractor_node.prompts import (
+    EXTRACTOR_AGENT_SYSTEM_PROMPT,
+    EXTRACTOR_CHUNK_SYSTEM_PROMPT,
+)
 from src.graphs.nodes.extractor_node.tools import create_extractor_tools
 from src.graphs.state import ProcessingState
 from src.llm import get_llm
-from src.models import TransactionList
+from src.models import Transaction, TransactionList
+from src.parsers.csv_importer import import_csv
 from src.parsers.ocr_client import OCRClient
+from src.settings.config import settings
 
 
 def build_extractor_agent(ocr_client: OCRClient):
@@ -30,6 +41,30 @@ def build_extractor_agent(ocr_client: OCRClient):
     )
 
 
+def build_chunk_extractor_agent():
+    """Create a tool-less agent that extracts transactions from a text excerpt.
+
+    Returns:
+        A compiled agent graph for extracting transactions from one chunk.
+    """
+    llm = get_llm()
+
+    return create_agent(
+        llm,
+        [],
+        system_prompt=EXTRACTOR_CHUNK_SYSTEM_PROMPT,
+        response_format=ToolStrategy(TransactionList),
+    )
+
+
+def spill_to_disk(file: BinaryIO, suffix: str) -> str:
+    """Copy an open binary handle to a named temporary file and return its path."""
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        shutil.copyfileobj(file, tmp)
+    return tmp.name
+
+
 def build_extractor_node(ocr_client) -> Callable:
     """Create an extractor node function that uses the extractor agent.
 
@@ -37,20 +72,92 @@ def build_extractor_node(ocr_client) -> Callable:
         An async function that can be used as a LangGraph node.
     """
     agent = build_extractor_agent(ocr_client)
+    chunk_agent = build_chunk_extractor_agent()
+
+    async def extract_chunk(chunk: str, semaphore: asyncio.Semaphore) -> list[Transaction]:
+        async with semaphore:
+            result = await chunk_agent.ainvoke(
+                {"messages": [("user", f"Extract all transactions from this excerpt:\n\n{chunk}")]}
+            )
+
+        structured_response = result.get("structured_response")
+        if structured_response is None:
+            raise ValueError("Agent did not return structured transaction data")
+        return structured_response.transactions
+
+    async def extract_pdf(source: str | BinaryIO, file_name: str) -> list[Transaction]:
+        """OCR a PDF page by page, extracting each chunk as soon as its lines arrive.
+
+        Chunks are extracted concurrently while the OCR service is still
+        recognizing later pages, and the results are merged in document order.
+        An ``ocr_completed`` event is written to the graph stream once the
+        last page is recognized.
+        """
+        chunker = LineChunker(
+            max_tokens=settings.extraction_chunk_tokens,
+            overlap_lines=settings.extraction_chunk_overlap_lines,
+        )
+        semaphore = asyncio.Semaphore(settings.extraction_concurrency)
+        tasks: list[asyncio.Task] = []
+
+        def schedule(chunks: list[str]) -> None:
+            for chunk in chunks:
+                tasks.append(asyncio.create_task(extract_chunk(chunk, semaphore)))
+
+        pages = 0
+        try:
+            async for page in ocr_client.stream_pdf(source, file_name):
+                pages += 1
+                schedule(chunker.add(page.rows))
+            schedule(chunker.flush())
+            get_stream_writer()({"event": "ocr_completed", "pages": pages})
+            extracted = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return merge_transaction_lists(list(extracted))
+
+    async def run_agent(file_path: str) -> dict:
+        return await agent.ainvoke(
+            {"messages": [("user", f"Extract all transactions from the file at: {file_path}")]}
+        )
 
     async def extractor_node(state: ProcessingState) -> dict:
         """Extract transactions from file using the extractor agent.
 
-        The agent will:
+        CSV files in a known bank layout are imported deterministically and
+        PDFs are OCR'd page by page and extracted chunk by chunk in parallel
+        while later pages are still being recognized; anything
+        else goes to the agent, which will:
         1. Determine the file type and load the content
         2. Extract all transactions from the content
         3. Return structured transaction data
         """
-        file_path = state["file_path"]
-
-        result = await agent.ainvoke(
-            {"messages": [("user", f"Extract all transactions from the file at: {file_path}")]}
-        )
+        source = state.get("file") or state["file_path"]
+        file_name = state.get("file_name") or state["file_path"]
+        extension = Path(file_name).suffix.lower()
+
+        if extension == ".csv":
+            transactions = await asyncio.to_thread(import_csv, source)
+            if transactions is not None:
+                return {"transactions": transactions, "status": "extracted"}
+
+        if extension == ".pdf":
+            return {"transactions": await extract_pdf(source, file_name), "status": "extracted"}
+
+        # The agent's tools load files by path, so an in-memory upload is
+        # written out only on this fallback.
+        if isinstance(source, str):
+            result = await run_agent(source)
+        else:
+            spilled = await asyncio.to_thread(spill_to_disk, source, extension)
+            try:
+                result = await run_agent(spilled)
+            finally:
+                Path(spilled).unlink(missing_ok=True)
 
         structured_response = result.get("structured_response")
         if structured_response is None:
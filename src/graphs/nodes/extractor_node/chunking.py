@@ -0,0 +1,115 @@
+"""Splitting OCR output into token-bounded chunks and merging their extractions."""
+
+from src.models import Transaction
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of LLM tokens in a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class LineChunker:
+    """Incrementally groups lines into chunks that fit a token budget.
+
+    Lines can be fed as they arrive (e.g. one OCR page at a time) and each
+    chunk is returned as soon as it is complete, so extraction of the first
+    chunk can start before the rest of the document is available. Each
+    chunk after the first repeats the last ``overlap_lines`` lines of the
+    previous one unless the next line does not fit beside them, and a
+    single line larger than the budget becomes its own chunk.
+
+    Args:
+        max_tokens: Approximate token budget per chunk.
+        overlap_lines: Number of lines shared between adjacent chunks.
+    """
+
+    def __init__(self, max_tokens: int, overlap_lines: int = 0) -> None:
+        self.max_tokens = max_tokens
+        self.overlap_lines = overlap_lines
+        self._lines: list[str] = []
+        self._tokens = 0
+        self._overlap = 0
+
+    def add(self, lines: list[str]) -> list[str]:
+        """Feed lines in document order and return the chunks they completed."""
+        completed: list[str] = []
+        for line in lines:
+            line_tokens = estimate_tokens(line)
+            while self._lines and self._tokens + line_tokens > self.max_tokens:
+                if len(self._lines) == self._overlap:
+                    # Only lines already sent remain: drop them rather than send them again.
+                    self._lines, self._tokens, self._overlap = [], 0, 0
+                    break
+                completed.append("\n".join(self._lines))
+                keep = min(self.overlap_lines, len(self._lines) - 1)
+                self._lines = self._lines[len(self._lines) - keep :] if keep > 0 else []
+                self._tokens = sum(estimate_tokens(kept) for kept in self._lines)
+                self._overlap = len(self._lines)
+            self._lines.append(line)
+            self._tokens += line_tokens
+        return completed
+
+    def flush(self) -> list[str]:
+        """Return the last, partially filled chunk, if any."""
+        if not self._lines:
+            return []
+        chunk = "\n".join(self._lines)
+        self._lines = []
+        self._tokens = 0
+        self._overlap = 0
+        return [chunk]
+
+
+def chunk_lines(lines: list[str], max_tokens: int, overlap_lines: int = 0) -> list[str]:
+    """Group consecutive lines into chunks that fit a token budget.
+
+    Each chunk after the first repeats the last ``overlap_lines`` lines of
+    the previous one, so a transaction split across a boundary is seen
+    whole by at least one chunk. A single line larger than the budget
+    becomes its own chunk.
+
+    Args:
+        lines: Lines of text in document order.
+        max_tokens: Approximate token budget per chunk.
+        overlap_lines: Number of lines shared between adjacent chunks.
+
+    Returns:
+        The chunk texts in document order.
+    """
+    chunker = LineChunker(max_tokens, overlap_lines)
+    return chunker.add(lines) + chunker.flush()
+
+
+def _transaction_key(txn: Transaction) -> tuple:
+    return (txn.transaction_date, round(txn.amount, 2), txn.merchant.strip().casefold())
+
+
+def merge_transaction_lists(chunks: list[list[Transaction]]) -> list[Transaction]:
+    """Concatenate per-chunk extractions, dropping duplicates at chunk boundaries.
+
+    Only the overlap between the tail of one chunk and the head of the
+    next is removed; identical transactions elsewhere (two equal purchases
+    on the same day) are kept.
+
+    Args:
+        chunks: Transactions extracted from each chunk, in chunk order.
+
+    Returns:
+        The merged transactions in document order.
+    """
+    merged: list[Transaction] = []
+    previous: list[Transaction] = []
+    for current in chunks:
+        previous_keys = [_transaction_key(t) for t in previous]
+        current_keys = [_transaction_key(t) for t in current]
+        overlap = 0
+        for size in range(min(len(previous_keys), len(current_keys)), 0, -1):
+            if previous_keys[-size:] == current_keys[:size]:
+                overlap = size
+                break
+        merged.extend(current[overlap:])
+        previous = current
+
+    return merged
@@ -1,16 +1,52 @@
 """Saver node for persisting transactions to the database."""
 
-from src.database import init_db, save_transactions
+from typing import Callable
+
+from src.database import save_transactions
+from src.graphs.nodes.categorizer_node import MerchantCategoryMemo, NgramCategoryClassifier
 from src.graphs.state import ProcessingState
 
 
-def saver_node(state: ProcessingState) -> dict:
-    """Save transactions to the database."""
-    init_db()
-    transaction_dicts = []
-    for txn in state["transactions"]:
-        data = txn.model_dump()
-        data["source_file"] = state["file_path"]
-        transaction_dicts.append(data)
-    save_transactions(transaction_dicts)
-    return {"status": "saved"}
+def build_saver_node(
+    merchant_memo: MerchantCategoryMemo,
+    category_classifier: NgramCategoryClassifier | None = None,
+) -> Callable:
+    """Create a saver node function.
+
+    Args:
+        merchant_memo: Memo updated with the categories the agent reviewed.
+        category_classifier: Optional local classifier that learns from the
+            categories the agent reviewed.
+
+    Returns:
+        A function that can be used as a LangGraph node.
+    """
+
+    def saver_node(state: ProcessingState) -> dict:
+        """Upsert transactions and teach reviewed categories to the memo and classifier.
+
+        Rows already stored from an earlier upload of the same statement are
+        matched by fingerprint instead of being inserted again, and each row
+        is stored with where its category came from. Only rows
+        whose category the agent reviewed are learned from: categories taken
+        from the memo or the classifier would otherwise confirm themselves.
+        """
+        source_file = state.get("file_name") or state["file_path"]
+        sources = state.get("category_sources", [])
+        transaction_dicts = []
+        for i, txn in enumerate(state["transactions"]):
+            data = txn.model_dump()
+            data["source_file"] = source_file
+            data["category_source"] = sources[i] if i < len(sources) else None
+            transaction_dicts.append(data)
+        save_transactions(transaction_dicts)
+
+        reviewed = [txn for txn, source in zip(state["transactions"], sources) if source == "agent"]
+        merchant_memo.record({txn.merchant: txn.category for txn in reviewed})
+        if category_classifier is not None:
+            category_classifier.update(
+                (txn.merchant, txn.description, txn.category) for txn in reviewed
+            )
+        return {"status": "saved"}
+
+    return saver_node
@@ -0,0 +1,226 @@
+"""Time-, row- and plan-bounded execution of the analyst agent's SQL queries."""
+
+import re
+import sqlite3
+import threading
+import time
+
+from langchain_core.tools import BaseTool, StructuredTool
+from sqlalchemy import Engine
+
+from src.database import create_db_engine, engine
+from src.settings.config import settings
+
+SELECT_STATEMENT = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+TABLE_REFERENCE = re.compile(r"\b(?:from|join)\s+(\w+)(?:\s+(?:as\s+)?(\w+))?", re.IGNORECASE)
+NOT_ALIASES = {
+    "where",
+    "join",
+    "inner",
+    "left",
+    "right",
+    "cross",
+    "natural",
+    "full",
+    "outer",
+    "on",
+    "using",
+    "group",
+    "order",
+    "limit",
+    "having",
+    "window",
+    "union",
+    "intersect",
+    "except",
+}
+PROGRESS_STEPS = 10_000
+MAX_CELL_CHARS = 300
+
+QUERY_TOOL_DESCRIPTION = (
+    "Execute a single SQLite SELECT statement against the database and get back the rows. "
+    "If the query is not correct or too expensive, an error message is returned explaining "
+    "why; rewrite the query and try again. Results are capped, so aggregate in SQL and use "
+    "LIMIT instead of fetching raw rows."
+)
+
+
+def table_aliases(query: str) -> dict[str, str]:
+    """Map the aliases used in a query's FROM and JOIN clauses to their table names."""
+    aliases = {}
+    for table, alias in TABLE_REFERENCE.findall(query):
+        aliases[table.lower()] = table
+        if alias and alias.lower() not in NOT_ALIASES:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+class BoundedSQLExecutor:
+    """Run the analyst agent's SQL with a time budget, a row cap and a plan check.
+
+    Statements run on ``db_engine``, expected to be a small read-only pool
+    separate from the ingestion writer, so at most ``pool_size`` analyst
+    queries compete with ingestion for the CPU and none can take the write
+    lock. Only a single ``SELECT``/``WITH`` statement is accepted, and:
+
+    - its ``EXPLAIN QUERY PLAN`` is checked first, and a full scan of an
+      indexed table holding more than ``full_scan_rows`` rows is rejected,
+      with the indexed columns and rollup tables to use instead, so the
+      agent rewrites the query;
+    - SQLite's progress handler interrupts it once it has run for
+      ``timeout_seconds``;
+    - at most ``max_rows`` rows are fetched, and a notice telling the agent
+      to aggregate or add ``LIMIT`` is appended when more were available.
+
+    Every problem is returned as an ``"Error: ..."`` string, like LangChain's
+    SQL tool, so the agent can react to it.
+    """
+
+    def __init__(
+        self,
+        db_engine: Engine,
+        timeout_seconds: float = 5.0,
+        max_rows: int = 200,
+        full_scan_rows: int = 100_000,
+    ) -> None:
+        self.engine = db_engine
+        self.timeout_seconds = timeout_seconds
+        self.max_rows = max_rows
+        self.full_scan_rows = full_scan_rows
+        self.queries = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.truncated = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def run(self, query: str) -> str:
+        """Execute a query and return its rows, or an error message, as text.
+
+        Args:
+            query: SQL written by the agent.
+
+        Returns:
+            The rows formatted as a list of tuples, followed by a truncation
+            notice when capped, or an ``"Error: ..."`` message.
+        """
+        self._count("queries")
+        if not SELECT_STATEMENT.match(query):
+            self._count("rejected")
+            return "Error: only a single SELECT statement can be run."
+
+        with self.engine.connect() as conn:
+            dbapi_connection = conn.connection.driver_connection
+            deadline = time.monotonic() + self.timeout_seconds
+            dbapi_connection.set_progress_handler(
+                lambda: time.monotonic() > deadline, PROGRESS_STEPS
+            )
+            try:
+                problem = self._check_plan(dbapi_connection, query)
+                if problem:
+                    self._count("rejected")
+                    return f"Error: {problem}"
+                cursor = dbapi_connection.execute(query)
+                try:
+                    rows = cursor.fetchmany(self.max_rows + 1)
+                finally:
+                    cursor.close()
+            except sqlite3.OperationalError as exc:
+                if "interrupted" not in str(exc):
+                    self._count("errors")
+                    return f"Error: {exc}"
+                self._count("timed_out")
+                return (
+                    f"Error: the query was cancelled after {self.timeout_seconds:g}s. "
+                    "Filter on indexed columns, use the rollup tables or aggregate less data."
+                )
+            except sqlite3.Error as exc:
+                self._count("errors")
+                return f"Error: {exc}"
+            finally:
+                dbapi_connection.set_progress_handler(None, 0)
+
+        result = str([tuple(_truncate(value) for value in row) for row in rows[: self.max_rows]])
+        if len(rows) > self.max_rows:
+            self._count("truncated")
+            result += (
+                f"\n(Showing the first {self.max_rows} rows; more were available. "
+                "Aggregate in SQL or add LIMIT to get a complete answer.)"
+            )
+        return result
+
+    def _check_plan(self, conn: sqlite3.Connection, query: str) -> str | None:
+        aliases = table_aliases(query)
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+        for *_, detail in plan:
+            match = FULL_SCAN.match(detail)
+            if not match:
+                continue
+            name = match[1] if match[2] else aliases.get(match[1].lower(), match[1])
+            indexed = _indexed_columns(conn, name)
+            if not indexed:
+                continue
+            rows = conn.execute(f'SELECT MAX(rowid) FROM "{name}"').fetchone()[0] or 0
+            if rows > self.full_scan_rows:
+                return (
+                    f"the query scans all {rows:,} rows of {name}. Filter on an indexed column "
+                    f"({', '.join(indexed)}) or query the monthly_category_totals, "
+                    "monthly_merchant_totals or daily_totals rollups instead."
+                )
+        return None
+
+    def stats(self) -> dict:
+        """Return counters of executed, rejected, timed-out, truncated and failed queries."""
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "truncated": self.truncated,
+                "errors": self.errors,
+            }
+
+
+def _indexed_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    columns: list[str] = []
+    for index in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+        for info in conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall():
+            if info[2] and info[2] not in columns:
+                columns.append(info[2])
+    return columns
+
+
+def _truncate(value):
+    if isinstance(value, str) and len(value) > MAX_CELL_CHARS:
+        return value[:MAX_CELL_CHARS] + "..."
+    return value
+
+
+def build_query_tool(executor: BoundedSQLExecutor) -> BaseTool:
+    """Wrap an executor as the analyst agent's ``sql_db_query`` tool."""
+    return StructuredTool.from_function(
+        executor.run, name="sql_db_query", description=QUERY_TOOL_DESCRIPTION
+    )
+
+
+def build_sql_executor(db_engine: Engine | None = None) -> BoundedSQLExecutor:
+    """Build the analyst's executor over a read-only pool on ``db_engine``'s database.
+
+    An in-memory database cannot be opened twice, so its engine is used as is.
+    """
+    db_engine = db_engine or engine
+    if db_engine.url.database not in (None, "", ":memory:"):
+        db_engine = create_db_engine(
+            db_engine.url, read_only=True, pool_size=settings.analyst_pool_size
+        )
+    return BoundedSQLExecutor(
+        db_engine,
+        timeout_seconds=settings.analyst_query_timeout_seconds,
+        max_rows=settings.analyst_max_rows,
+        full_scan_rows=settings.analyst_full_scan_rows,
+    )
@@ -1,13 +1,25 @@
 """State definitions for LangGraph workflows."""
 
-from typing import TypedDict
+from typing import BinaryIO, TypedDict
 
 from src.models import Transaction
 
 
 class ProcessingState(TypedDict):
-    """State for the statement processing workflow."""
+    """State for the statement processing workflow.
+
+    The statement is given either as ``file_path`` or as an open binary
+    ``file`` handle (the spooled upload), with ``file_name`` carrying the
+    original name and extension. ``category_sources`` says, for each
+    transaction, where its category came from: ``"memo"``, ``"classifier"``,
+    ``"agent"`` (reviewed by the categorizer agent) or ``"extraction"``
+    (left as extracted).
+    """
 
     file_path: str
+    file: BinaryIO
+    file_name: str
+    file_hash: str
     transactions: list[Transaction]
+    category_sources: list[str]
     status: str
@@ -1,5 +1,6 @@
 """LLM integration for the Personal Finance Manager."""
 
+from src.llm.cache import SQLiteLLMCache, get_llm_cache
 from src.llm.client import get_llm
 
-__all__ = ["get_llm"]
+__all__ = ["SQLiteLLMCache", "get_llm", "get_llm_cache"]
@@ -0,0 +1,178 @@
+"""Persistent cache of LLM responses for deterministic (temperature 0) calls."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from src.settings.config import settings
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash a serialized prompt and model configuration into a cache key.
+
+    LangChain's ``llm_string`` covers the model name, its parameters and the
+    tools bound to the call, and ``prompt`` the full message list, so any
+    change to either is a different entry.
+    """
+    return hashlib.sha256(f"{llm_string}\n{prompt}".encode()).hexdigest()
+
+
+def _dump_generations(generations: Sequence[Generation]) -> str:
+    return json.dumps(
+        [
+            {
+                "message": message_to_dict(generation.message),
+                "generation_info": generation.generation_info,
+            }
+            if isinstance(generation, ChatGeneration)
+            else {"text": generation.text, "generation_info": generation.generation_info}
+            for generation in generations
+        ],
+        default=str,
+    )
+
+
+def _load_generations(payload: str) -> list[Generation]:
+    generations: list[Generation] = []
+    for item in json.loads(payload):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(
+                ChatGeneration(message=message, generation_info=item["generation_info"])
+            )
+        else:
+            generations.append(
+                Generation(text=item["text"], generation_info=item["generation_info"])
+            )
+    return generations
+
+
+def _total_tokens(generations: Sequence[Generation]) -> int:
+    total = 0
+    for generation in generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            total += usage.get("total_tokens", 0)
+    return total
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain response cache stored in a SQLite file, with TTL and LRU eviction.
+
+    Entries expire ``ttl_seconds`` after they were written and, past
+    ``max_entries``, the least recently read ones are evicted. ``tokens_saved``
+    adds up the token usage recorded with every response served from the
+    cache.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int = 10_000) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses (key TEXT PRIMARY KEY, "
+                "response TEXT NOT NULL, tokens INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_responses_accessed_at "
+                "ON llm_responses (accessed_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Return the cached generations for a prompt and model configuration, if fresh."""
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, tokens FROM llm_responses WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.tokens_saved += row[1]
+        return _load_generations(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store generations, purging expired entries and evicting past ``max_entries``."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(key, response, tokens, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    cache_key(prompt, llm_string),
+                    _dump_generations(return_val),
+                    _total_tokens(return_val),
+                    now + self.ttl_seconds,
+                    now,
+                ),
+            )
+            conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self, **kwargs) -> None:
+        """Drop every cached response."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_responses")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, tokens saved and the number of stored responses."""
+        with self._connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": size,
+                "tokens_saved": self.tokens_saved,
+            }
+
+
+@cache
+def get_llm_cache() -> SQLiteLLMCache | None:
+    """Return the process-wide LLM response cache, or None unless ``llm_cache_enabled``."""
+    if not settings.llm_cache_enabled:
+        return None
+    return SQLiteLLMCache(
+        settings.llm_cache_path,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_entries=settings.llm_cache_max_entries,
+    )
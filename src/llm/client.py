@@ -3,6 +3,7 @@
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 
+from src.llm.cache import get_llm_cache
 from src.settings.config import settings
 
 load_dotenv()
@@ -11,6 +12,9 @@ load_dotenv()
 def get_llm(temperature: float = 0.0) -> ChatOpenAI:
     """Get a configured LLM instance.
 
+    Deterministic (temperature 0) instances answer repeated prompts from
+    the response cache when ``llm_cache_enabled`` is set.
+
     Args:
         temperature: Model temperature for response randomness.
 
@@ -20,4 +24,5 @@ def get_llm(temperature: float = 0.0) -> ChatOpenAI:
     return ChatOpenAI(
         model=settings.llm_model,
         temperature=temperature,
+        cache=get_llm_cache() if temperature == 0 else None,
     )
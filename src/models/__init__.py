@@ -1,5 +1,5 @@
 """Pydantic models for the Personal Finance Manager."""
 
-from src.models.transaction import Transaction, TransactionList
+from src.models.transaction import CategoryChange, CategoryChanges, Transaction, TransactionList
 
-__all__ = ["Transaction", "TransactionList"]
+__all__ = ["CategoryChange", "CategoryChanges", "Transaction", "TransactionList"]
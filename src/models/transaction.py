@@ -24,3 +24,20 @@ class TransactionList(BaseModel):
     transactions: list[Transaction] = Field(
         description="List of all transactions extracted from the statement"
     )
+
+
+class CategoryChange(BaseModel):
+    """A new category for one transaction, identified by its row id."""
+
+    id: int = Field(description="The id of the transaction row")
+    category: str = Field(
+        description="One of: Food, Transport, Shopping, Entertainment, Bills, Health, Income, Transfer, Other"
+    )
+
+
+class CategoryChanges(BaseModel):
+    """Category changes for the transactions whose category should be updated."""
+
+    changes: list[CategoryChange] = Field(
+        description="Only the transactions whose category changes; omit the ones to keep"
+    )
@@ -1,5 +1,14 @@
 """File parsers for extracting text from bank statements."""
 
-from src.parsers.ocr_client import OCRClient
+from src.parsers.csv_importer import CSV_PROFILES, CsvProfile, import_csv, register_csv_profile
+from src.parsers.ocr_client import OCRClient, OCRDocument, OCRPage
 
-__all__ = ["OCRClient"]
+__all__ = [
+    "CSV_PROFILES",
+    "CsvProfile",
+    "OCRClient",
+    "OCRDocument",
+    "OCRPage",
+    "import_csv",
+    "register_csv_profile",
+]
@@ -0,0 +1,269 @@
+"""Deterministic CSV importer for known bank export layouts."""
+
+import codecs
+import csv
+import unicodedata
+from logging import getLogger
+from typing import BinaryIO
+
+import pandas as pd
+from pydantic import BaseModel, model_validator
+
+from src.models import Transaction
+
+logger = getLogger(__name__)
+
+DEFAULT_CATEGORY = "Other"
+SNIFF_DELIMITERS = ",;\t|"
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+
+class CsvProfile(BaseModel):
+    """Column mapping and parsing rules for one bank's CSV export.
+
+    Column names are matched against the file header case- and
+    accent-insensitively. Either ``amount_column`` or both
+    ``debit_column`` and ``credit_column`` must be set. Files that are
+    valid UTF-8 are always read as such; ``encoding`` is used for the
+    others, e.g. ``"latin-1"`` for banks exporting in a legacy code page.
+    """
+
+    name: str
+    date_column: str
+    description_column: str
+    merchant_column: str | None = None
+    amount_column: str | None = None
+    debit_column: str | None = None
+    credit_column: str | None = None
+    separator: str = ","
+    date_format: str = "%Y-%m-%d"
+    decimal: str = "."
+    thousands: str | None = None
+    negate_amounts: bool = False
+    encoding: str = "utf-8-sig"
+
+    @model_validator(mode="after")
+    def _check_amount_columns(self) -> "CsvProfile":
+        if not self.amount_column and not (self.debit_column and self.credit_column):
+            raise ValueError("Set amount_column or both debit_column and credit_column")
+        return self
+
+    @property
+    def columns(self) -> set[str]:
+        """Normalized names of every column this profile reads."""
+        names = [
+            self.date_column,
+            self.description_column,
+            self.merchant_column,
+            self.amount_column,
+            self.debit_column,
+            self.credit_column,
+        ]
+        return {normalize_header(name) for name in names if name}
+
+
+CSV_PROFILES: list[CsvProfile] = [
+    CsvProfile(
+        name="nubank_credit_card",
+        date_column="date",
+        description_column="title",
+        amount_column="amount",
+        negate_amounts=True,
+    ),
+    CsvProfile(
+        name="nubank_account",
+        date_column="Data",
+        description_column="Descrição",
+        amount_column="Valor",
+        date_format="%d/%m/%Y",
+    ),
+    CsvProfile(
+        name="inter_account",
+        date_column="Data Lançamento",
+        description_column="Descrição",
+        merchant_column="Histórico",
+        amount_column="Valor",
+        separator=";",
+        date_format="%d/%m/%Y",
+        decimal=",",
+        thousands=".",
+        encoding="latin-1",
+    ),
+    CsvProfile(
+        name="generic_debit_credit",
+        date_column="date",
+        description_column="description",
+        debit_column="debit",
+        credit_column="credit",
+    ),
+    CsvProfile(
+        name="generic",
+        date_column="date",
+        description_column="description",
+        amount_column="amount",
+    ),
+]
+
+
+def register_csv_profile(profile: CsvProfile) -> None:
+    """Register a bank layout, taking precedence over the built-in profiles."""
+    CSV_PROFILES.insert(0, profile)
+
+
+def normalize_header(name: str) -> str:
+    """Lowercase a column name and strip accents and surrounding whitespace."""
+    decomposed = unicodedata.normalize("NFKD", name.strip().lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _read_sample(source: str | BinaryIO) -> bytes:
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read(ENCODING_SAMPLE_BYTES)
+
+    source.seek(0)
+    sample = source.read(ENCODING_SAMPLE_BYTES)
+    source.seek(0)
+    return sample
+
+
+def _is_utf8(sample: bytes) -> bool:
+    try:
+        # Not final: the sample may end in the middle of a multi-byte character.
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _read_header_line(source: str | BinaryIO) -> str:
+    sample = _read_sample(source)
+    header = sample.split(b"\n", 1)[0]
+    return header.decode("utf-8-sig") if _is_utf8(header) else header.decode("latin-1")
+
+
+def sniff_profile(source: str | BinaryIO) -> CsvProfile | None:
+    """Find the first registered profile matching the file's header row.
+
+    Args:
+        source: Path to the CSV file, or a binary file handle.
+
+    Returns:
+        The matching profile, or None if the layout is unrecognized.
+    """
+    header_line = _read_header_line(source)
+
+    try:
+        delimiter = csv.Sniffer().sniff(header_line, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ","
+
+    header = {
+        normalize_header(name) for name in next(csv.reader([header_line], delimiter=delimiter))
+    }
+
+    for profile in CSV_PROFILES:
+        if profile.separator == delimiter and profile.columns <= header:
+            return profile
+    return None
+
+
+def _to_amount(series: pd.Series, profile: CsvProfile) -> pd.Series:
+    """Coerce a column to floats, handling text left unparsed by read_csv."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    text = series.astype(str).str.strip()
+    if profile.thousands:
+        text = text.str.replace(profile.thousands, "", regex=False)
+    if profile.decimal != ".":
+        text = text.str.replace(profile.decimal, ".", regex=False)
+    return pd.to_numeric(text, errors="coerce")
+
+
+def parse_csv(source: str | BinaryIO, profile: CsvProfile) -> list[Transaction]:
+    """Parse a CSV file into transactions using a bank profile.
+
+    Rows with an unparseable date or amount (totals, balance lines) are
+    dropped.
+
+    Args:
+        source: Path to the CSV file, or a binary file handle.
+        profile: The layout describing the file.
+
+    Returns:
+        The transactions in file order.
+    """
+    encoding = "utf-8-sig" if _is_utf8(_read_sample(source)) else profile.encoding
+    df = pd.read_csv(
+        source,
+        sep=profile.separator,
+        decimal=profile.decimal,
+        thousands=profile.thousands,
+        encoding=encoding,
+    )
+    df.columns = [normalize_header(name) for name in df.columns]
+
+    dates = pd.to_datetime(
+        df[normalize_header(profile.date_column)], format=profile.date_format, errors="coerce"
+    )
+
+    if profile.amount_column:
+        amounts = _to_amount(df[normalize_header(profile.amount_column)], profile)
+    else:
+        debit = _to_amount(df[normalize_header(profile.debit_column or "")], profile).fillna(0.0)
+        credit = _to_amount(df[normalize_header(profile.credit_column or "")], profile).fillna(0.0)
+        amounts = credit - debit.abs()
+    if profile.negate_amounts:
+        amounts = -amounts
+
+    descriptions = (
+        df[normalize_header(profile.description_column)].fillna("").astype(str).str.strip()
+    )
+    if profile.merchant_column:
+        merchants = df[normalize_header(profile.merchant_column)].fillna("").astype(str).str.strip()
+        merchants = merchants.where(merchants != "", descriptions)
+    else:
+        merchants = descriptions
+
+    valid = dates.notna() & amounts.notna()
+
+    return [
+        Transaction(
+            transaction_date=txn_date,
+            merchant=merchant,
+            description=description,
+            amount=amount,
+            category=DEFAULT_CATEGORY,
+        )
+        for txn_date, merchant, description, amount in zip(
+            dates[valid].dt.date,
+            merchants[valid],
+            descriptions[valid],
+            amounts[valid].round(2),
+        )
+    ]
+
+
+def import_csv(source: str | BinaryIO) -> list[Transaction] | None:
+    """Import a CSV export without the LLM when its layout is known.
+
+    Args:
+        source: Path to the CSV file, or a binary file handle such as a
+            spooled upload, read in place without copying it.
+
+    Returns:
+        The parsed transactions, or None if no profile matches the layout,
+        the file cannot be decoded or parsed with it, or no row could be
+        parsed, in which case the caller should fall back to the extractor
+        agent.
+    """
+    profile = sniff_profile(source)
+    if profile is None:
+        return None
+
+    try:
+        transactions = parse_csv(source, profile)
+    except (UnicodeDecodeError, pd.errors.ParserError, ValueError, KeyError) as e:
+        logger.warning("CSV matched profile %s but could not be parsed: %s", profile.name, e)
+        return None
+    return transactions or None
@@ -1,36 +1,201 @@
-from typing import Any
+import asyncio
+import json
+import random
+from collections.abc import AsyncIterator
+from contextlib import nullcontext
+from pathlib import Path
+from typing import BinaryIO
 
 import httpx
+from pydantic import BaseModel
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class LowConfidenceCell(BaseModel):
+    """A table cell the OCR model recognized with a low score."""
+
+    row: int
+    column: int
+    text: str
+    score: float
+
+
+class OCRPage(BaseModel):
+    """Text recognized on one page, with its layout when the service provides it.
+
+    ``boxes`` (``[x_min, y_min, x_max, y_max]``) and ``scores`` are aligned
+    with ``texts``. ``tsv`` holds the page reconstructed as table rows with
+    tab-separated, column-aligned cells; low-confidence cells are marked
+    with ``[?]`` and listed in ``low_confidence``.
+    """
+
+    page: int = 1
+    source: str = "ocr"
+    texts: list[str] = []
+    boxes: list[list[float]] = []
+    scores: list[float] = []
+    tsv: str | None = None
+    low_confidence: list[LowConfidenceCell] = []
+
+    @property
+    def rows(self) -> list[str]:
+        """The page as table rows, falling back to the raw lines without layout."""
+        return self.tsv.splitlines() if self.tsv is not None else self.texts
+
+
+class OCRDocument(BaseModel):
+    """All pages recognized from a document."""
+
+    pages: list[OCRPage] = []
+
+    @property
+    def rows(self) -> list[str]:
+        return [row for page in self.pages for row in page.rows]
+
+    @property
+    def tsv(self) -> str:
+        """The whole document as compact TSV, one table row per line."""
+        return "\n".join(self.rows)
 
 
 class OCRClient:
-    """Encapsulates calls to the remote Paddle OCR HTTP API."""
+    """Encapsulates calls to the remote Paddle OCR HTTP API.
+
+    At most ``max_concurrency`` requests are in flight at once. Transport
+    errors and 429/502/503/504 responses are retried up to ``max_retries``
+    times with jittered exponential backoff, honouring ``Retry-After``.
+    Files are streamed from disk as multipart bodies rather than read into
+    memory first.
+    """
 
-    def __init__(self, client: httpx.AsyncClient) -> None:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ) -> None:
         self.client = client
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
 
     async def aclose(self) -> None:
         """Close the underlying HTTP client."""
         await self.client.aclose()
 
-    async def send_pdf(self, file_path: str) -> Any:
-        """POST a PDF file to the OCR service and return parsed JSON.
+    def _backoff(self, attempt: int, response: httpx.Response | None = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        return random.uniform(0, self.retry_backoff * 2**attempt)
 
-        Raises RuntimeError on transport errors, non-2xx responses, or
-        non-JSON responses.
+    async def _send(
+        self, file: str | BinaryIO, filename: str | None, params: dict | None = None
+    ) -> httpx.Response:
+        """POST a file to ``/ocr`` and return the response with its body unread.
+
+        ``file`` is a path or an already open binary handle (e.g. a spooled
+        upload). The request body is streamed from it; each retry rewinds it
+        and sends it again.
         """
-        with open(file_path, "rb") as f:
-            files = {"file": (file_path.split("/")[-1], f, "application/pdf")}
+        if isinstance(file, str):
+            filename = filename or Path(file).name
+            opened = open(file, "rb")
+        else:
+            filename = filename or "upload.pdf"
+            opened = nullcontext(file)
+        with opened as f:
+            for attempt in range(self.max_retries + 1):
+                request = self.client.build_request(
+                    "POST",
+                    "/ocr",
+                    params=params,
+                    files={"file": (filename, f, "application/pdf")},
+                )
+                try:
+                    response = await self.client.send(request, stream=True)
+                except httpx.TransportError as exc:
+                    if attempt == self.max_retries:
+                        raise RuntimeError(f"Failed to call OCR service: {exc}") from exc
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    await response.aclose()
+                    await asyncio.sleep(self._backoff(attempt, response))
+                    continue
+
+                if response.is_error:
+                    await response.aclose()
+                    raise RuntimeError(f"OCR service returned HTTP {response.status_code}")
+                return response
+
+        raise RuntimeError("OCR service retries exhausted")
+
+    async def send_pdf(self, file: str | BinaryIO, filename: str | None = None) -> OCRDocument:
+        """POST a PDF file to the OCR service and return the recognized layout.
+
+        Args:
+            file: Path to the PDF, or an open binary handle.
+            filename: Name sent to the service; defaults to the path's name.
+
+        Returns:
+            The pages with their lines, boxes, scores and reconstructed rows.
+
+        Raises RuntimeError on transport errors, non-2xx responses,
+        non-JSON responses, or an error reported by the service.
+        """
+        async with self._semaphore:
+            response = await self._send(file, filename, params={"layout": "true"})
             try:
-                resp = await self.client.post("/ocr", files=files)
-                resp.raise_for_status()
-            except httpx.RequestError as exc:
+                await response.aread()
+            except httpx.TransportError as exc:
                 raise RuntimeError(f"Failed to call OCR service: {exc}") from exc
+            finally:
+                await response.aclose()
         try:
-            data = resp.json()
+            data = response.json()
         except ValueError as exc:
             raise RuntimeError("OCR service returned non-JSON response") from exc
 
-        if isinstance(data, dict) and "texts" in data:
-            return data["texts"]
-        return data
+        if not isinstance(data, dict) or "error" in data:
+            raise RuntimeError(f"OCR service failed: {data}")
+        if "pages" in data and all("texts" in page for page in data["pages"]):
+            return OCRDocument.model_validate(data)
+        return OCRDocument(pages=[OCRPage(texts=data.get("texts", []))])
+
+    async def stream_pdf(
+        self, file: str | BinaryIO, filename: str | None = None
+    ) -> AsyncIterator[OCRPage]:
+        """POST a PDF file to the OCR service and yield each page as it is recognized.
+
+        The service answers with NDJSON, one page object (as ``OCRPage``)
+        per line followed by a summary object, so the caller can
+        start working on the first pages while later ones are still being
+        rasterized and recognized. Only establishing the stream is retried.
+        ``file`` and ``filename`` are as for ``send_pdf``.
+
+        Raises RuntimeError on transport errors, non-2xx responses,
+        malformed lines, or an error reported by the service.
+        """
+        async with self._semaphore:
+            response = await self._send(file, filename, params={"stream": "true", "layout": "true"})
+            try:
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError as exc:
+                        raise RuntimeError("OCR service returned a malformed stream line") from exc
+                    if "error" in data:
+                        raise RuntimeError(f"OCR service failed: {data['error']}")
+                    if "texts" in data:
+                        yield OCRPage.model_validate(data)
+            except httpx.TransportError as exc:
+                raise RuntimeError(f"Failed to call OCR service: {exc}") from exc
+            finally:
+                await response.aclose()
@@ -4,11 +4,43 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     """Runtime settings loaded from environment variables."""
 
-    model_config = SettingsConfigDict(extra="ignore")
+    model_config = SettingsConfigDict(extra="ignore", env_ignore_empty=True)
     llm_model: str = "gpt-4o"
+    chat_fast_path: bool = True
+    analyst_pool_size: int = 4
+    analyst_query_timeout_seconds: float = 5.0
+    analyst_max_rows: int = 200
+    analyst_full_scan_rows: int = 100_000
+    chat_threads_path: str = "data/database/chat_threads.db"
+    chat_thread_ttl_seconds: int = 24 * 3600
+    chat_thread_max_tokens: int = 4000
+    llm_cache_enabled: bool = False
+    llm_cache_path: str = "data/database/llm_cache.db"
+    llm_cache_ttl_seconds: int = 30 * 24 * 3600
+    llm_cache_max_entries: int = 10_000
+    database_url: str = "sqlite:///data/database/pfm.db"
     ocr_service_base_url: str = "http://paddle-ocr:8001"
     ocr_service_timeout: int = 60
+    ocr_max_connections: int = 10
+    ocr_max_concurrency: int = 4
+    ocr_max_retries: int = 3
+    ocr_retry_backoff: float = 0.5
     tavily_api_key: str | None = None
+    processing_workers: int = 8
+    max_upload_bytes: int = 50 * 1024 * 1024
+    batch_max_files: int = 50
+    processing_queue_size: int = 100
+    processing_job_retention: int = 1000
+    extraction_chunk_tokens: int = 3000
+    extraction_chunk_overlap_lines: int = 3
+    extraction_concurrency: int = 4
+    classifier_threshold: float = 0.6
+    classifier_neighbors: int = 5
+    classifier_max_examples: int = 50_000
+    search_backend: str = "tavily"
+    search_cache_path: str = "data/database/search_cache.db"
+    search_cache_ttl_seconds: int = 7 * 24 * 3600
+    search_rate_limit: float = 5.0
 
 
 settings = Settings()
@@ -1,32 +1,130 @@
 """Streamlit UI for Personal Finance Manager."""
 
+import json
 import os
+import uuid
+from collections.abc import Callable, Iterator
 
 import httpx
 import pandas as pd
 import streamlit as st
 
 API_URL = os.getenv("API_URL", "http://localhost:8000")
-
-
-def process_document(uploaded_file) -> dict:
-    """Send document to the API for processing."""
+EVENT_READ_TIMEOUT = 60.0
+TRANSACTION_COLUMNS = ["Date", "Merchant", "Description", "Amount", "Category"]
+STAGE_LABELS = {
+    "ocr_completed": "OCR finished: {pages} pages",
+    "extracted": "Extracted {transaction_count} transactions",
+    "categorized": "Categorized {transaction_count} transactions",
+    "saved": "Saved {transaction_count} transactions",
+}
+
+
+def submit_document(uploaded_file) -> str:
+    """Send a document to the API for processing and return the job id."""
     files = {"file": (uploaded_file.name, uploaded_file.getvalue())}
-    response = httpx.post(f"{API_URL}/process", files=files, timeout=120.0)
+    response = httpx.post(f"{API_URL}/process", files=files, timeout=60.0)
     response.raise_for_status()
-    return response.json()
-
-
-def send_chat_query(query: str) -> str:
-    """Send a chat query to the API."""
-    response = httpx.post(
-        f"{API_URL}/chat",
-        json={"query": query},
-        timeout=60.0,
-    )
-    response.raise_for_status()
-    data = response.json()
-    return data["response"]
+    return response.json()["job_id"]
+
+
+def iter_sse(response: httpx.Response) -> Iterator[tuple[str, dict]]:
+    """Yield ``(event, data)`` pairs from a server-sent event response."""
+    if response.is_error:
+        response.read()
+        response.raise_for_status()
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line.removeprefix("event: ")
+        elif line.startswith("data: "):
+            yield event, json.loads(line.removeprefix("data: "))
+
+
+def follow_job(job_id: str) -> Iterator[tuple[str, dict]]:
+    """Yield ``(event, data)`` pairs from a job's server-sent event stream until it ends."""
+    timeout = httpx.Timeout(10.0, read=EVENT_READ_TIMEOUT)
+    with httpx.stream("GET", f"{API_URL}/process/{job_id}/events", timeout=timeout) as response:
+        yield from iter_sse(response)
+
+
+def transactions_frame(transactions: list[dict]) -> pd.DataFrame:
+    """Build the transactions table shown in the UI."""
+    df = pd.DataFrame(transactions)
+    df.columns = TRANSACTION_COLUMNS
+    return df
+
+
+def render_processing(job_id: str) -> dict:
+    """Render a job's progress as its events arrive and return the final result.
+
+    The transactions table appears as soon as extraction finishes and is
+    refreshed once they are categorized and with the final result.
+    """
+    progress = st.status("Processing statement...", expanded=True)
+    table = st.empty()
+    for event, data in follow_job(job_id):
+        if event in STAGE_LABELS:
+            progress.write(f"{STAGE_LABELS[event].format(**data)} ({data['duration']:.1f}s)")
+        if data.get("transactions"):
+            table.dataframe(transactions_frame(data["transactions"]), use_container_width=True)
+        if event == "completed":
+            if data["result"]["transactions"]:
+                table.dataframe(
+                    transactions_frame(data["result"]["transactions"]), use_container_width=True
+                )
+            progress.update(label="Statement processed", state="complete", expanded=False)
+            return data["result"]
+        if event == "failed":
+            progress.update(label="Processing failed", state="error")
+            return {"success": False, "message": data.get("error")}
+    progress.update(label="Processing interrupted", state="error")
+    return {"success": False, "message": f"Event stream for job {job_id} ended early"}
+
+
+def stream_chat_query(query: str, thread_id: str) -> Iterator[tuple[str, dict]]:
+    """Yield ``(event, data)`` pairs of a chat query's server-sent event stream.
+
+    Queries sharing a ``thread_id`` are one conversation, so follow-ups can
+    refer to earlier questions.
+
+    Raises:
+        RuntimeError: If the stream reports an error.
+    """
+    timeout = httpx.Timeout(10.0, read=EVENT_READ_TIMEOUT)
+    with httpx.stream(
+        "POST",
+        f"{API_URL}/chat/stream",
+        json={"query": query, "thread_id": thread_id},
+        timeout=timeout,
+    ) as response:
+        for event, data in iter_sse(response):
+            if event == "error":
+                raise RuntimeError(data["error"])
+            yield event, data
+
+
+def render_chat_answer(query: str, thread_id: str, on_step: Callable[[str], None]) -> str:
+    """Render a chat answer as its tokens arrive and return the final text.
+
+    Text streamed before a tool call is the agent thinking aloud, so it is
+    cleared when the call is reported through ``on_step``, the same way the
+    API leaves it out of the ``done`` answer.
+    """
+    placeholder = st.empty()
+    answer = ""
+    for event, data in stream_chat_query(query, thread_id):
+        if event == "token":
+            answer += data["content"]
+            placeholder.markdown(answer + "▌")
+        elif event == "tool_call":
+            answer = ""
+            placeholder.empty()
+            on_step(f"Running `{data['args'].get('query', data['name'])}`")
+        elif event == "done":
+            answer = data.get("content", answer)
+    placeholder.markdown(answer)
+    return answer
 
 
 def main():
@@ -52,39 +150,35 @@ def main():
 
     if "messages" not in st.session_state:
         st.session_state.messages = []
+        st.session_state.thread_id = uuid.uuid4().hex
 
     col1, col2 = st.columns([1, 1])
 
     with col1:
         st.subheader("Statement Processing")
         if process_button and uploaded_file:
-            with st.spinner("Processing statement..."):
-                try:
-                    result = process_document(uploaded_file)
-
-                    if result["success"]:
-                        st.success(
-                            f"Successfully processed {uploaded_file.name}! "
-                            f"Extracted {result['transaction_count']} transactions."
-                        )
+            try:
+                result = render_processing(submit_document(uploaded_file))
 
-                        if result["transactions"]:
-                            df = pd.DataFrame(result["transactions"])
-                            df.columns = ["Date", "Merchant", "Description", "Amount", "Category"]
-                            st.dataframe(df, use_container_width=True)
-                        else:
-                            st.info("No transactions were extracted from the file.")
-                    else:
-                        st.error(f"Processing failed: {result.get('message', 'Unknown error')}")
-
-                except httpx.HTTPStatusError as e:
-                    st.error(f"API error: {e.response.text}")
-                except httpx.ConnectError:
-                    st.error(
-                        f"Could not connect to API at {API_URL}. Make sure the backend is running."
+                if result["success"]:
+                    st.success(
+                        f"Successfully processed {uploaded_file.name}! "
+                        f"Extracted {result['transaction_count']} transactions."
                     )
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+
+                    if not result["transactions"]:
+                        st.info("No transactions were extracted from the file.")
+                else:
+                    st.error(f"Processing failed: {result.get('message', 'Unknown error')}")
+
+            except httpx.HTTPStatusError as e:
+                st.error(f"API error: {e.response.text}")
+            except httpx.ConnectError:
+                st.error(
+                    f"Could not connect to API at {API_URL}. Make sure the backend is running."
+                )
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
         else:
             st.info("Upload a bank statement using the sidebar to get started.")
 
@@ -104,31 +198,39 @@ def main():
                 with st.chat_message("user"):
                     st.markdown(prompt)
 
-            with st.spinner("Analyzing..."):
-                try:
-                    response = send_chat_query(prompt)
-
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-
-                    with chat_container:
-                        with st.chat_message("assistant"):
-                            st.markdown(response)
-
-                except httpx.HTTPStatusError as e:
-                    error_msg = f"API error: {e.response.text}"
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                    with chat_container:
-                        with st.chat_message("assistant"):
-                            st.error(error_msg)
-
-                except httpx.ConnectError:
-                    error_msg = (
-                        f"Could not connect to API at {API_URL}. Make sure the backend is running."
-                    )
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                    with chat_container:
-                        with st.chat_message("assistant"):
-                            st.error(error_msg)
+            try:
+                with chat_container:
+                    with st.chat_message("assistant"):
+                        steps = st.status("Analyzing...", expanded=False)
+                        response = render_chat_answer(
+                            prompt, st.session_state.thread_id, steps.write
+                        )
+                        steps.update(label="Analysis complete", state="complete")
+
+                st.session_state.messages.append({"role": "assistant", "content": response})
+
+            except httpx.HTTPStatusError as e:
+                error_msg = f"API error: {e.response.text}"
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                with chat_container:
+                    with st.chat_message("assistant"):
+                        st.error(error_msg)
+
+            except httpx.ConnectError:
+                error_msg = (
+                    f"Could not connect to API at {API_URL}. Make sure the backend is running."
+                )
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                with chat_container:
+                    with st.chat_message("assistant"):
+                        st.error(error_msg)
+
+            except RuntimeError as e:
+                error_msg = f"Chat failed: {e}"
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                with chat_container:
+                    with st.chat_message("assistant"):
+                        st.error(error_msg)
 
             st.rerun()
 
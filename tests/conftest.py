@@ -0,0 +1,18 @@
+"""Test configuration shared by the whole suite.
+
+Settings are read at import time, so the environment is prepared before
+any application module is imported: a throwaway database, search cache and chat thread store,
+the offline search backend, and a placeholder OpenAI key so agents can be
+constructed without network access.
+"""
+
+import os
+import tempfile
+
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="pfm-tests-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TEST_DATA_DIR}/pfm.db")
+os.environ.setdefault("SEARCH_CACHE_PATH", f"{_TEST_DATA_DIR}/search_cache.db")
+os.environ.setdefault("CHAT_THREADS_PATH", f"{_TEST_DATA_DIR}/chat_threads.db")
+os.environ.setdefault("SEARCH_BACKEND", "fake")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
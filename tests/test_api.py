@@ -1,15 +1,23 @@
 """Tests for FastAPI endpoints."""
 
+import asyncio
+import io
+import json
 import tempfile
+import threading
+import time
+import zipfile
 from datetime import date
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api.dependencies import get_processing_graph
+from src.api.dependencies import get_analyst_agent, get_processing_graph
+from src.api.jobs import JobQueue
 from src.api.main import app
+from src.api.uploads import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware
 from src.models import Transaction
 
 
@@ -41,6 +49,31 @@ def client_with_mock_graph(mock_graph):
     app.dependency_overrides.clear()
 
 
+def graph_updates(transactions: list[Transaction]):
+    """Build an ``astream`` replacement yielding the updates of the three processing nodes."""
+
+    async def astream(state, stream_mode=None):
+        yield "updates", {"extractor_node": {"transactions": transactions, "status": "extracted"}}
+        yield (
+            "updates",
+            {"categorizer_node": {"transactions": transactions, "status": "categorized"}},
+        )
+        yield "updates", {"saver_node": {"status": "saved"}}
+
+    return astream
+
+
+def wait_for_job(test_client, job_id: str, timeout: float = 5.0) -> dict:
+    """Poll a processing job until it leaves the queued/running states."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = test_client.get(f"/process/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish in {timeout}s")
+
+
 def test_health_check(client):
     """Test the health check endpoint."""
     response = client.get("/health")
@@ -80,10 +113,7 @@ def test_process_csv_with_mocked_graph(client_with_mock_graph, mock_graph):
         ),
     ]
 
-    mock_graph.invoke.return_value = {
-        "transactions": mock_transactions,
-        "status": "saved",
-    }
+    mock_graph.astream = MagicMock(side_effect=graph_updates(mock_transactions))
 
     csv_content = b"date,description,amount\n2024-01-15,Grocery Store,-85.50"
 
@@ -92,31 +122,473 @@ def test_process_csv_with_mocked_graph(client_with_mock_graph, mock_graph):
         files={"file": ("test.csv", csv_content, "text/csv")},
     )
 
-    assert response.status_code == 200
-    data = response.json()
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = wait_for_job(client_with_mock_graph, job_id)
+    assert job["status"] == "completed"
+    data = job["result"]
     assert data["success"] is True
     assert data["transaction_count"] == 1
     assert len(data["transactions"]) == 1
     assert data["transactions"][0]["merchant"] == "Grocery Store"
 
     # Verify graph was called
-    mock_graph.invoke.assert_called_once()
+    mock_graph.astream.assert_called_once()
 
 
-def test_chat_endpoint_with_mocked_response(client):
-    """Test chat endpoint with mocked analyst response."""
-    with patch("src.api.routes.chat.get_analyst_response") as mock_analyst:
-        mock_analyst.return_value = "You spent $85.50 on groceries."
+def test_process_repeated_upload_reuses_result(client_with_mock_graph, mock_graph):
+    """Test that re-uploading identical bytes returns the stored result without processing."""
+    mock_graph.astream = MagicMock(
+        side_effect=graph_updates(
+            [
+                Transaction(
+                    transaction_date=date(2024, 3, 2),
+                    merchant="Bakery",
+                    description="Bread",
+                    amount=-7.25,
+                    category="Food",
+                ),
+            ]
+        )
+    )
+    csv_content = b"date,description,amount\n2024-03-02,Bakery,-7.25"
+
+    first = client_with_mock_graph.post(
+        "/process", files={"file": ("march.csv", csv_content, "text/csv")}
+    )
+    first_job = wait_for_job(client_with_mock_graph, first.json()["job_id"])
+    assert first_job["status"] == "completed"
+
+    second = client_with_mock_graph.post(
+        "/process", files={"file": ("march-copy.csv", csv_content, "text/csv")}
+    )
+    assert second.status_code == 202
+    assert second.json()["status"] == "completed"
+    second_job = client_with_mock_graph.get(f"/process/{second.json()['job_id']}").json()
+    assert second_job["result"] == first_job["result"]
+    mock_graph.astream.assert_called_once()
+
+
+def test_process_reupload_after_empty_result_is_processed_again(client_with_mock_graph, mock_graph):
+    """Test that a run extracting nothing is not reused for the same bytes."""
+    mock_graph.astream = MagicMock(side_effect=graph_updates([]))
+    csv_content = b"date,description,amount\n2024-03-09,Unreadable,-1.00"
+
+    for filename in ("empty.csv", "empty-again.csv"):
+        response = client_with_mock_graph.post(
+            "/process", files={"file": (filename, csv_content, "text/csv")}
+        )
+        job = wait_for_job(client_with_mock_graph, response.json()["job_id"])
+        assert job["status"] == "completed"
+        assert job["result"]["transaction_count"] == 0
+
+    assert mock_graph.astream.call_count == 2
+
+
+def test_process_passes_upload_handle_to_graph(client_with_mock_graph, mock_graph):
+    """Test that the graph reads the spooled upload directly and it is closed afterwards."""
+    seen = {}
+
+    async def astream(state, stream_mode=None):
+        seen["content"] = state["file"].read()
+        seen["file"] = state["file"]
+        seen["file_name"] = state["file_name"]
+        yield "updates", {"extractor_node": {"transactions": [], "status": "extracted"}}
+
+    mock_graph.astream = astream
+    csv_content = b"date,description,amount\n2024-04-09,Pharmacy,-31.90"
+
+    response = client_with_mock_graph.post(
+        "/process", files={"file": ("april.csv", csv_content, "text/csv")}
+    )
+
+    job = wait_for_job(client_with_mock_graph, response.json()["job_id"])
+    assert job["status"] == "completed"
+    assert seen["content"] == csv_content
+    assert seen["file_name"] == "april.csv"
+    assert seen["file"].closed
+
+
+def test_process_rejects_oversized_upload(client_with_mock_graph, mock_graph):
+    """Test that uploads above the size limit are refused before processing."""
+    mock_graph.astream = MagicMock()
+
+    with patch("src.api.routes.processing.settings.max_upload_bytes", 10):
+        response = client_with_mock_graph.post(
+            "/process", files={"file": ("big.csv", b"date,amount\n2024-01-15,-1", "text/csv")}
+        )
+
+    assert response.status_code == 413
+    mock_graph.astream.assert_not_called()
+
+
+def test_process_rejects_declared_oversized_body(client_with_mock_graph, mock_graph):
+    """Test that a Content-Length above the limit is refused without reading the body."""
+    mock_graph.astream = MagicMock()
+
+    with patch("src.api.uploads.settings.max_upload_bytes", 10):
+        response = client_with_mock_graph.post(
+            "/process",
+            content=b"x" * (MULTIPART_OVERHEAD_BYTES + 11),
+            headers={"Content-Type": "multipart/form-data; boundary=b"},
+        )
+
+    assert response.status_code == 413
+    mock_graph.astream.assert_not_called()
+
+
+def test_upload_limit_stops_reading_streamed_body():
+    """Test that a body without Content-Length is read only up to the limit."""
+    chunks = [b"x" * 1024] * 100
+    read = []
+
+    async def upload_app(scope, receive, send):
+        while (message := await receive())["type"] == "http.request":
+            read.append(message["body"])
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 400, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def scenario():
+        sent = []
+        pending = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+
+        async def receive():
+            return pending.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/process", "headers": []}
+        with patch("src.api.uploads.settings.max_upload_bytes", 10 * 1024):
+            await UploadLimitMiddleware(upload_app)(scope, receive, send)
+        return sent
+
+    sent = asyncio.run(scenario())
+
+    assert sent[0]["status"] == 413
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.body"]
+    assert sum(map(len, read)) <= 10 * 1024 + MULTIPART_OVERHEAD_BYTES
+
+
+def test_process_failed_job_reports_error(client_with_mock_graph, mock_graph):
+    """Test that graph errors are reported on the job instead of the upload."""
+    mock_graph.astream = MagicMock(side_effect=ValueError("extraction failed"))
+
+    response = client_with_mock_graph.post(
+        "/process",
+        files={"file": ("test.csv", b"date,amount\n2024-01-15,-1", "text/csv")},
+    )
+
+    assert response.status_code == 202
+    job = wait_for_job(client_with_mock_graph, response.json()["job_id"])
+    assert job["status"] == "failed"
+    assert job["error"] == "extraction failed"
+
+
+def parse_sse(lines) -> list[tuple[str, dict]]:
+    """Collect ``(event, data)`` pairs from server-sent event lines."""
+    events = []
+    name = None
+    for line in lines:
+        if line.startswith("event: "):
+            name = line.removeprefix("event: ")
+        elif line.startswith("data: "):
+            events.append((name, json.loads(line.removeprefix("data: "))))
+    return events
+
+
+def read_events(test_client, job_id: str) -> list[tuple[str, dict]]:
+    """Read a job's server-sent events until the stream ends."""
+    with test_client.stream("GET", f"/process/{job_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        return parse_sse(response.iter_lines())
+
+
+def test_process_events_stream_progress(client_with_mock_graph, mock_graph):
+    """Test that node progress and early transactions reach a live follower.
+
+    A stream opened after the job finished only gets the result.
+    """
+    transaction = Transaction(
+        transaction_date=date(2024, 7, 3),
+        merchant="Cinema",
+        description="Tickets",
+        amount=-40.0,
+        category="Other",
+    )
+
+    async def astream(state, stream_mode=None):
+        assert stream_mode == ["updates", "custom"]
+        yield "custom", {"event": "ocr_completed", "pages": 2}
+        yield "updates", {"extractor_node": {"transactions": [transaction], "status": "extracted"}}
+        categorized = transaction.model_copy(update={"category": "Entertainment"})
+        yield "updates", {"categorizer_node": {"transactions": [categorized]}}
+        yield "updates", {"saver_node": {"status": "saved"}}
+
+    subscribed = threading.Event()
+    follow = JobQueue.follow
+
+    def follow_and_signal(self, job, heartbeat=None):
+        subscribed.set()
+        return follow(self, job, heartbeat)
+
+    async def gated_astream(state, stream_mode=None):
+        while not subscribed.is_set():
+            await asyncio.sleep(0.01)
+        async for item in astream(state, stream_mode):
+            yield item
 
-        response = client.post(
-            "/chat",
-            json={"query": "How much did I spend on groceries?"},
+    mock_graph.astream = gated_astream
+    with patch.object(JobQueue, "follow", follow_and_signal):
+        response = client_with_mock_graph.post(
+            "/process", files={"file": ("july.pdf", b"%PDF-1.4 july", "application/pdf")}
         )
+        job_id = response.json()["job_id"]
+        events = read_events(client_with_mock_graph, job_id)
 
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-        assert "groceries" in data["response"].lower()
+    names = [name for name, _ in events]
+    assert names == ["ocr_completed", "extracted", "categorized", "saved", "completed"]
+    data = dict(events)
+    assert data["ocr_completed"]["pages"] == 2
+    assert data["extracted"]["transactions"][0]["category"] == "Other"
+    assert data["categorized"]["transactions"][0]["category"] == "Entertainment"
+    assert data["saved"]["transaction_count"] == 1
+    assert all(data[name]["elapsed"] >= data[name]["duration"] for name in names[:-1])
+    assert data["completed"]["result"]["transactions"][0]["category"] == "Entertainment"
+    assert read_events(client_with_mock_graph, job_id) == [("completed", data["completed"])]
+
+
+def test_process_events_report_failure(client_with_mock_graph, mock_graph):
+    """Test that a failed job ends its event stream with the error."""
+    mock_graph.astream = MagicMock(side_effect=ValueError("ocr unavailable"))
+    response = client_with_mock_graph.post(
+        "/process", files={"file": ("broken.csv", b"date,amount\n2024-08-01,-3", "text/csv")}
+    )
+
+    events = read_events(client_with_mock_graph, response.json()["job_id"])
+
+    assert events[-1] == ("failed", {"event": "failed", "error": "ocr unavailable"})
+
+
+def test_process_events_unknown_job(client):
+    """Test that the event stream of an unknown job is a 404."""
+    assert client.get("/process/does-not-exist/events").status_code == 404
+
+
+def wait_for_batch(test_client, batch_id: str, timeout: float = 5.0) -> dict:
+    """Poll a batch until none of its jobs are queued or running."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        batch = test_client.get(f"/process/batch/{batch_id}").json()
+        if batch["status"] != "running":
+            return batch
+        time.sleep(0.01)
+    raise AssertionError(f"Batch {batch_id} did not finish in {timeout}s")
+
+
+def test_process_batch_with_files_and_zip(client_with_mock_graph, mock_graph):
+    """Test that files and ZIP members are fanned out and summarized per file."""
+
+    async def astream(state, stream_mode=None):
+        merchant = state["file"].read().decode().splitlines()[-1].split(",")[1]
+        transactions = [
+            Transaction(
+                transaction_date=date(2024, 5, 1),
+                merchant=merchant,
+                description=merchant,
+                amount=-10.0,
+                category="Other",
+            )
+        ]
+        async for item in graph_updates(transactions)(state):
+            yield item
+
+    mock_graph.astream = astream
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("2024/june.csv", "date,description,amount\n2024-06-01,Batch June,-10")
+        zf.writestr("notes.txt", "not a statement")
+        zf.writestr("__MACOSX/._june.csv", "metadata")
+
+    response = client_with_mock_graph.post(
+        "/process/batch",
+        files=[
+            (
+                "files",
+                ("may.csv", b"date,description,amount\n2024-05-01,Batch May,-10", "text/csv"),
+            ),
+            ("files", ("statements.zip", archive.getvalue(), "application/zip")),
+        ],
+    )
+
+    assert response.status_code == 202
+    batch = wait_for_batch(client_with_mock_graph, response.json()["batch_id"])
+    files = {f["filename"]: f for f in batch["files"]}
+    assert set(files) == {"may.csv", "june.csv", "notes.txt"}
+    assert files["may.csv"]["status"] == "completed"
+    assert files["june.csv"]["transaction_count"] == 1
+    assert files["notes.txt"]["status"] == "failed"
+    assert "Unsupported file format" in files["notes.txt"]["error"]
+    assert (batch["total_files"], batch["completed"], batch["failed"]) == (3, 2, 1)
+    assert batch["transaction_count"] == 2
+
+
+@pytest.mark.parametrize(
+    ("max_files", "max_bytes", "sizes", "detail"),
+    [
+        (2, 1000, [10, 10, 10], "Archive has 3 files, the batch can take 2"),
+        (2, 40, [100], "Archive expands to 100 bytes, the limit is 80"),
+    ],
+)
+def test_process_batch_checks_zip_directory_before_extracting(
+    client_with_mock_graph, mock_graph, max_files, max_bytes, sizes, detail
+):
+    """Test that archives with too many or too large members are refused unopened."""
+    mock_graph.astream = MagicMock()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i, size in enumerate(sizes):
+            zf.writestr(f"statement{i}.csv", "0" * size)
+
+    with (
+        patch("src.api.routes.processing.settings.batch_max_files", max_files),
+        patch("src.api.routes.processing.settings.max_upload_bytes", max_bytes),
+        patch("zipfile.ZipFile.open") as open_member,
+    ):
+        response = client_with_mock_graph.post(
+            "/process/batch",
+            files=[("files", ("statements.zip", archive.getvalue(), "application/zip"))],
+        )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+    open_member.assert_not_called()
+    mock_graph.astream.assert_not_called()
+
+
+def test_process_unknown_batch(client):
+    """Test that polling an unknown batch returns 404."""
+    assert client.get("/process/batch/does-not-exist").status_code == 404
+
+
+def test_process_unknown_job(client):
+    """Test that polling an unknown job returns 404."""
+    response = client.get("/process/does-not-exist")
+    assert response.status_code == 404
+
+
+def test_metrics_endpoint(client):
+    """Test that cache counters are reported."""
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert {"hits", "misses", "hit_rate", "size"} <= data["merchant_memo"].keys()
+    assert "coalesced" in data["company_search"]
+    assert {"hits", "misses", "hit_rate", "size"} <= data["local_classifier"].keys()
+    assert {"queries", "rejected", "timed_out", "truncated"} <= data["analyst_sql"].keys()
+
+
+def test_stats_categories_endpoint(client):
+    """Test that category stats are served from the rollup query with filters."""
+    row = {
+        "month": "2024-01",
+        "category": "Food",
+        "total": -100.0,
+        "income": 0.0,
+        "expenses": -100.0,
+        "transaction_count": 2,
+    }
+    with patch("src.api.routes.stats.get_category_totals", return_value=[row]) as mock_totals:
+        response = client.get(
+            "/stats/categories",
+            params={"start_date": "2024-01-01", "end_date": "2024-01-31", "category": "Food"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == [row]
+    mock_totals.assert_called_once_with(date(2024, 1, 1), date(2024, 1, 31), "Food")
+
+
+def test_chat_endpoint_with_mocked_response():
+    """Test chat endpoint with mocked analyst response."""
+    mock_analyst = MagicMock()
+    mock_analyst.arespond = AsyncMock(return_value="You spent $85.50 on groceries.")
+    app.dependency_overrides[get_analyst_agent] = lambda: mock_analyst
+
+    try:
+        with TestClient(app) as test_client:
+            response = test_client.post(
+                "/chat",
+                json={"query": "How much did I spend on groceries?", "thread_id": "t-1"},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert "groceries" in data["response"].lower()
+    mock_analyst.arespond.assert_awaited_once_with("How much did I spend on groceries?", "t-1")
+
+
+def test_chat_stream_endpoint():
+    """Test that tool steps and tokens are streamed and the answer excludes pre-tool text."""
+
+    async def astream_response(query, thread_id=None):
+        yield {"event": "token", "content": "Let me check."}
+        yield {"event": "tool_call", "name": "sql_db_query", "args": {"query": "SELECT 1"}}
+        yield {"event": "tool_result", "name": "sql_db_query", "content": "[(1,)]"}
+        for token in ["You", " spent", " R$ 10."]:
+            yield {"event": "token", "content": token}
+
+    mock_analyst = MagicMock()
+    mock_analyst.astream_response = astream_response
+    app.dependency_overrides[get_analyst_agent] = lambda: mock_analyst
+
+    try:
+        with TestClient(app) as test_client:
+            with test_client.stream("POST", "/chat/stream", json={"query": "Spent?"}) as response:
+                assert response.headers["content-type"].startswith("text/event-stream")
+                events = parse_sse(response.iter_lines())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [name for name, _ in events] == [
+        "token",
+        "tool_call",
+        "tool_result",
+        "token",
+        "token",
+        "token",
+        "done",
+    ]
+    assert events[1][1]["args"] == {"query": "SELECT 1"}
+    assert events[-1][1] == {"event": "done", "content": "You spent R$ 10."}
+
+
+def test_chat_stream_reports_errors():
+    """Test that an agent failure ends the stream with an error event."""
+
+    async def astream_response(query, thread_id=None):
+        yield {"event": "token", "content": "Partial"}
+        raise RuntimeError("model unavailable")
+
+    mock_analyst = MagicMock()
+    mock_analyst.astream_response = astream_response
+    app.dependency_overrides[get_analyst_agent] = lambda: mock_analyst
+
+    try:
+        with TestClient(app) as test_client:
+            response = test_client.post("/chat/stream", json={"query": "Spent?"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.text.rstrip().endswith('data: {"event":"error","error":"model unavailable"}')
 
 
 def test_chat_endpoint_empty_query(client):
@@ -0,0 +1,186 @@
+"""Tests for the local n-gram category classifier."""
+
+import asyncio
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.database import init_db, save_transactions
+from src.graphs.nodes.categorizer_node import (
+    CompanySearch,
+    FakeSearchBackend,
+    MerchantCategoryMemo,
+    NgramCategoryClassifier,
+    build_categorizer_node,
+)
+from src.graphs.nodes.node_saver import build_saver_node
+from src.models import CategoryChange, CategoryChanges, Transaction
+
+HISTORY = [
+    ("PAG*IFOOD 1234", "PAG*IFOOD 1234", "Food"),
+    ("IFOOD *RESTAURANTE", "IFOOD *RESTAURANTE", "Food"),
+    ("UBER *TRIP", "UBER *TRIP", "Transport"),
+    ("99 TAXI", "99 TAXI", "Transport"),
+    ("NETFLIX.COM", "NETFLIX.COM", "Entertainment"),
+    ("DROGASIL 0453", "DROGASIL 0453", "Health"),
+    ("Mystery Shop", "Mystery Shop", "Other"),
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create a file-backed database usable from worker threads."""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'classifier.db'}")
+    init_db(db_engine)
+    return db_engine
+
+
+def make_transaction(merchant: str, category: str = "Other") -> Transaction:
+    return Transaction(
+        transaction_date=date(2024, 1, 15),
+        merchant=merchant,
+        description=merchant,
+        amount=-10.0,
+        category=category,
+    )
+
+
+def test_classifier_trains_from_transactions_table(engine):
+    """Test that merchant variants get the category of similar stored merchants."""
+    save_transactions(
+        [
+            {
+                **make_transaction(m, c).model_dump(),
+                "description": d,
+                "source_file": "jan.csv",
+                "category_source": "agent",
+            }
+            for m, d, c in HISTORY
+        ],
+        engine,
+    )
+    classifier = NgramCategoryClassifier(engine)
+
+    classifier.train()
+
+    assert classifier.stats()["size"] == 6
+    assert classifier.predict_many([("IFOOD *SP", "IFOOD *SP"), ("Uber *Trip Help", "")]) == [
+        "Food",
+        "Transport",
+    ]
+    assert classifier.stats()["hits"] == 2
+
+
+def test_classifier_trains_only_from_agent_reviewed_rows(engine):
+    """Test that categories set by the memo or the classifier are not learned at startup."""
+    rows = [
+        ("UBER *TRIP", "Transport", "agent"),
+        ("NETFLIX.COM", "Entertainment", "memo"),
+        ("DROGASIL 0453", "Health", "classifier"),
+        ("PAG*IFOOD 1234", "Food", None),
+    ]
+    save_transactions(
+        [
+            {**make_transaction(m, c).model_dump(), "source_file": "jan.csv", "category_source": s}
+            for m, c, s in rows
+        ],
+        engine,
+    )
+    save_transactions(
+        [
+            {
+                **make_transaction("NETFLIX.COM", "Entertainment").model_dump(),
+                "source_file": "jan.csv",
+                "category_source": "agent",
+            }
+        ],
+        engine,
+    )
+    classifier = NgramCategoryClassifier(engine)
+
+    classifier.train()
+
+    assert classifier.stats()["size"] == 2
+    assert classifier.predict_many([("DROGASIL 0453", ""), ("NETFLIX.COM", "")]) == [
+        None,
+        "Entertainment",
+    ]
+
+
+def test_classifier_abstains_on_unfamiliar_merchants():
+    """Test that rows unlike any example stay unclassified."""
+    classifier = NgramCategoryClassifier(threshold=0.6)
+    classifier.update(HISTORY)
+
+    assert classifier.predict_many([("Zxqv Wkjh", ""), ("Mystery Shop", "")]) == [None, None]
+    assert classifier.stats() == {"hits": 0, "misses": 2, "hit_rate": 0.0, "size": 6}
+
+
+def test_classifier_learns_incrementally():
+    """Test that updates are used by the next prediction without retraining."""
+    classifier = NgramCategoryClassifier()
+    assert classifier.predict("Padaria Pao Quente") is None
+
+    classifier.update([("PADARIA PAO QUENTE 12", "", "Food")])
+
+    category, confidence = classifier.predict("Padaria Pao Quente Sao Paulo")
+    assert category == "Food"
+    assert confidence > 0.9
+
+
+def test_classifier_majority_label_and_bounded_examples():
+    """Test that conflicting labels resolve to the majority and old examples are evicted."""
+    classifier = NgramCategoryClassifier(max_examples=2)
+    classifier.update([("Amazon", "", "Shopping")] * 2 + [("Amazon", "", "Bills")])
+
+    assert classifier.predict("AMAZON")[0] == "Shopping"
+
+    classifier.update([("Shell", "", "Transport"), ("Spotify", "", "Entertainment")])
+
+    assert classifier.stats()["size"] == 2
+    assert classifier.predict("Amazon") is None
+
+
+def test_categorizer_sends_only_low_confidence_rows_to_agent(tmp_path):
+    """Test that the classifier sits between the memo and the agent."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'memo.db'}")
+    init_db(engine)
+    memo = MerchantCategoryMemo(engine)
+    memo.record({"Supermarket": "Food"})
+    classifier = NgramCategoryClassifier()
+    classifier.update(HISTORY)
+
+    agent = MagicMock()
+    agent.ainvoke = AsyncMock(
+        return_value={
+            "structured_response": CategoryChanges(
+                changes=[CategoryChange(id=0, category="Health")]
+            )
+        }
+    )
+    with patch(
+        "src.graphs.nodes.categorizer_node.agent.build_categorizer_agent", return_value=agent
+    ):
+        node = build_categorizer_node(memo, CompanySearch(FakeSearchBackend()), classifier)
+
+    transactions = [
+        make_transaction("IFOOD *SP"),
+        make_transaction("SUPERMARKET"),
+        make_transaction("Acme Pharma"),
+    ]
+    result = asyncio.run(node({"transactions": transactions}))
+
+    prompt = agent.ainvoke.call_args.args[0]["messages"][0][1]
+    assert "Acme Pharma" in prompt
+    assert "IFOOD" not in prompt
+    assert [t.category for t in result["transactions"]] == ["Food", "Food", "Health"]
+    assert result["category_sources"] == ["classifier", "memo", "agent"]
+
+    size = classifier.stats()["size"]
+    with patch("src.graphs.nodes.node_saver.save_transactions"):
+        build_saver_node(memo, classifier)({"file_path": "jan.csv", **result})
+
+    assert classifier.stats()["size"] == size + 1
+    assert memo.lookup_many(["IFOOD *SP", "Acme Pharma"]) == {"Acme Pharma": "Health"}
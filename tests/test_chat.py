@@ -0,0 +1,113 @@
+"""Tests for the chat analyst agent."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from sqlalchemy import create_engine, text
+
+from src.database import init_db
+from src.graphs import AnalystAgent
+
+
+def test_analyst_renders_schema_once(tmp_path):
+    """Test that the schema is rendered at build time and reused."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    init_db(engine)
+
+    analyst = AnalystAgent(engine)
+    agent = analyst.agent
+    analyst.refresh()
+
+    assert "transaction_date" in analyst.schema
+    assert analyst.agent is agent
+
+
+def test_analyst_rebuilds_on_schema_change(tmp_path):
+    """Test that a schema change triggers a rebuild on the next refresh."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    init_db(engine)
+    analyst = AnalystAgent(engine)
+    agent = analyst.agent
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN notes VARCHAR"))
+    analyst.refresh()
+
+    assert analyst.agent is not agent
+    assert "notes" in analyst.schema
+
+
+class StreamingFakeModel(GenericFakeChatModel):
+    """Fake chat model streaming tool calls and word tokens like a real provider."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = next(self.messages)
+        if message.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "args": json.dumps(call["args"]),
+                            "id": call["id"],
+                            "index": i,
+                        }
+                        for i, call in enumerate(message.tool_calls)
+                    ],
+                )
+            )
+            return
+        for i, word in enumerate(message.content.split(" ")):
+            token = word if i == 0 else f" {word}"
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def test_analyst_streams_tool_steps_and_tokens(tmp_path):
+    """Test that queries, their results and the answer tokens are yielded in order."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    init_db(engine)
+    model = StreamingFakeModel(
+        messages=iter(
+            [
+                AIMessage(
+                    "",
+                    tool_calls=[
+                        {
+                            "name": "sql_db_query",
+                            "args": {"query": "SELECT COUNT(*) FROM transactions"},
+                            "id": "call-1",
+                        }
+                    ],
+                ),
+                AIMessage("You have no transactions yet."),
+            ]
+        )
+    )
+
+    async def collect(analyst: AnalystAgent) -> list[dict]:
+        return [event async for event in analyst.astream_response("How many transactions?")]
+
+    with patch("src.graphs.chat.get_llm", return_value=model):
+        events = asyncio.run(collect(AnalystAgent(engine)))
+
+    assert events[0] == {
+        "event": "tool_call",
+        "name": "sql_db_query",
+        "args": {"query": "SELECT COUNT(*) FROM transactions"},
+    }
+    assert events[1]["event"] == "tool_result"
+    assert events[1]["content"] == "[(0,)]"
+    tokens = [e["content"] for e in events[2:] if e["event"] == "token"]
+    assert len(tokens) == 5
+    assert "".join(tokens) == "You have no transactions yet."
@@ -0,0 +1,194 @@
+"""Tests for the chat fast-path router."""
+
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.database import init_db, save_transactions
+from src.graphs import AnalystAgent, FastPathRouter
+from src.graphs.chat_router import normalize_question, parse_period
+
+TODAY = date(2024, 4, 18)
+
+ROWS = [
+    (date(2024, 2, 3), "IFOOD", "Food", -50.0),
+    (date(2024, 3, 5), "IFOOD", "Food", -80.0),
+    (date(2024, 3, 9), "Padaria Real", "Food", -20.0),
+    (date(2024, 3, 12), "Uber Trip", "Transport", -35.5),
+    (date(2024, 3, 28), "ACME Payroll", "Income", 3000.0),
+    (date(2024, 4, 2), "IFOOD", "Food", -120.0),
+    (date(2024, 4, 6), "Uber Trip", "Transport", -14.5),
+]
+
+
+def make_engine(path, rows):
+    db_engine = create_engine(f"sqlite:///{path}")
+    init_db(db_engine)
+    save_transactions(
+        [
+            {
+                "transaction_date": day,
+                "merchant": merchant,
+                "description": merchant,
+                "amount": amount,
+                "category": category,
+                "source_file": "statement.csv",
+            }
+            for day, merchant, category, amount in rows
+        ],
+        db_engine,
+    )
+    return db_engine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create a database with a few months of categorized transactions."""
+    return make_engine(tmp_path / "router.db", ROWS)
+
+
+@pytest.fixture
+def router(engine):
+    return FastPathRouter(engine, today=lambda: TODAY)
+
+
+@pytest.mark.parametrize(
+    ("question", "period"),
+    [
+        ("how much did i spend last month", ("2024-03", "2024-03", "last month")),
+        ("spending this year", ("2024-01", "2024-04", "this year")),
+        ("spending in the last 3 months", ("2024-02", "2024-04", "in the last 3 months")),
+        ("spending in june", ("2023-06", "2023-06", "in June 2023")),
+        ("spending in mar 2022", ("2022-03", "2022-03", "in March 2022")),
+        ("spending in 2023", ("2023-01", "2023-12", "in 2023")),
+        ("spending", (None, None, "overall")),
+    ],
+)
+def test_parse_period(question, period):
+    """Test that period phrases resolve to month ranges relative to today."""
+    parsed, _ = parse_period(question, TODAY)
+
+    assert (parsed.start, parsed.end, parsed.label) == period
+
+
+@pytest.mark.parametrize(
+    ("question", "intent", "answer"),
+    [
+        (
+            "How much did I spend on Food last month?",
+            "total",
+            "You spent 100.00 on Food last month.",
+        ),
+        ("How much did I spend at iFood in 2024?", "total", "You spent 250.00 at IFOOD in 2024."),
+        ("How much did I earn in March?", "total", "You earned 3,000.00 in March 2024."),
+        (
+            "What's my average monthly spending on food?",
+            "average",
+            "On average you spent 90.00 per month on Food overall (3 months with transactions).",
+        ),
+        (
+            "Top 2 merchants this year",
+            "top_merchants",
+            "Top merchants by spending this year:\n1. IFOOD: 250.00\n2. Uber Trip: 50.00",
+        ),
+        (
+            "Show my spending by category in March",
+            "category_breakdown",
+            "Spending by category in March 2024:\n- Food: 100.00\n- Transport: 35.50",
+        ),
+        (
+            "How did my spending change compared to last month?",
+            "month_over_month",
+            "You spent 134.50 in April 2024, down 0.7% (-1.00) from 135.50 in March 2024.",
+        ),
+        (
+            "Food spending month over month",
+            "month_over_month",
+            "You spent 120.00 on Food in April 2024, up 20.0% (+20.00) from 100.00 in March 2024.",
+        ),
+    ],
+)
+def test_router_answers_catalogue(router, question, intent, answer):
+    """Test that each question shape is answered from its SQL template."""
+    result = router.answer(question)
+
+    assert result is not None
+    assert result.intent == intent
+    assert result.answer == answer
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Which transactions look like subscriptions?",
+        "How much did I spend on Food and Transport?",
+        "How much did I spend at Blockbuster?",
+        "How much did I spend per day last week?",
+        "hello",
+        "How much more did I spend on food this year than last year?",
+        "How much did I spend on food in 2024 compared to 2023?",
+        "How much did I spend on Food in March compared to February?",
+        "How much did I spend on food last month versus this month?",
+        "How much did I spend on food not counting IFOOD?",
+        "How much did I spend since January?",
+        "How much did I spend in the first quarter?",
+        "How much did I spend before March?",
+        "How much did I spend on transport in march last year?",
+        "How much did I pay in fees last month?",
+    ],
+)
+def test_router_falls_back_to_agent(router, question):
+    """Test that unsupported, ambiguous, partly understood or unknown questions go to the agent."""
+    assert router.answer(question) is None
+
+
+def test_router_resolves_merchants_by_normalized_key(tmp_path):
+    """Test that merchant names match whole keys and ambiguous names go to the agent."""
+    rows = [
+        *ROWS,
+        (date(2024, 3, 20), "PADARIA REAL 0042 SAO PAULO", "Food", -5.0),
+        (date(2024, 3, 21), "Padaria Bom Pao", "Food", -7.0),
+        (date(2024, 3, 22), "Foodland", "Food", -9.0),
+    ]
+    router = FastPathRouter(make_engine(tmp_path / "merchants.db", rows), today=lambda: TODAY)
+
+    padaria_real = router.answer("How much did I spend at padaria real?")
+    uber = router.answer("How much did I spend at Uber?")
+
+    assert padaria_real.answer == "You spent 25.00 at PADARIA REAL 0042 SAO PAULO overall."
+    assert uber.answer == "You spent 50.00 at Uber Trip overall."
+    assert router.answer("How much did I spend at padaria?") is None
+    assert router.answer("How much did I spend at ood?") is None
+
+
+def test_router_stats(router):
+    """Test hit-rate, per-intent and per-path latency counters."""
+    router.answer("How much did I spend last month?")
+    router.answer("Which merchants are subscriptions?")
+    router.record("total", 0.002)
+    router.record("agent", 1.5)
+
+    stats = router.stats()
+
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert stats["intents"] == {"total": 1}
+    assert stats["latency"]["agent"] == {"count": 1, "mean_ms": 1500.0, "max_ms": 1500.0}
+
+
+def test_analyst_answers_from_fast_path_without_llm(engine):
+    """Test that the analyst answers fast-path questions without invoking its agent."""
+    analyst = AnalystAgent(engine)
+    analyst.router.today = lambda: TODAY
+    analyst.agent = None
+
+    answer = asyncio.run(analyst.arespond("How much did I spend on Transport in April?"))
+
+    assert answer == "You spent 14.50 on Transport in April 2024."
+    assert analyst.router.stats()["latency"]["total"]["count"] == 1
+
+
+def test_normalize_question():
+    """Test that case, accents and punctuation are dropped."""
+    assert normalize_question("  Quanto gastei em AÇAÍ?! ") == "quanto gastei em acai"
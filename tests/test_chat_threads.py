@@ -0,0 +1,161 @@
+"""Tests for chat thread state and follow-up questions."""
+
+import asyncio
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from pydantic import Field
+from sqlalchemy import create_engine
+
+from src.database import init_db, save_transactions
+from src.graphs import AnalystAgent, ChatThreadStore
+
+
+class RecordingFakeModel(GenericFakeChatModel):
+    """Fake chat model remembering the messages of every call."""
+
+    calls: list = Field(default_factory=list)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(list(messages))
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def query_call(query: str, call_id: str) -> AIMessage:
+    return AIMessage(
+        "", tool_calls=[{"name": "sql_db_query", "args": {"query": query}, "id": call_id}]
+    )
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create a database with two months of transactions."""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'threads.db'}")
+    init_db(db_engine)
+    save_transactions(
+        [
+            {
+                "transaction_date": day,
+                "merchant": merchant,
+                "description": merchant,
+                "amount": amount,
+                "category": "Food",
+                "source_file": "statement.csv",
+            }
+            for day, merchant, amount in [
+                (date(2024, 2, 3), "IFOOD", -50.0),
+                (date(2024, 3, 5), "Padaria Real", -80.0),
+            ]
+        ],
+        db_engine,
+    )
+    return db_engine
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ChatThreadStore(str(tmp_path / "threads" / "chat.db"), ttl_seconds=3600)
+
+
+def test_store_round_trips_messages_with_tool_calls(store):
+    """Test that questions, queries, results and answers survive a reload."""
+    messages = [
+        HumanMessage("Top merchant?"),
+        query_call("SELECT 1", "call-1"),
+        ToolMessage("[(1,)]", tool_call_id="call-1", name="sql_db_query"),
+        AIMessage("IFOOD"),
+    ]
+
+    store.save("t-1", messages)
+    loaded = store.load("t-1")
+
+    assert [type(m) for m in loaded] == [type(m) for m in messages]
+    assert loaded[1].tool_calls[0]["args"] == {"query": "SELECT 1"}
+    assert loaded[2].content == "[(1,)]"
+    assert store.load("unknown") == []
+    assert store.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1}
+
+
+def test_store_trims_to_whole_recent_turns(tmp_path):
+    """Test that trimming keeps the latest turns and never starts on a tool result."""
+    store = ChatThreadStore(str(tmp_path / "chat.db"), ttl_seconds=3600, max_tokens=60)
+    messages = [
+        HumanMessage("Spending by merchant?"),
+        query_call("SELECT merchant, SUM(amount) FROM transactions GROUP BY 1", "call-1"),
+        ToolMessage("x" * 400, tool_call_id="call-1", name="sql_db_query"),
+        AIMessage("IFOOD leads."),
+        HumanMessage("And in March?"),
+        AIMessage("Padaria Real."),
+    ]
+
+    store.save("t-1", messages)
+
+    assert [m.content for m in store.load("t-1")] == ["And in March?", "Padaria Real."]
+
+
+def test_store_expires_threads(tmp_path):
+    """Test that threads are gone once their TTL has passed."""
+    store = ChatThreadStore(str(tmp_path / "chat.db"), ttl_seconds=-1)
+
+    store.save("t-1", [HumanMessage("Hi"), AIMessage("Hello")])
+
+    assert store.load("t-1") == []
+    assert store.stats()["size"] == 0
+
+
+def test_follow_up_question_sees_earlier_results(engine, store):
+    """Test that a follow-up is answered with the thread's previous queries in context."""
+    model = RecordingFakeModel(
+        messages=iter(
+            [
+                query_call("SELECT merchant, SUM(amount) FROM transactions GROUP BY 1", "call-1"),
+                AIMessage("You spent most at Padaria Real."),
+                AIMessage("In March it was Padaria Real, 80.00."),
+            ]
+        )
+    )
+    with patch("src.graphs.chat.get_llm", return_value=model):
+        analyst = AnalystAgent(engine, fast_path=False, threads=store)
+
+    async def converse() -> list[str]:
+        first = await analyst.arespond("Where did I spend the most?", thread_id="t-1")
+        second = await analyst.arespond("And in March?", thread_id="t-1")
+        return [first, second]
+
+    answers = asyncio.run(converse())
+
+    assert answers[1] == "In March it was Padaria Real, 80.00."
+    follow_up_prompt = model.calls[-1]
+    tool_results = [m for m in follow_up_prompt if isinstance(m, ToolMessage)]
+    assert "Padaria Real" in tool_results[0].content
+    assert follow_up_prompt[-1].content == "And in March?"
+    assert len(store.load("t-1")) == 6
+
+
+def test_threads_are_isolated_and_include_fast_path_answers(engine, store):
+    """Test that fast-path answers join the thread and other threads start empty."""
+    model = RecordingFakeModel(messages=iter([AIMessage("No earlier question.")]))
+    with patch("src.graphs.chat.get_llm", return_value=model):
+        analyst = AnalystAgent(engine, threads=store)
+    analyst.router.today = lambda: date(2024, 4, 10)
+
+    async def converse() -> None:
+        async for _ in analyst.astream_response("How much did I spend in March?", "t-1"):
+            pass
+        async for _ in analyst.astream_response("What did I ask before?", "t-2"):
+            pass
+
+    asyncio.run(converse())
+
+    assert [m.content for m in store.load("t-1")] == [
+        "How much did I spend in March?",
+        "You spent 80.00 in March 2024.",
+    ]
+    assert [m.content for m in model.calls[0][1:]] == ["What did I ask before?"]
+    assert len(store.load("t-2")) == 2
@@ -0,0 +1,88 @@
+"""Tests for the cached company search used by the categorizer."""
+
+import asyncio
+import time
+
+from src.graphs.nodes.categorizer_node import (
+    CompanySearch,
+    FakeSearchBackend,
+    SearchCache,
+    create_categorizer_tools,
+)
+
+
+def test_identical_inflight_queries_are_coalesced():
+    """Test that concurrent identical queries share one backend call."""
+    backend = FakeSearchBackend(delay=0.05)
+    search = CompanySearch(backend)
+
+    async def scenario():
+        return await asyncio.gather(*(search.search("iFood ") for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert len(backend.calls) == 1
+    assert all(result == results[0] for result in results)
+    assert search.stats()["coalesced"] == 4
+
+
+def test_results_are_cached_on_disk(tmp_path):
+    """Test that a cached result is reused by a new instance."""
+    path = str(tmp_path / "search.db")
+    backend = FakeSearchBackend({"Uber": {"results": ["ride sharing"]}})
+
+    asyncio.run(CompanySearch(backend, SearchCache(path, ttl_seconds=60)).search("Uber"))
+    search = CompanySearch(backend, SearchCache(path, ttl_seconds=60))
+    result = asyncio.run(search.search("  UBER"))
+
+    assert result == {"results": ["ride sharing"]}
+    assert len(backend.calls) == 1
+    assert search.stats()["hits"] == 1
+    assert search.stats()["size"] == 1
+
+
+def test_expired_results_are_refetched(tmp_path):
+    """Test that entries past their TTL are not served."""
+    backend = FakeSearchBackend()
+    search = CompanySearch(backend, SearchCache(str(tmp_path / "search.db"), ttl_seconds=0))
+
+    asyncio.run(search.search("Netflix"))
+    asyncio.run(search.search("Netflix"))
+
+    assert len(backend.calls) == 2
+
+
+def test_errors_are_not_cached(tmp_path):
+    """Test that backend error payloads are not stored."""
+    backend = FakeSearchBackend({"Acme": {"error": "rate limited"}})
+    search = CompanySearch(backend, SearchCache(str(tmp_path / "search.db"), ttl_seconds=60))
+
+    asyncio.run(search.search("Acme"))
+
+    assert search.stats()["size"] == 0
+
+
+def test_rate_limit_spaces_backend_calls():
+    """Test that distinct queries respect the per-process rate limit."""
+    backend = FakeSearchBackend()
+    search = CompanySearch(backend, rate_limit=50.0)
+
+    async def scenario():
+        await asyncio.gather(*(search.search(f"merchant {i}") for i in range(5)))
+
+    start = time.monotonic()
+    asyncio.run(scenario())
+
+    assert time.monotonic() - start >= 4 / 50.0
+    assert len(backend.calls) == 5
+
+
+def test_search_company_tool_uses_company_search():
+    """Test that the agent tool goes through the cached search."""
+    backend = FakeSearchBackend({"Spotify": {"results": ["music streaming"]}})
+    tools = create_categorizer_tools(CompanySearch(backend))
+
+    result = asyncio.run(tools[0].ainvoke({"query": "Spotify"}))
+
+    assert tools[0].name == "search_company"
+    assert "music streaming" in str(result)
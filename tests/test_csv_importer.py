@@ -0,0 +1,159 @@
+"""Tests for the deterministic CSV importer."""
+
+import io
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from src.parsers.csv_importer import CsvProfile, import_csv, sniff_profile
+
+
+@pytest.fixture
+def write_csv():
+    """Write CSV content to a temporary file and clean it up afterwards."""
+    paths = []
+
+    def _write(content: str) -> str:
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(content)
+            paths.append(f.name)
+            return f.name
+
+    yield _write
+
+    for path in paths:
+        Path(path).unlink(missing_ok=True)
+
+
+def test_import_from_binary_handle():
+    """Test that an open binary handle (e.g. a spooled upload) is imported in place."""
+    handle = io.BytesIO("\ufeffdate,description,amount\n2024-01-15,Grocery Store,-85.50\n".encode())
+    handle.seek(10)
+
+    transactions = import_csv(handle)
+
+    assert transactions is not None
+    assert [t.merchant for t in transactions] == ["Grocery Store"]
+
+
+def test_import_generic_layout(write_csv):
+    """Test that a plain date/description/amount export is imported."""
+    path = write_csv("date,description,amount\n2024-01-15,Grocery Store,-85.50\n")
+
+    transactions = import_csv(path)
+
+    assert transactions is not None
+    assert len(transactions) == 1
+    assert transactions[0].transaction_date == date(2024, 1, 15)
+    assert transactions[0].merchant == "Grocery Store"
+    assert transactions[0].amount == -85.50
+    assert transactions[0].category == "Other"
+
+
+def test_import_credit_card_negates_purchases(write_csv):
+    """Test that card exports listing purchases as positive are negated."""
+    path = write_csv("date,title,amount\n2024-02-01,Uber *Trip,23.90\n2024-02-03,Pagamento,-500\n")
+
+    transactions = import_csv(path)
+
+    assert [t.amount for t in transactions] == [-23.90, 500.0]
+
+
+def test_import_semicolon_comma_decimal_layout(write_csv):
+    """Test day-first dates, ';' separators and Brazilian number formatting."""
+    path = write_csv(
+        "Data Lançamento;Histórico;Descrição;Valor;Saldo\n"
+        "05/03/2024;Compra no debito;SUPERMERCADO X;-1.234,56;100,00\n"
+        "06/03/2024;Pix recebido;Fulano;200,00;300,00\n"
+    )
+
+    transactions = import_csv(path)
+
+    assert transactions[0].transaction_date == date(2024, 3, 5)
+    assert transactions[0].amount == -1234.56
+    assert transactions[0].merchant == "Compra no debito"
+    assert transactions[0].description == "SUPERMERCADO X"
+    assert transactions[1].amount == 200.0
+
+
+def test_import_latin1_export(tmp_path):
+    """Test that a bank export in latin-1 is decoded with its profile's encoding."""
+    path = tmp_path / "inter.csv"
+    path.write_bytes(
+        "Data Lançamento;Histórico;Descrição;Valor;Saldo\n"
+        "05/03/2024;Compra no débito;PADARIA SÃO JOÃO;-12,50;100,00\n".encode("latin-1")
+    )
+
+    transactions = import_csv(str(path))
+
+    assert transactions is not None
+    assert transactions[0].merchant == "Compra no débito"
+    assert transactions[0].description == "PADARIA SÃO JOÃO"
+    assert transactions[0].amount == -12.50
+
+
+def test_undecodable_file_falls_back_to_agent(tmp_path):
+    """Test that a file its profile cannot decode is left to the extractor agent."""
+    path = tmp_path / "export.csv"
+    path.write_bytes("date,description,amount\n2024-01-15,Açaí,-5\n".encode("latin-1"))
+
+    assert import_csv(str(path)) is None
+
+
+def test_malformed_file_falls_back_to_agent(write_csv):
+    """Test that rows read_csv cannot parse send the file to the extractor agent."""
+    path = write_csv('date,description,amount\n2024-01-15,Coffee,-5\n2024-01-16,"Tea,-3,1,2\n')
+
+    assert import_csv(path) is None
+
+
+def test_import_debit_credit_columns(write_csv):
+    """Test that separate debit and credit columns become signed amounts."""
+    path = write_csv(
+        "date,description,debit,credit\n2024-01-01,Rent,1500,\n2024-01-02,Salary,,5000\n"
+    )
+
+    transactions = import_csv(path)
+
+    assert [t.amount for t in transactions] == [-1500.0, 5000.0]
+
+
+def test_import_skips_unparseable_rows(write_csv):
+    """Test that totals and balance rows without a valid date are dropped."""
+    path = write_csv("date,description,amount\n2024-01-15,Coffee,-5\nTotal,,-5\n")
+
+    transactions = import_csv(path)
+
+    assert len(transactions) == 1
+
+
+def test_unknown_layout_returns_none(write_csv):
+    """Test that unrecognized layouts fall back to the extractor agent."""
+    path = write_csv("when,what,how much\n2024-01-15,Coffee,-5\n")
+
+    assert sniff_profile(path) is None
+    assert import_csv(path) is None
+
+
+def test_profile_requires_amount_columns():
+    """Test that a profile without any amount mapping is rejected."""
+    with pytest.raises(ValueError):
+        CsvProfile(name="broken", date_column="date", description_column="description")
+
+
+def test_import_large_file_is_fast(write_csv):
+    """Test that a 10k-row export imports well under a second."""
+    rows = "\n".join(f"2024-01-{i % 28 + 1:02d},Merchant {i},-{i % 500}.25" for i in range(10_000))
+    path = write_csv("date,description,amount\n" + rows + "\n")
+
+    start = time.perf_counter()
+    transactions = import_csv(path)
+    elapsed = time.perf_counter() - start
+
+    assert len(transactions) == 10_000
+    assert elapsed < 1.0
@@ -1,9 +1,20 @@
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
-from sqlalchemy import create_engine, select
+from sqlalchemy import create_engine, inspect, select, text
 from sqlalchemy.orm import Session
 
-from src.database import TransactionModel, init_db, save_transactions
+from src.database import (
+    TransactionModel,
+    create_db_engine,
+    get_category_totals,
+    get_daily_totals,
+    get_merchant_totals,
+    init_db,
+    rebuild_rollups,
+    save_transactions,
+    transaction_fingerprints,
+)
 
 
 def test_save_transaction():
@@ -29,3 +40,176 @@ def test_save_transaction():
         assert result.merchant == "Grocery Store"
         assert result.amount == -85.50
         assert result.transaction_date == date(2024, 1, 15)
+
+
+def make_rows() -> list[dict]:
+    return [
+        {
+            "transaction_date": date(2024, 1, 15),
+            "merchant": "Grocery Store",
+            "description": "Weekly groceries",
+            "amount": -85.50,
+            "category": "Food",
+            "source_file": "statement_jan.pdf",
+        },
+        {
+            "transaction_date": date(2024, 1, 20),
+            "merchant": "Grocery Store",
+            "description": "Groceries",
+            "amount": -14.50,
+            "category": "Food",
+            "source_file": "statement_jan.pdf",
+        },
+        {
+            "transaction_date": date(2024, 2, 1),
+            "merchant": "Employer",
+            "description": "Salary",
+            "amount": 3000.0,
+            "category": "Income",
+            "source_file": "statement_feb.pdf",
+        },
+    ]
+
+
+def test_save_transactions_maintains_rollups():
+    """Test that monthly and daily rollups are updated incrementally on save."""
+    engine = create_engine("sqlite:///:memory:")
+    init_db(engine)
+
+    rows = make_rows()
+    save_transactions(rows[:1], engine)
+    save_transactions(rows[1:], engine)
+
+    food = get_category_totals(category="Food", db_engine=engine)
+    assert food == [
+        {
+            "month": "2024-01",
+            "category": "Food",
+            "total": -100.0,
+            "income": 0.0,
+            "expenses": -100.0,
+            "transaction_count": 2,
+        }
+    ]
+
+    merchants = get_merchant_totals(db_engine=engine)
+    assert merchants[0]["merchant"] == "Grocery Store"
+    assert merchants[0]["transaction_count"] == 2
+
+    daily = get_daily_totals(start_date=date(2024, 2, 1), db_engine=engine)
+    assert [(d["day"], d["income"]) for d in daily] == [(date(2024, 2, 1), 3000.0)]
+
+
+def test_rebuild_rollups_matches_incremental():
+    """Test that a full rebuild produces the same rollups as incremental updates."""
+    engine = create_engine("sqlite:///:memory:")
+    init_db(engine)
+    save_transactions(make_rows(), engine)
+    incremental = get_category_totals(db_engine=engine)
+
+    rebuild_rollups(engine)
+
+    assert get_category_totals(db_engine=engine) == incremental
+    assert get_category_totals(start_date=date(2024, 2, 10), db_engine=engine) == [
+        row for row in incremental if row["month"] == "2024-02"
+    ]
+
+
+def test_save_transactions_is_idempotent():
+    """Test that re-saving rows inserts nothing and recategorizing moves the rollups."""
+    engine = create_engine("sqlite:///:memory:")
+    init_db(engine)
+    rows = make_rows()
+
+    assert save_transactions(rows, engine) == 3
+    assert save_transactions(rows, engine) == 0
+
+    rows[0]["category"] = "Groceries"
+    assert save_transactions(rows, engine) == 0
+
+    with Session(engine) as session:
+        assert len(session.execute(select(TransactionModel)).all()) == 3
+    assert [
+        (r["category"], r["total"])
+        for r in get_category_totals(end_date=date(2024, 1, 31), db_engine=engine)
+    ] == [("Food", -14.5), ("Groceries", -85.5)]
+
+
+def test_recategorizing_keeps_stored_values_in_rollups():
+    """Test that rollups follow the stored row when a re-upload differs only in formatting."""
+    engine = create_engine("sqlite:///:memory:")
+    init_db(engine)
+    rows = make_rows()
+    save_transactions(rows, engine)
+
+    reuploaded = [
+        {**row, "merchant": row["merchant"].upper(), "amount": row["amount"] + 0.001}
+        for row in rows
+    ]
+    reuploaded[0]["category"] = "Groceries"
+    save_transactions(reuploaded, engine)
+
+    incremental = get_merchant_totals(db_engine=engine)
+    rebuild_rollups(engine)
+    assert get_merchant_totals(db_engine=engine) == incremental
+    assert {r["merchant"] for r in incremental} == {"Grocery Store", "Employer"}
+
+
+def test_concurrent_saves_of_the_same_rows_are_idempotent(tmp_path):
+    """Test that overlapping saves of one statement insert each row exactly once."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pfm.db'}")
+    init_db(engine)
+    rows = [
+        {
+            "transaction_date": date(2024, 1, 1) + timedelta(days=i % 300),
+            "merchant": f"Shop {i}",
+            "description": f"Purchase {i}",
+            "amount": -float(i + 1),
+            "category": "Shopping",
+            "source_file": "statement.csv",
+        }
+        for i in range(2000)
+    ]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        inserted = list(pool.map(lambda _: save_transactions(rows, engine), range(4)))
+
+    assert sum(inserted) == 2000
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM transactions")).scalar_one() == 2000
+    assert sum(r["transaction_count"] for r in get_category_totals(db_engine=engine)) == 2000
+
+
+def test_identical_rows_in_one_statement_are_kept():
+    """Test that repeated purchases within a statement get distinct fingerprints."""
+    coffee = {
+        "transaction_date": date(2024, 1, 3),
+        "merchant": "Cafe",
+        "description": "Coffee",
+        "amount": -5.0,
+        "category": "Food",
+        "source_file": "statement_jan.pdf",
+    }
+    fingerprints = transaction_fingerprints([coffee, dict(coffee)])
+    assert fingerprints[0] != fingerprints[1]
+
+    engine = create_engine("sqlite:///:memory:")
+    init_db(engine)
+    assert save_transactions([coffee, dict(coffee)], engine) == 2
+
+
+def test_file_database_uses_wal_and_indexes(tmp_path):
+    """Test that engines use WAL and the transactions table gets secondary indexes."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pfm.db'}")
+    init_db(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar_one() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar_one() == 1  # NORMAL
+
+    indexed = {
+        column
+        for index in inspect(engine).get_indexes("transactions")
+        for column in index["column_names"]
+    }
+    assert {"transaction_date", "category", "merchant", "source_file"} <= indexed
@@ -0,0 +1,91 @@
+"""Tests for chunked extraction helpers."""
+
+from datetime import date
+
+from src.graphs.nodes.extractor_node.chunking import (
+    LineChunker,
+    chunk_lines,
+    estimate_tokens,
+    merge_transaction_lists,
+)
+from src.models import Transaction
+
+
+def make_transaction(day: int, merchant: str, amount: float) -> Transaction:
+    return Transaction(
+        transaction_date=date(2024, 1, day),
+        merchant=merchant,
+        description=merchant,
+        amount=amount,
+        category="Other",
+    )
+
+
+def test_chunk_lines_respects_budget_and_overlap():
+    """Test that chunks fit the budget and share the configured overlap."""
+    lines = [f"2024-01-{i:02d} Merchant {i} -10.00" for i in range(1, 29)]
+    budget = estimate_tokens(lines[0]) * 10
+
+    chunks = chunk_lines(lines, max_tokens=budget, overlap_lines=2)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= budget + 10 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.splitlines()[-2:] == current.splitlines()[:2]
+    assert chunks[-1].splitlines()[-1] == lines[-1]
+
+
+def test_chunk_lines_single_chunk_when_small():
+    """Test that a short document becomes one chunk."""
+    assert chunk_lines(["a", "b", "c"], max_tokens=1000, overlap_lines=2) == ["a\nb\nc"]
+
+
+def test_chunk_lines_oversized_line():
+    """Test that a line exceeding the budget still makes progress."""
+    chunks = chunk_lines(["x" * 400, "y"], max_tokens=10, overlap_lines=1)
+
+    assert chunks == ["x" * 400, "y"]
+
+
+def test_chunk_lines_drops_overlap_that_does_not_fit():
+    """Test that a long line after a full chunk never yields overlap-only chunks."""
+    short = ["a" * 36] * 4
+    long_line = "b" * 120
+
+    chunks = chunk_lines([*short, long_line, "c"], max_tokens=40, overlap_lines=3)
+
+    assert chunks == ["\n".join(short), f"{long_line}\nc"]
+
+
+def test_line_chunker_matches_chunk_lines_when_fed_by_page():
+    """Test that feeding pages incrementally yields the same chunks as a single pass."""
+    lines = [f"2024-01-{i % 28 + 1:02d} Merchant {i} -{i}.00" for i in range(60)]
+    budget = estimate_tokens(lines[0]) * 7
+
+    chunker = LineChunker(max_tokens=budget, overlap_lines=2)
+    streamed: list[str] = []
+    for page_start in range(0, len(lines), 9):
+        streamed.extend(chunker.add(lines[page_start : page_start + 9]))
+    streamed.extend(chunker.flush())
+
+    assert streamed == chunk_lines(lines, max_tokens=budget, overlap_lines=2)
+
+
+def test_merge_removes_boundary_duplicates_only():
+    """Test that overlap duplicates are removed while real repeats are kept."""
+    coffee = make_transaction(2, "Coffee", -5.0)
+    first = [make_transaction(1, "Rent", -1000.0), coffee, coffee]
+    second = [coffee, make_transaction(3, "Uber", -20.0)]
+
+    merged = merge_transaction_lists([first, second])
+
+    assert [t.merchant for t in merged] == ["Rent", "Coffee", "Coffee", "Uber"]
+
+
+def test_merge_preserves_order_without_overlap():
+    """Test that chunks without shared transactions are concatenated in order."""
+    chunks = [[make_transaction(1, "A", -1.0)], [], [make_transaction(2, "B", -2.0)]]
+
+    merged = merge_transaction_lists(chunks)
+
+    assert [t.merchant for t in merged] == ["A", "B"]
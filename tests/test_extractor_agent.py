@@ -1,15 +1,23 @@
 """Tests for the extractor agent tools."""
 
+import asyncio
 import tempfile
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock
 
 from src.graphs.nodes.extractor_node.tools import create_extractor_tools
+from src.parsers.ocr_client import OCRDocument, OCRPage
+
+
+def make_ocr_client(return_value=None) -> MagicMock:
+    ocr_client = MagicMock()
+    ocr_client.send_pdf = AsyncMock(return_value=return_value)
+    return ocr_client
 
 
 def test_create_extractor_tools():
     """Test that extractor tools are created correctly."""
-    tools = create_extractor_tools()
+    tools = create_extractor_tools(make_ocr_client())
 
     assert len(tools) == 2
 
@@ -20,7 +28,7 @@ def test_create_extractor_tools():
 
 def test_load_csv_tool():
     """Test that the CSV tool loads files correctly."""
-    tools = create_extractor_tools()
+    tools = create_extractor_tools(make_ocr_client())
     csv_tool = next(t for t in tools if t.name == "load_csv_file")
 
     csv_content = "date,description,amount\n2024-01-15,Grocery Store,-85.50"
@@ -30,7 +38,7 @@ def test_load_csv_tool():
         temp_path = f.name
 
     try:
-        result = csv_tool.invoke({"file_path": temp_path})
+        result = asyncio.run(csv_tool.ainvoke({"file_path": temp_path}))
 
         assert "date" in result
         assert "description" in result
@@ -41,25 +49,20 @@ def test_load_csv_tool():
 
 
 def test_load_pdf_tool_calls_ocr_service():
-    """Test that the PDF tool calls the OCR service."""
-    from unittest.mock import AsyncMock
-
-    # Need to patch before creating tools since load_pdf is imported at module level
-    with patch(
-        "src.graphs.nodes.extractor_node.tools.load_pdf",
-        new_callable=AsyncMock,
-        return_value="Extracted PDF content",
-    ) as mock_load_pdf:
-        tools = create_extractor_tools()
-        pdf_tool = next(t for t in tools if t.name == "load_pdf_file")
-
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
-            temp_path = f.name
-
-        try:
-            result = pdf_tool.invoke({"file_path": temp_path})
-
-            assert result == "Extracted PDF content"
-            mock_load_pdf.assert_called_once_with(temp_path)
-        finally:
-            Path(temp_path).unlink()
+    """Test that the PDF tool awaits the OCR client on the caller's loop."""
+    ocr_client = make_ocr_client(
+        return_value=OCRDocument(pages=[OCRPage(texts=["a", "b"], tsv="01/02\tBakery\t-5,00")])
+    )
+    tools = create_extractor_tools(ocr_client)
+    pdf_tool = next(t for t in tools if t.name == "load_pdf_file")
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        temp_path = f.name
+
+    try:
+        result = asyncio.run(pdf_tool.ainvoke({"file_path": temp_path}))
+
+        assert result == "01/02\tBakery\t-5,00"
+        ocr_client.send_pdf.assert_awaited_once_with(temp_path)
+    finally:
+        Path(temp_path).unlink()
@@ -0,0 +1,87 @@
+"""Tests for the in-process processing job queue."""
+
+import asyncio
+
+import pytest
+
+from src.api.jobs import JobQueue, JobStatus, QueueFullError
+
+
+def test_job_queue_runs_jobs_concurrently():
+    """Test that workers run up to their pool size in parallel."""
+
+    async def scenario():
+        queue = JobQueue(workers=3, max_size=10)
+        await queue.start()
+        running = 0
+        peak = 0
+
+        async def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "done"
+
+        jobs = [queue.submit(f"file{i}.csv", work) for i in range(6)]
+        await queue._queue.join()
+        await queue.stop()
+        return jobs, peak
+
+    jobs, peak = asyncio.run(scenario())
+
+    assert peak == 3
+    assert all(job.status == JobStatus.COMPLETED for job in jobs)
+    assert all(job.result == "done" for job in jobs)
+
+
+def test_job_queue_rejects_when_full():
+    """Test that submitting beyond the queue size raises QueueFullError."""
+
+    async def scenario():
+        queue = JobQueue(workers=1, max_size=1)
+
+        async def work():
+            return None
+
+        queue.submit("a.csv", work)
+        with pytest.raises(QueueFullError):
+            queue.submit("b.csv", work)
+
+    asyncio.run(scenario())
+
+
+def test_job_queue_drops_events_once_finished():
+    """Test that live followers get every event and finished jobs keep none."""
+
+    async def scenario():
+        queue = JobQueue(workers=1, max_size=1)
+        await queue.start()
+        release = asyncio.Event()
+
+        async def work():
+            queue.publish(job, "extracted")
+            await release.wait()
+            queue.publish(job, "saved")
+            return "done"
+
+        job = queue.submit("a.csv", work)
+        followed = []
+
+        async def follow():
+            async for event in queue.follow(job):
+                followed.append(event)
+                release.set()
+
+        await follow()
+        late = [event async for event in queue.follow(job)]
+        await queue.stop()
+        return job, followed, late
+
+    job, followed, late = asyncio.run(scenario())
+
+    assert followed == ["extracted", "saved"]
+    assert late == []
+    assert job.events == []
+    assert job.result == "done"
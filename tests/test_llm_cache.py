@@ -0,0 +1,84 @@
+"""Tests for the SQLite LLM response cache."""
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from src.llm import SQLiteLLMCache
+
+
+@tool
+def lookup_merchant(name: str) -> str:
+    """Look up a merchant."""
+    return name
+
+
+def make_model(cache: SQLiteLLMCache, *contents: str) -> FakeMessagesListChatModel:
+    responses = [
+        AIMessage(
+            content,
+            usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12},
+        )
+        for content in contents
+    ]
+    return FakeMessagesListChatModel(responses=responses, cache=cache)
+
+
+def test_repeated_prompt_is_served_from_cache(tmp_path):
+    """Test that an identical prompt skips the model and counts the saved tokens."""
+    cache = SQLiteLLMCache(str(tmp_path / "llm.db"), ttl_seconds=60)
+    model = make_model(cache, "first", "second")
+
+    assert model.invoke("Categorize IFOOD").content == "first"
+    assert model.invoke("Categorize IFOOD").content == "first"
+    assert model.invoke("Categorize UBER").content == "second"
+
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": 1 / 3,
+        "size": 2,
+        "tokens_saved": 12,
+    }
+
+
+def test_cache_persists_across_instances(tmp_path):
+    """Test that a new process reading the same file reuses stored responses."""
+    path = str(tmp_path / "llm.db")
+    make_model(SQLiteLLMCache(path, ttl_seconds=60), "stored").invoke("hello")
+
+    cache = SQLiteLLMCache(path, ttl_seconds=60)
+    reply = make_model(cache, "fresh").invoke("hello")
+
+    assert reply.content == "stored"
+    assert reply.usage_metadata["total_tokens"] == 12
+    assert cache.stats()["hits"] == 1
+
+
+def test_bound_tools_are_part_of_the_key(tmp_path):
+    """Test that the same messages with different tool schemas are separate entries."""
+    cache = SQLiteLLMCache(str(tmp_path / "llm.db"), ttl_seconds=60)
+    model = make_model(cache, "plain", "with tools")
+
+    assert model.invoke("hi").content == "plain"
+    assert (
+        model.bind(tools=[lookup_merchant.tool_call_schema.model_json_schema()])
+        .invoke("hi")
+        .content
+        == "with tools"
+    )
+
+
+def test_expired_and_evicted_entries_are_misses(tmp_path):
+    """Test the TTL and the least-recently-used size bound."""
+    expired = SQLiteLLMCache(str(tmp_path / "expired.db"), ttl_seconds=0)
+    model = make_model(expired, "a", "b")
+    model.invoke("hi")
+    assert model.invoke("hi").content == "b"
+
+    bounded = SQLiteLLMCache(str(tmp_path / "bounded.db"), ttl_seconds=60, max_entries=1)
+    model = make_model(bounded, "a", "b", "c")
+    model.invoke("one")
+    model.invoke("two")
+    assert bounded.stats()["size"] == 1
+    assert model.invoke("one").content == "c"
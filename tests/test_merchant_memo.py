@@ -0,0 +1,195 @@
+"""Tests for the merchant category memo."""
+
+import asyncio
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.database import MerchantCategoryModel, get_merchant_categories, init_db
+from src.graphs.nodes.categorizer_node import (
+    CompanySearch,
+    FakeSearchBackend,
+    MerchantCategoryMemo,
+    build_categorizer_node,
+    normalize_merchant,
+)
+from src.graphs.nodes.node_saver import build_saver_node
+from src.models import CategoryChange, CategoryChanges, Transaction
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create a file-backed database usable from worker threads."""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'memo.db'}")
+    init_db(db_engine)
+    return db_engine
+
+
+def make_transaction(merchant: str, category: str = "Other") -> Transaction:
+    return Transaction(
+        transaction_date=date(2024, 1, 15),
+        merchant=merchant,
+        description=merchant,
+        amount=-10.0,
+        category=category,
+    )
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("Padaria São João #123 - SAO PAULO BR", "padaria sao joao"),
+        ("SUPERMERCADO EXTRA 1234 RJ", "supermercado extra"),
+        ("Uber *Trip Sao Paulo", "uber trip"),
+        ("UBER *TRIP", "uber trip"),
+    ],
+)
+def test_normalize_merchant(raw, expected):
+    """Test that merchant variants collapse to the same key."""
+    assert normalize_merchant(raw) == expected
+
+
+def test_memo_round_trip_and_stats(engine):
+    """Test that recorded categories are found for merchant variants."""
+    memo = MerchantCategoryMemo(engine)
+    memo.record({"UBER *TRIP": "Transport", "Mystery Shop": "Other"})
+
+    found = memo.lookup_many(["Uber *Trip Sao Paulo", "Mystery Shop"])
+
+    assert found == {"Uber *Trip Sao Paulo": "Transport"}
+    assert get_merchant_categories(["uber trip", "mystery shop"], engine) == {
+        "uber trip": "Transport"
+    }
+    assert memo.stats()["hits"] == 1
+    assert memo.stats()["misses"] == 1
+    assert memo.stats()["hit_rate"] == 0.5
+
+
+def test_memo_reads_through_to_database(engine):
+    """Test that a fresh memo finds categories persisted by another instance."""
+    MerchantCategoryMemo(engine).record({"Netflix": "Entertainment"})
+
+    memo = MerchantCategoryMemo(engine)
+
+    assert memo.lookup_many(["NETFLIX"]) == {"NETFLIX": "Entertainment"}
+    assert memo.stats()["size"] == 1
+
+
+def test_memo_lru_is_bounded(engine):
+    """Test that the in-memory layer evicts least recently used merchants."""
+    memo = MerchantCategoryMemo(engine, max_size=2)
+    memo.record({"Alpha": "Food", "Beta": "Food", "Gamma": "Food"})
+
+    assert memo.stats()["size"] == 2
+    assert memo.lookup_many(["Alpha"]) == {"Alpha": "Food"}
+
+
+def test_categorizer_only_sends_unknown_merchants(engine):
+    """Test that memo hits skip the agent and keep their position."""
+    memo = MerchantCategoryMemo(engine)
+    memo.record({"Supermarket": "Food"})
+
+    agent = MagicMock()
+    agent.ainvoke = AsyncMock(
+        return_value={
+            "structured_response": CategoryChanges(
+                changes=[CategoryChange(id=0, category="Health")]
+            )
+        }
+    )
+
+    with patch(
+        "src.graphs.nodes.categorizer_node.agent.build_categorizer_agent", return_value=agent
+    ):
+        node = build_categorizer_node(memo, CompanySearch(FakeSearchBackend()))
+
+    transactions = [make_transaction("SUPERMARKET"), make_transaction("Acme Pharma")]
+    result = asyncio.run(node({"transactions": transactions}))
+
+    prompt = agent.ainvoke.call_args.args[0]["messages"][0][1]
+    assert "Acme Pharma" in prompt
+    assert "SUPERMARKET" not in prompt
+    assert [t.category for t in result["transactions"]] == ["Food", "Health"]
+    assert result["category_sources"] == ["memo", "agent"]
+
+
+def test_saver_only_confirms_agent_reviewed_categories(engine):
+    """Test that a memo hit saved again does not bump its confirmations."""
+    memo = MerchantCategoryMemo(engine)
+    memo.record({"Supermarket": "Food"})
+    saver = build_saver_node(memo)
+    state = {
+        "file_path": "jan.csv",
+        "transactions": [
+            make_transaction("SUPERMARKET", "Food"),
+            make_transaction("Acme", "Health"),
+        ],
+        "category_sources": ["memo", "agent"],
+    }
+
+    with patch("src.graphs.nodes.node_saver.save_transactions"):
+        saver(state)
+        saver(state)
+
+    with Session(engine) as session:
+        confirmations = dict(
+            session.execute(
+                select(MerchantCategoryModel.merchant_key, MerchantCategoryModel.confirmations)
+            ).all()
+        )
+    assert confirmations == {"supermarket": 1, "acme": 2}
+
+
+def test_categorizer_skips_agent_when_all_known(engine):
+    """Test that the agent is not called when every merchant is known."""
+    memo = MerchantCategoryMemo(engine)
+    memo.record({"Supermarket": "Food"})
+    agent = MagicMock()
+    agent.ainvoke = AsyncMock()
+
+    with patch(
+        "src.graphs.nodes.categorizer_node.agent.build_categorizer_agent", return_value=agent
+    ):
+        node = build_categorizer_node(memo, CompanySearch(FakeSearchBackend()))
+
+    result = asyncio.run(node({"transactions": [make_transaction("Supermarket")]}))
+
+    agent.ainvoke.assert_not_called()
+    assert result["transactions"][0].category == "Food"
+
+
+def test_categorizer_applies_changes_by_id(engine):
+    """Test that only returned ids change and other fields are kept as extracted."""
+    memo = MerchantCategoryMemo(engine)
+    agent = MagicMock()
+    agent.ainvoke = AsyncMock(
+        return_value={
+            "structured_response": CategoryChanges(
+                changes=[
+                    CategoryChange(id=2, category="Transport"),
+                    CategoryChange(id=0, category="Food"),
+                    CategoryChange(id=7, category="Bills"),
+                ]
+            )
+        }
+    )
+
+    with patch(
+        "src.graphs.nodes.categorizer_node.agent.build_categorizer_agent", return_value=agent
+    ):
+        node = build_categorizer_node(memo, CompanySearch(FakeSearchBackend()))
+
+    transactions = [
+        make_transaction("Bakery").model_copy(update={"source_file": "jan.pdf"}),
+        make_transaction("Bookshop", "Shopping"),
+        make_transaction("Metro"),
+    ]
+    result = asyncio.run(node({"transactions": transactions}))
+
+    prompt = agent.ainvoke.call_args.args[0]["messages"][0][1]
+    assert "0\t2024-01-15\tBakery\t\t-10.00\tOther" in prompt
+    assert [t.category for t in result["transactions"]] == ["Food", "Shopping", "Transport"]
+    assert result["transactions"][0].source_file == "jan.pdf"
@@ -0,0 +1,140 @@
+"""Tests for the OCR service client."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.parsers.ocr_client import OCRClient, OCRDocument
+
+
+def make_client(handler) -> OCRClient:
+    transport = httpx.MockTransport(handler)
+    return OCRClient(httpx.AsyncClient(transport=transport, base_url="http://ocr"))
+
+
+async def collect(client: OCRClient, file_path: str) -> list[list[str]]:
+    try:
+        return [page.rows async for page in client.stream_pdf(file_path)]
+    finally:
+        await client.aclose()
+
+
+def test_stream_pdf_yields_pages(tmp_path):
+    """Test that NDJSON pages are yielded in order and the summary line is skipped."""
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.params["stream"] == "true"
+        assert request.url.params["layout"] == "true"
+        body = "\n".join(
+            json.dumps(line)
+            for line in [
+                {"page": 1, "texts": ["01/02", "Bakery", "-5,00"], "tsv": "01/02\tBakery\t-5,00"},
+                {"page": 2, "texts": ["c"]},
+                {"request_id": "x", "lines": 3, "pages": 2},
+            ]
+        )
+        return httpx.Response(200, content=body, headers={"content-type": "application/x-ndjson"})
+
+    pages = asyncio.run(collect(make_client(handler), str(pdf)))
+
+    assert pages == [["01/02\tBakery\t-5,00"], ["c"]]
+
+
+def test_stream_pdf_raises_on_service_error(tmp_path):
+    """Test that an error line from the service is raised after earlier pages."""
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.dumps({"page": 1, "texts": ["a"]}) + "\n" + json.dumps({"error": "boom"})
+        return httpx.Response(200, content=body)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(collect(make_client(handler), str(pdf)))
+
+
+def test_send_pdf_retries_transient_failures(tmp_path):
+    """Test that 503/429 responses and transport errors are retried until success."""
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.4 body")
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.read())
+        if len(attempts) == 1:
+            raise httpx.ConnectError("refused")
+        if len(attempts) == 2:
+            return httpx.Response(503)
+        if len(attempts) == 3:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"texts": ["ok"]})
+
+    client = make_client(handler)
+    client.retry_backoff = 0.0
+
+    async def run():
+        try:
+            return await client.send_pdf(str(pdf))
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()).rows == ["ok"]
+    assert len(attempts) == 4
+    assert all(b"%PDF-1.4 body" in body for body in attempts)
+
+
+def test_send_pdf_gives_up_after_max_retries(tmp_path):
+    """Test that persistent failures raise once retries are exhausted."""
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(502)
+
+    client = OCRClient(
+        httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://ocr"),
+        max_retries=2,
+        retry_backoff=0.0,
+    )
+
+    with pytest.raises(RuntimeError, match="HTTP 502"):
+        asyncio.run(client.send_pdf(str(pdf)))
+    assert len(calls) == 3
+
+
+def test_send_pdf_returns_layout(tmp_path):
+    """Test that send_pdf asks for layout and returns rows, boxes and flagged cells."""
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    page = {
+        "page": 1,
+        "source": "ocr",
+        "texts": ["01/02", "Bakery", "-5,00"],
+        "boxes": [[0, 0, 10, 5], [20, 0, 40, 5], [60, 0, 70, 5]],
+        "scores": [0.99, 0.98, 0.42],
+        "tsv": "01/02\tBakery\t-5,00[?]",
+        "low_confidence": [{"row": 0, "column": 2, "text": "-5,00", "score": 0.42}],
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.params["layout"] == "true"
+        return httpx.Response(200, json={"texts": page["texts"], "pages": [page]})
+
+    async def run() -> OCRDocument:
+        client = make_client(handler)
+        try:
+            return await client.send_pdf(str(pdf))
+        finally:
+            await client.aclose()
+
+    document = asyncio.run(run())
+
+    assert document.tsv == "01/02\tBakery\t-5,00[?]"
+    assert document.pages[0].scores[2] == 0.42
+    assert document.pages[0].low_confidence[0].text == "-5,00"
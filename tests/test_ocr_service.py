@@ -0,0 +1,66 @@
+"""Tests for the PaddleOCR service's request admission."""
+
+import asyncio
+import importlib.util
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+pytest.importorskip("paddleocr")
+pytest.importorskip("pdf2image")
+pytest.importorskip("cv2")
+
+APP_PATH = Path(__file__).parent.parent / "docker" / "paddle-ocr" / "app.py"
+
+
+@pytest.fixture
+def ocr_app():
+    """Load the OCR service module with a worker pool that is never started."""
+    spec = importlib.util.spec_from_file_location("paddle_ocr_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.pool = module.OCRWorkerPool(workers=1, batch_size=1, queue_size=4, batch_wait=0.0)
+    module.ready = True
+    return module
+
+
+class FakeUpload:
+    filename = "receipt.png"
+
+    def __init__(self, content: bytes) -> None:
+        self.file = io.BytesIO(content)
+
+
+def test_stream_released_when_client_disconnects_before_body(ocr_app):
+    """Test that the reservation and temp file are dropped if the body never starts."""
+    spooled = []
+    spool_upload = ocr_app.spool_upload
+
+    def spool_and_record(upload, ext):
+        file_path, file_hash = spool_upload(upload, ext)
+        spooled.append(Path(file_path))
+        return file_path, file_hash
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("connection closed")
+
+    async def scenario():
+        response = await ocr_app.ocr_file(FakeUpload(b"image"), stream=True, layout=False)
+        assert ocr_app.pool.reserved == 1
+        with pytest.raises((OSError, ClientDisconnect)):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+
+    with (
+        patch.object(ocr_app, "spool_upload", spool_and_record),
+        patch.object(ocr_app.cache, "get", return_value=None),
+    ):
+        asyncio.run(scenario())
+
+    assert ocr_app.pool.reserved == 0
+    assert not spooled[0].exists()
@@ -0,0 +1,117 @@
+"""Tests for the analyst agent's bounded SQL execution."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.database import init_db, save_transactions
+from src.graphs.sql_guard import BoundedSQLExecutor, build_sql_executor, table_aliases
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create a database with a few transactions."""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'guard.db'}")
+    init_db(db_engine)
+    save_transactions(
+        [
+            {
+                "transaction_date": date(2024, 3, day),
+                "merchant": f"Shop {day}",
+                "description": f"Shop {day}",
+                "amount": -10.0 * day,
+                "category": "Shopping",
+                "source_file": "march.csv",
+            }
+            for day in (1, 2, 3)
+        ],
+        db_engine,
+    )
+    return db_engine
+
+
+@pytest.fixture
+def executor(engine):
+    return build_sql_executor(engine)
+
+
+def test_executor_uses_a_read_only_pool(engine, executor):
+    """Test that the analyst pool is separate from the writer and cannot write."""
+    assert executor.engine is not engine
+
+    result = executor.run("WITH doomed AS (SELECT 1) DELETE FROM transactions")
+
+    assert result.startswith("Error:")
+    assert "readonly" in result
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM transactions")).scalar_one() == 3
+
+
+@pytest.mark.parametrize(
+    "query", ["DELETE FROM transactions", "PRAGMA query_only=OFF", "ATTACH 'x.db' AS x"]
+)
+def test_executor_rejects_non_select_statements(executor, query):
+    """Test that only SELECT statements reach the database."""
+    assert executor.run(query) == "Error: only a single SELECT statement can be run."
+    assert executor.stats()["rejected"] == 1
+
+
+def test_executor_caps_rows_with_notice(engine):
+    """Test that results beyond the row cap are dropped with a notice for the agent."""
+    executor = BoundedSQLExecutor(engine, max_rows=2)
+
+    result = executor.run("SELECT merchant FROM transactions ORDER BY id")
+
+    assert result.startswith("[('Shop 1',), ('Shop 2',)]\n(Showing the first 2 rows")
+    assert executor.run("SELECT COUNT(*) FROM transactions") == "[(3,)]"
+    assert executor.stats()["truncated"] == 1
+
+
+def test_executor_cancels_queries_over_budget(engine):
+    """Test that the progress handler interrupts a runaway query."""
+    executor = BoundedSQLExecutor(engine, timeout_seconds=0.05)
+
+    result = executor.run(
+        "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+    )
+
+    assert result == (
+        "Error: the query was cancelled after 0.05s. "
+        "Filter on indexed columns, use the rollup tables or aggregate less data."
+    )
+    assert executor.stats()["timed_out"] == 1
+    assert executor.run("SELECT 1") == "[(1,)]"
+
+
+def test_executor_rejects_full_scans_of_large_indexed_tables(engine):
+    """Test that the query plan check points the agent at indexed columns and rollups."""
+    executor = BoundedSQLExecutor(engine, full_scan_rows=2)
+
+    rejected = executor.run(
+        "SELECT SUM(t.amount) FROM transactions AS t WHERE t.description LIKE '%Shop%'"
+    )
+    accepted = executor.run(
+        "SELECT SUM(amount) FROM transactions WHERE transaction_date >= '2024-03-02'"
+    )
+
+    assert rejected.startswith("Error: the query scans all 3 rows of transactions.")
+    assert "transaction_date" in rejected
+    assert accepted == "[(-50.0,)]"
+    assert executor.run("SELECT total FROM monthly_category_totals") == "[(-60.0,)]"
+
+
+def test_table_aliases():
+    """Test that aliases resolve to tables while keywords are ignored."""
+    aliases = table_aliases(
+        "SELECT * FROM transactions t JOIN daily_totals AS d ON d.day = t.transaction_date "
+        "JOIN monthly_category_totals WHERE 1"
+    )
+
+    assert aliases == {
+        "transactions": "transactions",
+        "t": "transactions",
+        "daily_totals": "daily_totals",
+        "d": "daily_totals",
+        "monthly_category_totals": "monthly_category_totals",
+    }